@@ -0,0 +1,75 @@
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import numpy.typing as npt
+
+from gst_signalling import array_codec
+
+Arrays = List[npt.NDArray[np.generic]]
+
+
+def make_payloads() -> Dict[str, Arrays]:
+    rng = np.random.default_rng(0)
+    return {
+        "joint states (3x7 f64)": [rng.random(7), rng.random(7), rng.random(7)],
+        "imu (3x3 + 2x3 f32)": [
+            rng.random((3, 3), dtype=np.float32),
+            rng.random(3, dtype=np.float32),
+            rng.random(3, dtype=np.float32),
+        ],
+        "depth (120x160 u16)": [rng.integers(0, 2**16, size=(120, 160), dtype=np.uint16)],
+    }
+
+
+def codec_roundtrip(arrays: Arrays) -> int:
+    message = array_codec.encode(arrays)
+    array_codec.decode(message)
+    return len(message)
+
+
+def json_roundtrip(arrays: Arrays) -> int:
+    message = json.dumps([{"dtype": a.dtype.str, "data": a.tolist()} for a in arrays])
+    [np.array(a["data"], dtype=a["dtype"]) for a in json.loads(message)]
+    return len(message)
+
+
+def run(roundtrip: Callable[[Arrays], int], arrays: Arrays, duration: float) -> Dict[str, float]:
+    count = 0
+    size = 0
+    t0 = time.perf_counter()
+    while (elapsed := time.perf_counter() - t0) < duration:
+        size = roundtrip(arrays)
+        count += 1
+
+    return {"messages_per_s": count / elapsed, "message_size": size, "MB_per_s": count * size / elapsed / 1e6}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the array codec with JSON encoding (encode + decode)")
+    parser.add_argument("--duration", default=1.0, type=float, help="duration of each measurement (s)")
+    parser.add_argument("--json-output", type=str, help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, arrays in make_payloads().items():
+        results[name] = {
+            "array_codec": run(codec_roundtrip, arrays, args.duration),
+            "json": run(json_roundtrip, arrays, args.duration),
+        }
+
+        codec, js = results[name]["array_codec"], results[name]["json"]
+        print(f"{name}")
+        print(f"  array_codec: {codec['messages_per_s']:10.0f} msg/s  {codec['message_size']:8.0f} bytes")
+        print(f"  json:        {js['messages_per_s']:10.0f} msg/s  {js['message_size']:8.0f} bytes")
+        print(f"  speedup:     {codec['messages_per_s'] / js['messages_per_s']:10.1f}x")
+
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
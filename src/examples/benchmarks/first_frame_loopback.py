@@ -0,0 +1,197 @@
+"""Time to the first decoded frame of a session joining a running video source.
+
+A GstVideoSource encodes frames with long groups of pictures. Sessions join it one after the other, through a
+producer -> consumer webrtcbin loopback in the same pipeline, and the delay from the connection of a session to
+its first decoded frame is measured, for three strategies:
+
+- natural: the session waits for the next key frame of the encoder
+- forced: a key frame is forced when the session connects
+- gop-cache: the packets since the last key frame are sent to the session when it connects
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import gi
+import numpy as np
+
+gi.require_version("Gst", "1.0")
+gi.require_version("GstWebRTC", "1.0")
+
+from gi.repository import Gst, GstWebRTC  # noqa : E402
+
+from gst_signalling.gst_frame_tap import GstFrameTap  # noqa : E402
+from gst_signalling.gst_media_source import GstVideoSource  # noqa : E402
+
+WIDTH = 320
+HEIGHT = 240
+MODES = ["natural", "forced", "gop-cache"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(np.array(values), q)) if values else float("nan")
+
+
+class JoiningSession:
+    def __init__(self, pipeline: Gst.Pipeline, source: GstVideoSource, mode: str, loop: asyncio.AbstractEventLoop) -> None:
+        self.pipeline = pipeline
+        self.source = source
+        self.mode = mode
+        self.loop = loop
+        self.connected_time: Optional[float] = None
+
+        sender = Gst.ElementFactory.make("webrtcbin")
+        receiver = Gst.ElementFactory.make("webrtcbin")
+        assert sender is not None and receiver is not None
+        self.sender: Gst.Element = sender
+        self.receiver: Gst.Element = receiver
+
+        for webrtc in (self.sender, self.receiver):
+            webrtc.set_property("bundle-policy", "max-bundle")
+            self.pipeline.add(webrtc)
+
+        self.sender.connect("on-ice-candidate", self.on_ice_candidate, self.receiver)
+        self.receiver.connect("on-ice-candidate", self.on_ice_candidate, self.sender)
+        self.sender.connect("on-negotiation-needed", self.on_negotiation_needed)
+        self.sender.connect("notify::connection-state", self.on_connection_state)
+
+        self.source.link_session("join", self.sender)
+        self.tap = GstFrameTap(self.pipeline, self.receiver, loop, format="GRAY8")
+
+        for webrtc in (self.sender, self.receiver):
+            webrtc.sync_state_with_parent()
+
+    def on_ice_candidate(self, _: Gst.Element, mlineindex: int, candidate: str, other: Gst.Element) -> None:
+        other.emit("add-ice-candidate", mlineindex, candidate)
+
+    def on_negotiation_needed(self, sender: Gst.Element) -> None:
+        promise = Gst.Promise.new_with_change_func(self.on_offer_created, None)
+        sender.emit("create-offer", None, promise)
+
+    def on_offer_created(self, promise: Gst.Promise, _: None) -> None:
+        offer = promise.get_reply().get_value("offer")  # type: ignore[union-attr]
+        self.sender.emit("set-local-description", offer, None)
+        promise = Gst.Promise.new_with_change_func(self.on_offer_set, None)
+        self.receiver.emit("set-remote-description", offer, promise)
+
+    def on_offer_set(self, promise: Gst.Promise, _: None) -> None:
+        promise = Gst.Promise.new_with_change_func(self.on_answer_created, None)
+        self.receiver.emit("create-answer", None, promise)
+
+    def on_answer_created(self, promise: Gst.Promise, _: None) -> None:
+        answer = promise.get_reply().get_value("answer")  # type: ignore[union-attr]
+        self.receiver.emit("set-local-description", answer, None)
+        self.sender.emit("set-remote-description", answer, None)
+
+    def on_connection_state(self, webrtc: Gst.Element, _: Any) -> None:
+        if webrtc.get_property("connection-state") == GstWebRTC.WebRTCPeerConnectionState.CONNECTED:
+            self.connected_time = time.monotonic()
+            self.loop.call_soon_threadsafe(self.on_connected)
+
+    def on_connected(self) -> None:
+        if not self.source.join_session("join") and self.mode == "forced":
+            self.source.force_keyframe("join")
+
+    async def first_frame(self, timeout: float) -> Optional[float]:
+        async def wait() -> float:
+            async for frame in self.tap:
+                with frame:
+                    if self.connected_time is not None:
+                        return float(frame.received_time - self.connected_time)
+
+            raise RuntimeError("Frame tap closed.")
+
+        try:
+            return await asyncio.wait_for(wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.tap.close()
+        self.source.unlink_session("join")
+        for webrtc in (self.sender, self.receiver):
+            webrtc.set_state(Gst.State.NULL)
+            self.pipeline.remove(webrtc)
+
+
+async def measure(mode: str, gop: int, framerate: int, joins: int, interval: float, timeout: float) -> Dict[str, float]:
+    loop = asyncio.get_running_loop()
+    pipeline = Gst.Pipeline.new()
+    encoder = f"vp8enc deadline=1 keyframe-max-dist={gop} ! rtpvp8pay pt=96 ! application/x-rtp,media=video,payload=96"
+    source = GstVideoSource(WIDTH, HEIGHT, framerate=framerate, format="GRAY8", encoder=encoder, gop_cache=mode == "gop-cache")
+    source.attach(pipeline)
+    pipeline.set_state(Gst.State.PLAYING)
+
+    async def push_frames() -> None:
+        rng = np.random.default_rng(0)
+        while True:
+            source.push_frame(rng.integers(0, 255, size=(HEIGHT, WIDTH, 1), dtype=np.uint8))
+            await asyncio.sleep(1.0 / framerate)
+
+    pusher = asyncio.create_task(push_frames())
+    delays: List[float] = []
+    timeouts = 0
+    for _ in range(joins):
+        # joins at random points of the group of pictures
+        await asyncio.sleep(interval * (0.5 + np.random.random()))
+        session = JoiningSession(pipeline, source, mode, loop)
+        delay = await session.first_frame(timeout)
+        session.close()
+        if delay is None:
+            timeouts += 1
+        else:
+            delays.append(delay)
+
+    pusher.cancel()
+    source.detach()
+    pipeline.set_state(Gst.State.NULL)
+
+    stats = source.get_join_stats()
+    return {
+        "joins": joins,
+        "timeouts": timeouts,
+        "p50_ms": percentile(delays, 50) * 1000,
+        "p90_ms": percentile(delays, 90) * 1000,
+        "max_ms": max(delays, default=float("nan")) * 1000,
+        "keyframes_forced": stats.keyframes_forced,
+        "gop_replays": stats.gop_replays,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time to the first frame of the sessions joining a running source")
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--gop", default=300, type=int, help="frames between two natural key frames")
+    parser.add_argument("--framerate", default=30, type=int)
+    parser.add_argument("--joins", default=10, type=int, help="sessions joining, one after the other")
+    parser.add_argument("--interval", default=2.0, type=float, help="mean time between two joins (s)")
+    parser.add_argument("--timeout", default=20.0, type=float, help="seconds before a join is failed")
+    parser.add_argument("--json-output", type=str, help="also write the results to this file")
+    parser.add_argument("--verbose", "-v", action="count")
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+
+    Gst.init(None)
+
+    results = {}
+    for mode in args.modes:
+        result = asyncio.run(measure(mode, args.gop, args.framerate, args.joins, args.interval, args.timeout))
+        results[mode] = result
+        print(
+            f"{mode:10s} p50: {result['p50_ms']:8.1f} ms  p90: {result['p90_ms']:8.1f} ms  "
+            f"max: {result['max_ms']:8.1f} ms  timeouts: {result['timeouts']}"
+        )
+
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Glass-to-glass latency of the latency profiles, through a producer -> consumer webrtcbin loopback.
+
+Both webrtcbins live in the same pipeline and exchange their SDP and ICE candidates directly, without
+signalling server. Frames carry their index as black and white blocks, so that the receiving side can
+match each decoded frame with the time it was pushed.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import gi
+import numpy as np
+import numpy.typing as npt
+
+gi.require_version("Gst", "1.0")
+gi.require_version("GstWebRTC", "1.0")
+
+from gi.repository import Gst  # noqa : E402
+
+from gst_signalling.gst_abstract_role import element_ids  # noqa : E402
+from gst_signalling.gst_frame_tap import GstFrameTap  # noqa : E402
+from gst_signalling.gst_latency import (  # noqa : E402
+    PROFILES,
+    LatencyProfile,
+    apply_to_webrtc,
+)
+from gst_signalling.gst_media_source import GstVideoSource  # noqa : E402
+from gst_signalling.gst_pipeline_profile import (  # noqa : E402
+    GstTraceCollector,
+    get_collector,
+)
+from gst_signalling.pipeline_profile import configure_tracers  # noqa : E402
+
+WIDTH = 320
+HEIGHT = 240
+BITS = 16
+BLOCK = WIDTH // BITS
+
+
+def encode_index(frame: npt.NDArray[np.uint8], index: int) -> None:
+    for bit in range(BITS):
+        frame[:BLOCK, bit * BLOCK : (bit + 1) * BLOCK] = 255 if index >> bit & 1 else 0
+
+
+def decode_index(frame: npt.NDArray[np.uint8]) -> int:
+    centers = frame[BLOCK // 2, BLOCK // 2 :: BLOCK, 0][:BITS]
+    return sum(1 << bit for bit, value in enumerate(centers) if value > 128)
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(np.array(values), q)) if values else float("nan")
+
+
+class Loopback:
+    def __init__(self, profile: LatencyProfile, framerate: int, loop: asyncio.AbstractEventLoop) -> None:
+        self.pipeline = Gst.Pipeline.new()
+        sender = Gst.ElementFactory.make("webrtcbin")
+        receiver = Gst.ElementFactory.make("webrtcbin")
+        assert sender is not None and receiver is not None
+        self.sender: Gst.Element = sender
+        self.receiver: Gst.Element = receiver
+
+        for webrtc in (self.sender, self.receiver):
+            webrtc.set_property("bundle-policy", "max-bundle")
+            self.pipeline.add(webrtc)
+            apply_to_webrtc(webrtc, profile)
+
+        self.sender.connect("on-ice-candidate", self.on_ice_candidate, self.receiver)
+        self.receiver.connect("on-ice-candidate", self.on_ice_candidate, self.sender)
+        self.sender.connect("on-negotiation-needed", self.on_negotiation_needed)
+
+        self.source = GstVideoSource(WIDTH, HEIGHT, framerate=framerate, format="GRAY8")
+        self.source.attach(self.pipeline)
+        self.source.apply_latency_profile(profile)
+        self.source.link_session("loopback", self.sender, profile)
+
+        self.tap = GstFrameTap(self.pipeline, self.receiver, loop, format="GRAY8")
+
+    def on_ice_candidate(self, _: Gst.Element, mlineindex: int, candidate: str, other: Gst.Element) -> None:
+        other.emit("add-ice-candidate", mlineindex, candidate)
+
+    def on_negotiation_needed(self, sender: Gst.Element) -> None:
+        promise = Gst.Promise.new_with_change_func(self.on_offer_created, None)
+        sender.emit("create-offer", None, promise)
+
+    def on_offer_created(self, promise: Gst.Promise, _: None) -> None:
+        offer = promise.get_reply().get_value("offer")  # type: ignore[union-attr]
+        self.sender.emit("set-local-description", offer, None)
+        promise = Gst.Promise.new_with_change_func(self.on_offer_set, None)
+        self.receiver.emit("set-remote-description", offer, promise)
+
+    def on_offer_set(self, promise: Gst.Promise, _: None) -> None:
+        promise = Gst.Promise.new_with_change_func(self.on_answer_created, None)
+        self.receiver.emit("create-answer", None, promise)
+
+    def on_answer_created(self, promise: Gst.Promise, _: None) -> None:
+        answer = promise.get_reply().get_value("answer")  # type: ignore[union-attr]
+        self.receiver.emit("set-local-description", answer, None)
+        self.sender.emit("set-remote-description", answer, None)
+
+    def start(self) -> None:
+        self.pipeline.set_state(Gst.State.PLAYING)
+
+    def stop(self) -> None:
+        self.tap.close()
+        self.source.detach()
+        self.pipeline.set_state(Gst.State.NULL)
+
+
+def element_latencies(collector: GstTraceCollector, pipeline: Gst.Pipeline) -> Dict[str, float]:
+    # mean time spent in each element (ms), slowest first
+    ids = element_ids([pipeline])
+    elements = collector.aggregator.get_profile({}, ids).elements
+    collector.aggregator.forget(ids)
+    ordered = sorted(elements.items(), key=lambda item: item[1].latency.mean, reverse=True)
+    return {name: element.latency.mean * 1000 for name, element in ordered if element.latency.count}
+
+
+async def measure(
+    profile: LatencyProfile, framerate: int, warmup: float, duration: float, collector: Optional[GstTraceCollector]
+) -> Dict[str, Any]:
+    loopback = Loopback(profile, framerate, asyncio.get_running_loop())
+    sent: Dict[int, float] = {}
+    latencies: List[float] = []
+
+    async def push_frames() -> None:
+        frame = np.full((HEIGHT, WIDTH, 1), 128, dtype=np.uint8)
+        index = 0
+        while True:
+            index = (index + 1) % (1 << BITS)
+            encode_index(frame, index)
+            sent[index] = time.monotonic()
+            loopback.source.push_frame(frame)
+            await asyncio.sleep(1.0 / framerate)
+
+    async def receive_frames() -> None:
+        t_start = time.monotonic() + warmup
+        async for frame in loopback.tap:
+            with frame:
+                index = decode_index(frame.data)
+                if index in sent and frame.received_time > t_start:
+                    latencies.append(frame.received_time - sent[index])
+
+    loopback.start()
+    tasks = [asyncio.create_task(push_frames()), asyncio.create_task(receive_frames())]
+    await asyncio.sleep(warmup + duration)
+    for task in tasks:
+        task.cancel()
+    loopback.stop()
+
+    result: Dict[str, Any] = {
+        "frames": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "dropped": loopback.tap.stats.dropped,
+        "late": loopback.source.stats.late,
+    }
+    if collector is not None:
+        result["element_latency_ms"] = element_latencies(collector, loopback.pipeline)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Glass-to-glass latency of the latency profiles (webrtcbin loopback)")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--framerate", default=30, type=int)
+    parser.add_argument("--warmup", default=2.0, type=float, help="seconds ignored at the start of each run")
+    parser.add_argument("--duration", default=10.0, type=float, help="seconds measured for each profile")
+    parser.add_argument("--json-output", type=str, help="also write the results to this file")
+    parser.add_argument("--profile-elements", action="store_true", help="measure the latency of each element")
+    parser.add_argument("--verbose", "-v", action="count")
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+
+    if args.profile_elements:
+        configure_tracers()
+    Gst.init(None)
+    collector = get_collector() if args.profile_elements else None
+
+    results = {}
+    for name in args.profiles:
+        result = asyncio.run(measure(PROFILES[name], args.framerate, args.warmup, args.duration, collector))
+        results[name] = result
+        print(f"{name:20s} frames: {result['frames']:5.0f}  p50: {result['p50_ms']:7.1f} ms  p99: {result['p99_ms']:7.1f} ms")
+        for element, latency in list(result.get("element_latency_ms", {}).items())[:5]:
+            print(f"    {element:30s} {latency:7.2f} ms")
+
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
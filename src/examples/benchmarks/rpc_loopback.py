@@ -0,0 +1,90 @@
+"""Throughput of the RPC layer with a growing number of calls in flight.
+
+Two RpcEndpoints exchange their messages through an in-process link with a configurable one way delay,
+which stands for the data channel round trip. A window of 1 call in flight is the lock-step ping-pong.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from gst_signalling.rpc import RpcEndpoint
+
+
+class DelayedLink:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.loop = asyncio.get_running_loop()
+        self.endpoints: List[RpcEndpoint] = []
+
+    def sender(self, index: int) -> Any:
+        def send(message: str) -> None:
+            receiver = self.endpoints[1 - index]
+            if self.delay > 0:
+                self.loop.call_later(self.delay, receiver.feed, message)
+            else:
+                self.loop.call_soon(receiver.feed, message)
+
+        return send
+
+
+async def measure(window: int, delay: float, duration: float, payload: int) -> Dict[str, Any]:
+    link = DelayedLink(delay)
+    client = RpcEndpoint(link.sender(0))
+    server = RpcEndpoint(link.sender(1), max_concurrency=window, max_queued=window)
+    link.endpoints.extend([client, server])
+
+    async def echo(params: Any) -> Any:
+        return params
+
+    server.register("echo", echo)
+    params = {"data": "x" * payload}
+    end = time.monotonic() + duration
+
+    async def caller() -> int:
+        calls = 0
+        while time.monotonic() < end:
+            await client.call("echo", params, timeout=5.0)
+            calls += 1
+        return calls
+
+    t_start = time.monotonic()
+    calls = sum(await asyncio.gather(*[caller() for _ in range(window)]))
+    elapsed = time.monotonic() - t_start
+
+    latencies = client.get_stats().latencies["echo"]
+    return {
+        "calls": calls,
+        "calls_per_s": calls / elapsed,
+        "p50_ms": (latencies.percentile(50) or 0.0) * 1000,
+        "p99_ms": (latencies.percentile(99) or 0.0) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Throughput of pipelined RPC calls over an in-process loopback")
+    parser.add_argument("--windows", nargs="+", default=[1, 4, 16, 64], type=int, help="calls in flight")
+    parser.add_argument("--delay", default=5.0, type=float, help="one way delay of the link (ms)")
+    parser.add_argument("--payload", default=64, type=int, help="size of the call params (bytes)")
+    parser.add_argument("--duration", default=2.0, type=float, help="seconds measured for each window")
+    parser.add_argument("--json-output", type=str, help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for window in args.windows:
+        result = asyncio.run(measure(window, args.delay / 1000, args.duration, args.payload))
+        results[window] = result
+        print(
+            f"in flight: {window:4d}  calls/s: {result['calls_per_s']:9.1f}  "
+            f"p50: {result['p50_ms']:7.1f} ms  p99: {result['p99_ms']:7.1f} ms"
+        )
+
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
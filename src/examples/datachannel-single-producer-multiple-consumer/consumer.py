@@ -7,7 +7,6 @@ from gi.repository import Gst
 
 from gst_signalling import GstSignallingConsumer
 from gst_signalling.gst_abstract_role import GstSession
-from gst_signalling.utils import find_producer_peer_id_by_name
 
 
 def on_data_channel_message(data_channel, data: str) -> None:  # type: ignore[no-untyped-def]
@@ -20,14 +19,12 @@ def on_data_channel_callback(webrtc: Gst.Element, data_channel) -> None:  # type
 
 
 def main(args: argparse.Namespace) -> None:
-    peer_id = find_producer_peer_id_by_name(args.signaling_host, args.signaling_port, args.producer_name)
-
     close_evt = asyncio.Event()
 
     consumer = GstSignallingConsumer(
         host=args.signaling_host,
         port=args.signaling_port,
-        producer_peer_id=peer_id,
+        producer_name=args.producer_name,
     )
 
     @consumer.on("new_session")  # type: ignore[misc]
@@ -11,7 +11,7 @@ gi.require_version("Gst", "1.0")
 from gi.repository import GstWebRTC  # noqa : E402
 
 from gst_signalling import GstSignallingProducer  # noqa : E402
-from gst_signalling.gst_abstract_role import GstSession  # noqa : E402
+from gst_signalling.gst_broadcast import DropPolicy  # noqa : E402
 
 
 def on_data_channel_message(data_channel: GstWebRTC.WebRTCDataChannel, data: str) -> None:
@@ -27,34 +27,29 @@ def main(args: argparse.Namespace) -> None:
 
     FREQ_HZ = 100
 
-    @producer.on("new_session")  # type: ignore[misc]
-    def on_new_session(session: GstSession) -> None:
-        def on_open(channel: GstWebRTC.WebRTCDataChannel) -> None:
-            asyncio.run_coroutine_threadsafe(send_pings(channel), loop)
-
-        async def send_pings(channel: GstWebRTC.WebRTCDataChannel) -> None:
-            try:
-                t0 = time.time()
-
-                while True:
-                    dt = time.time() - t0
-                    channel.send_string(f"ping: {dt:.1f}s")
-                    await asyncio.sleep(1.0 / FREQ_HZ)
-            except Exception as e:
-                logging.error(f"{e}")
-
-        pc = session.pc
-        data_channel = pc.emit("create-data-channel", "chat", None)
-        if data_channel:
-            data_channel.connect("on-open", on_open)
-            data_channel.connect("on-message-string", on_data_channel_message)
-        else:
-            logging.error("Failed to create data channel")
+    producer.create_broadcast_channel("chat", policy=DropPolicy(args.drop_policy))
+
+    @producer.on("new_data_channel")  # type: ignore[misc]
+    def on_new_data_channel(session_id: str, data_channel: GstWebRTC.WebRTCDataChannel) -> None:
+        data_channel.connect("on-message-string", on_data_channel_message)
+
+    async def send_pings() -> None:
+        t0 = time.time()
+
+        while True:
+            dt = time.time() - t0
+            # the message is formatted once and sent to every consumer
+            producer.broadcast("chat", f"ping: {dt:.1f}s")
+            await asyncio.sleep(1.0 / FREQ_HZ)
+
+    async def run_producer() -> None:
+        asyncio.create_task(send_pings())
+        await producer.serve4ever()
 
     # run event loop
     loop = asyncio.get_event_loop()
     try:
-        loop.run_until_complete(producer.serve4ever())
+        loop.run_until_complete(run_producer())
     except KeyboardInterrupt:
         pass
     finally:
@@ -66,6 +61,12 @@ if __name__ == "__main__":
     parser.add_argument("--signaling-host", default="127.0.0.1", help="Gstreamer signaling host")
     parser.add_argument("--signaling-port", default=8443, help="Gstreamer signaling port")
     parser.add_argument("--name", default="data-producer", help="Producer name")
+    parser.add_argument(
+        "--drop-policy",
+        default=DropPolicy.DROP_NEWEST.value,
+        choices=[p.value for p in DropPolicy],
+        help="What to do with consumers that cannot keep up",
+    )
     parser.add_argument("--verbose", "-v", action="count", default=0)
     args = parser.parse_args()
 
@@ -0,0 +1,38 @@
+import argparse
+import logging
+import time
+
+from gst_signalling.frame_ring import FrameRingReader
+
+
+def main(args: argparse.Namespace) -> None:
+    while True:
+        try:
+            reader = FrameRingReader(args.name)
+            break
+        except FileNotFoundError:
+            logging.info(f"Waiting for the frame ring {args.name}")
+            time.sleep(1.0)
+
+    try:
+        for frame in reader:
+            with frame:
+                latency = time.monotonic() - frame.received_time
+                logging.info(
+                    f"frame {frame.sequence} {frame.width}x{frame.height} mean: {frame.data.mean():.1f} "
+                    f"latency: {latency * 1000:.1f} ms meta: {frame.meta}"
+                )
+            logging.info(f"stats: {reader.stats}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read the frames published in a shared memory ring by a consumer")
+    parser.add_argument("name", help="Name of the frame ring")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    main(args)
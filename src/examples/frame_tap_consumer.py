@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import logging
+
+from gst_signalling import GstSignallingConsumer
+from gst_signalling.gst_abstract_role import GstSession
+from gst_signalling.gst_frame_tap import GstFrameTap
+
+
+async def print_frames(tap: GstFrameTap) -> None:
+    async for frame in tap:
+        with frame:
+            logging.info(f"frame {frame.width}x{frame.height} mean: {frame.data.mean():.1f}")
+        logging.info(f"stats: {tap.stats}")
+
+
+def main(args: argparse.Namespace) -> None:
+    consumer = GstSignallingConsumer(
+        host=args.signaling_host,
+        port=args.signaling_port,
+        producer_name=args.producer_name,
+        reestablish=args.reestablish,
+    )
+
+    @consumer.on("new_session")  # type: ignore[misc]
+    def on_new_session(session: GstSession) -> None:
+        if args.publish:
+            consumer.publish_frames(session, args.publish, index=args.stream_index)
+        else:
+            tap = consumer.create_frame_tap(session, index=args.stream_index)
+            asyncio.create_task(print_frames(tap))
+
+    async def run_consumer() -> None:
+        await consumer.connect()
+        await consumer.consume()
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(run_consumer())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(consumer.close())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the latest decoded frames of a producer video stream")
+    parser.add_argument("--signaling-host", default="127.0.0.1", help="Gstreamer signaling host")
+    parser.add_argument("--signaling-port", default=8443, help="Gstreamer signaling port")
+    parser.add_argument("--producer-name", default="gst-stream", help="Producer name")
+    parser.add_argument("--stream-index", default=0, type=int, help="Index of the video stream")
+    parser.add_argument("--reestablish", action="store_true", help="Start a new session when the producer restarts")
+    parser.add_argument("--publish", help="Publish the frames in the shared memory ring with this name")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    main(args)
@@ -0,0 +1,259 @@
+"""Synthetic consumer load on a producer.
+
+Launches N consumer sessions against a named producer, ramping at a given rate, optionally split across
+processes. Reports the connect time percentiles (from the start of the session to the webrtc connection),
+the failures, the data channel message rates and, when its PID is given, the CPU usage of the producer.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from typing import Any, Dict, List, Optional
+
+import gi
+import numpy as np
+
+gi.require_version("GstWebRTC", "1.0")
+
+from gi.repository import Gst, GstWebRTC  # noqa : E402
+
+from gst_signalling import GstSignallingConsumer, utils  # noqa : E402
+from gst_signalling.gst_abstract_role import GstSession  # noqa : E402
+
+
+class SyntheticConsumer:
+    def __init__(self, host: str, port: int, producer_peer_id: str) -> None:
+        self.consumer = GstSignallingConsumer(host=host, port=port, producer_peer_id=producer_peer_id)
+        self.start_time = 0.0
+        self.connect_time: Optional[float] = None
+        self.first_message_time: Optional[float] = None
+        self.last_message_time: Optional[float] = None
+        self.messages = 0
+        self.error: Optional[str] = None
+        self.connected = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+        self.consumer.on("new_session", self.on_new_session)
+        self.consumer.on("new_data_channel", self.on_new_data_channel)
+
+    def on_new_session(self, session: GstSession) -> None:
+        session.pc.connect("notify::connection-state", self.on_connection_state)
+
+    def on_connection_state(self, webrtc: Gst.Element, _: Any) -> None:
+        state = webrtc.get_property("connection-state")
+        if state == GstWebRTC.WebRTCPeerConnectionState.CONNECTED and self.connect_time is None:
+            self.connect_time = time.monotonic() - self.start_time
+            self._loop.call_soon_threadsafe(self.connected.set)
+
+    def on_new_data_channel(self, _: str, channel: Any) -> None:
+        channel.connect("on-message-string", self.on_message)
+        channel.connect("on-message-data", self.on_message)
+
+    def on_message(self, *_: Any) -> None:
+        now = time.monotonic()
+        if self.first_message_time is None:
+            self.first_message_time = now
+        self.last_message_time = now
+        self.messages += 1
+
+    async def _connect(self) -> None:
+        await self.consumer.connect()
+        await self.connected.wait()
+
+    async def run(self, connect_timeout: float, duration: float) -> None:
+        self.start_time = time.monotonic()
+        try:
+            await asyncio.wait_for(self._connect(), connect_timeout)
+        except asyncio.TimeoutError:
+            self.error = "timeout"
+            return
+        except Exception as e:
+            self.error = repr(e)
+            return
+        await asyncio.sleep(duration)
+
+    def message_rate(self) -> Optional[float]:
+        if self.first_message_time is None or self.last_message_time is None or self.messages < 2:
+            return None
+        elapsed = self.last_message_time - self.first_message_time
+        return (self.messages - 1) / elapsed if elapsed > 0 else None
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "connect_time": self.connect_time,
+            "messages": self.messages,
+            "message_rate": self.message_rate(),
+            "error": self.error,
+        }
+
+
+def failed_result(error: str) -> Dict[str, Any]:
+    return {"connect_time": None, "messages": 0, "message_rate": None, "error": error}
+
+
+async def run_consumers(args: argparse.Namespace, producer_peer_id: str, indexes: List[int]) -> List[Dict[str, Any]]:
+    consumers: List[SyntheticConsumer] = []
+    tasks = []
+    t_start = time.monotonic()
+
+    for index in indexes:
+        # sessions are interleaved across the processes, so that the global ramp rate is respected
+        await asyncio.sleep(max(0.0, t_start + index / args.ramp_rate - time.monotonic()))
+        consumer = SyntheticConsumer(args.signalling_host, args.signalling_port, producer_peer_id)
+        consumers.append(consumer)
+        tasks.append(asyncio.create_task(consumer.run(args.connect_timeout, args.duration)))
+
+    await asyncio.gather(*tasks)
+    for consumer in consumers:
+        try:
+            await consumer.consumer.close()
+        except Exception as e:
+            # a consumer that failed to connect has no connection to close
+            logging.debug(f"Failed to close a consumer: {e!r}")
+
+    return [consumer.result() for consumer in consumers]
+
+
+def run_process(args: argparse.Namespace, producer_peer_id: str, indexes: List[int], results: Any) -> None:
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+
+    # a result is always sent, the parent waits for one per process
+    sessions = [failed_result("process failed") for _ in indexes]
+    try:
+        sessions = asyncio.run(run_consumers(args, producer_peer_id, indexes))
+    except Exception as e:
+        logging.exception("Load process failed")
+        sessions = [failed_result(repr(e)) for _ in indexes]
+    finally:
+        results.put(sessions)
+
+
+def cpu_time(pid: int) -> float:
+    # user + system time of a process (Linux only), in seconds
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    return float(np.percentile(np.array(values), q)) if values else None
+
+
+def summarize(sessions: List[Dict[str, Any]], elapsed: float, producer_cpu: Optional[float]) -> Dict[str, Any]:
+    connect_times = [s["connect_time"] * 1000 for s in sessions if s["connect_time"] is not None]
+    rates = [s["message_rate"] for s in sessions if s["message_rate"] is not None]
+    failures: Dict[str, int] = {}
+    for s in sessions:
+        if s["error"] is not None:
+            failures[s["error"]] = failures.get(s["error"], 0) + 1
+
+    return {
+        "sessions": len(sessions),
+        "connected": len(connect_times),
+        "failed": sum(failures.values()),
+        "failures": failures,
+        "connect_p50_ms": percentile(connect_times, 50),
+        "connect_p90_ms": percentile(connect_times, 90),
+        "connect_p99_ms": percentile(connect_times, 99),
+        "connect_max_ms": max(connect_times, default=None),
+        "messages": sum(s["messages"] for s in sessions),
+        "message_rate_mean": float(np.mean(rates)) if rates else None,
+        "message_rate_min": min(rates, default=None),
+        "producer_cpu_percent": producer_cpu,
+        "elapsed": elapsed,
+        "session_results": sessions,
+    }
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    def fmt(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.1f}"
+
+    print(f"sessions: {summary['sessions']}  connected: {summary['connected']}  failed: {summary['failed']}")
+    for error, count in summary["failures"].items():
+        print(f"  {count} x {error}")
+    print(
+        f"connect time p50: {fmt(summary['connect_p50_ms'])} ms  p90: {fmt(summary['connect_p90_ms'])} ms  "
+        f"p99: {fmt(summary['connect_p99_ms'])} ms  max: {fmt(summary['connect_max_ms'])} ms"
+    )
+    print(
+        f"messages: {summary['messages']}  rate per session mean: {fmt(summary['message_rate_mean'])}/s  "
+        f"min: {fmt(summary['message_rate_min'])}/s"
+    )
+    if summary["producer_cpu_percent"] is not None:
+        print(f"producer cpu: {summary['producer_cpu_percent']:.1f} %")
+
+
+def generate_load(args: argparse.Namespace) -> Dict[str, Any]:
+    producer_peer_id = utils.find_producer_peer_id_by_name(args.signalling_host, args.signalling_port, args.producer_name)
+
+    producer_cpu_start = cpu_time(args.producer_pid) if args.producer_pid else None
+    t_start = time.monotonic()
+
+    # spawned, so that GStreamer is initialized in each process
+    context = multiprocessing.get_context("spawn")
+    results: Any = context.Queue()
+    processes = [
+        context.Process(
+            target=run_process, args=(args, producer_peer_id, list(range(i, args.sessions, args.processes)), results)
+        )
+        for i in range(min(args.processes, args.sessions))
+    ]
+    for process in processes:
+        process.start()
+    sessions: List[Dict[str, Any]] = []
+    reported = 0
+    while reported < len(processes):
+        try:
+            sessions.extend(results.get(timeout=1.0))
+            reported += 1
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes) and results.empty():
+                # a process crashed (eg. in GStreamer) before sending its result
+                break
+    for process in processes:
+        process.join()
+    sessions.extend(failed_result("process crashed") for _ in range(args.sessions - len(sessions)))
+
+    elapsed = time.monotonic() - t_start
+    producer_cpu = None
+    if producer_cpu_start is not None:
+        producer_cpu = (cpu_time(args.producer_pid) - producer_cpu_start) / elapsed * 100
+
+    return summarize(sessions, elapsed, producer_cpu)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synthetic consumer load on a gstreamer producer")
+    parser.add_argument("--signalling-host", default="127.0.0.1")
+    parser.add_argument("--signalling-port", default=8443, type=int)
+    parser.add_argument("--producer-name", required=True, help="name of the producer to load")
+    parser.add_argument("--sessions", default=10, type=int, help="number of consumer sessions")
+    parser.add_argument("--ramp-rate", default=2.0, type=float, help="sessions started per second")
+    parser.add_argument("--processes", default=1, type=int, help="processes the sessions are split across")
+    parser.add_argument("--duration", default=10.0, type=float, help="seconds each session stays connected")
+    parser.add_argument("--connect-timeout", default=10.0, type=float, help="seconds before a session is failed")
+    parser.add_argument("--producer-pid", type=int, help="PID of the producer, to measure its CPU usage (Linux)")
+    parser.add_argument("--json-output", type=str, help="also write the results to this file")
+    parser.add_argument("--verbose", "-v", action="count")
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+
+    summary = generate_load(args)
+    print_summary(summary)
+
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
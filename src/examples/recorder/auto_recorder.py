@@ -0,0 +1,223 @@
+"""Records every producer that appears on the signalling server, concurrently in a single process.
+
+A listener watches the producers joining and leaving the server. Each matching producer gets its own
+recorder (and pipeline), writing into <output-dir>/<producer name>/<start time>-<peer id>/, muxed into
+recording.mp4 when the recording stops. A recorder that fails is restarted after a delay while its
+producer is connected, without affecting the other recordings. The files of all the recorders are written
+by a shared DiskWriter, so that the number of concurrent disk writes stays bounded.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import gi
+
+gi.require_version("Gst", "1.0")
+from gi.repository import Gst  # noqa : E402
+
+from examples.recorder.disk_writer import DiskWriter  # noqa : E402
+from examples.recorder.simple_recorder import GstRecorder, save_file  # noqa : E402
+from gst_signalling import GstSignallingListener  # noqa : E402
+from gst_signalling.producer_resolver import ProducerMatcher  # noqa : E402
+
+
+@dataclass
+class Recording:
+    """State of the recording of a producer."""
+
+    peer_id: str
+    name: str
+    directory: Optional[str] = None  # directory of the current, or last, recording
+    recording: bool = False
+    restarts: int = 0
+    last_error: Optional[str] = None
+
+
+def match_names(patterns: List[str]) -> ProducerMatcher:
+    """Matches the producers whose name matches one of the shell patterns, all the producers if none is given."""
+    return lambda _, meta: not patterns or any(fnmatch.fnmatch(meta.get("name", ""), p) for p in patterns)
+
+
+class AutoRecorder:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        output_dir: str,
+        writer: DiskWriter,
+        matcher: Optional[ProducerMatcher] = None,
+        max_muxes: int = 1,
+        restart_delay: float = 5.0,
+        name: str = "auto-recorder",
+    ) -> None:
+        """Initializes the recorder service.
+
+        Args:
+            host (str): Hostname of the signalling server.
+            port (int): Port of the signalling server.
+            output_dir (str): Root directory of the recordings.
+            writer (DiskWriter): Writes the files of all the recordings.
+            matcher (ProducerMatcher, optional): Selects the producers to record, all of them if not given.
+            max_muxes (int): Number of recordings muxed into mp4 files concurrently.
+            restart_delay (float): Time before a failed recording is restarted (s).
+            name (str): Name of the listener peer.
+        """
+        self.logger = logging.getLogger(__name__)
+
+        self.host = host
+        self.port = port
+        self.output_dir = output_dir
+        self.writer = writer
+        self.matcher = matcher or match_names([])
+        self.restart_delay = restart_delay
+
+        self.recordings: Dict[str, Recording] = {}
+        self._tasks: Dict[str, asyncio.Task[None]] = {}
+        self._muxes = asyncio.Semaphore(max_muxes)
+
+        self.listener = GstSignallingListener(host, port, name)
+        self.listener.on("PeerStatusChanged", self.on_peer_status_changed)
+        self.listener.signalling.on("List", self.on_list)
+
+    async def run(self) -> None:
+        await self.listener.connect()
+        # producers connected before the listener
+        await self.listener.signalling.send_list()
+        await self.listener.consume()
+
+    def on_list(self, producers: Dict[str, Dict[str, str]]) -> None:
+        for peer_id, meta in producers.items():
+            self.on_producer(peer_id, meta)
+
+    def on_peer_status_changed(self, peer_id: str, roles: List[str], meta: Dict[str, str]) -> None:
+        if "producer" in roles:
+            self.on_producer(peer_id, meta)
+        else:
+            self.on_producer_left(peer_id)
+
+    def on_producer(self, peer_id: str, meta: Dict[str, str]) -> None:
+        if peer_id in self._tasks or not self.matcher(peer_id, meta):
+            return
+
+        recording = Recording(peer_id, meta.get("name") or peer_id)
+        self.recordings[peer_id] = recording
+        self.logger.info(f"Recording producer {recording.name} ({peer_id})")
+        self._tasks[peer_id] = asyncio.create_task(self._record(recording), name=f"record {peer_id}")
+
+    def on_producer_left(self, peer_id: str) -> None:
+        task = self._tasks.pop(peer_id, None)
+        if task is not None:
+            self.logger.info(f"Producer {peer_id} left, stopping its recording")
+            task.cancel()
+
+    async def _record(self, recording: Recording) -> None:
+        # restarts the recording until the producer leaves
+        while True:
+            try:
+                await self._record_once(recording)
+            except Exception as e:
+                # a failing recording must not stop the other ones
+                self.logger.error(f"Recording of {recording.name} failed: {e}")
+                recording.last_error = str(e)
+
+            recording.restarts += 1
+            await asyncio.sleep(self.restart_delay)
+
+    async def _record_once(self, recording: Recording) -> None:
+        name = re.sub(r"[^\w.-]", "_", recording.name)
+        directory = os.path.join(self.output_dir, name, f"{time.strftime('%Y%m%d-%H%M%S')}-{recording.peer_id[:8]}")
+        os.makedirs(directory, exist_ok=True)
+        recording.directory = directory
+
+        recorder = GstRecorder(self.host, self.port, peer_id=recording.peer_id, output_dir=directory, writer=self.writer)
+        try:
+            recorder.record()
+            recording.recording = True
+            await self._watch(recorder)
+        finally:
+            recording.recording = False
+            # stopping waits for the pending writes of the files
+            await asyncio.to_thread(recorder.stop)
+            # a cancelled recording is still muxed
+            await asyncio.shield(self._mux(directory))
+
+    async def _watch(self, recorder: GstRecorder) -> None:
+        # returns at the end of the streams, raises on an error of the pipeline or of the disk writes
+        bus = recorder.get_bus()
+        while True:
+            msg = bus.pop_filtered(Gst.MessageType.ERROR | Gst.MessageType.EOS)
+            if msg is not None and msg.type == Gst.MessageType.ERROR:
+                err, debug = msg.parse_error()
+                raise RuntimeError(f"{err}, {debug}")
+            if msg is not None:
+                return
+
+            for location in recorder.files:
+                error = self.writer.failed(location)
+                if error is not None:
+                    raise RuntimeError(error)
+            await asyncio.sleep(0.1)
+
+    async def _mux(self, directory: str) -> None:
+        async with self._muxes:
+            await asyncio.to_thread(save_file, os.path.join(directory, "recording.mp4"), directory)
+
+    async def close(self) -> None:
+        """Stops and muxes all the recordings, and disconnects the listener."""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.listener.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Records every producer connected to the signalling server")
+    parser.add_argument("--signaling-host", default="127.0.0.1", help="Gstreamer signaling host")
+    parser.add_argument("--signaling-port", default=8443, help="Gstreamer signaling port")
+    parser.add_argument("--output-dir", default=".", help="root directory of the recordings")
+    parser.add_argument("--producer-name", nargs="*", default=[], help="names of the producers to record (shell patterns)")
+    parser.add_argument("--max-writers", default=2, type=int, help="files written concurrently")
+    parser.add_argument("--max-pending-mb", default=64, type=int, help="MB waiting to be written before the streams block")
+    parser.add_argument("--max-muxes", default=1, type=int, help="recordings muxed concurrently")
+    parser.add_argument("--restart-delay", default=5.0, type=float, help="seconds before a failed recording restarts")
+    parser.add_argument("--verbose", "-v", action="count", default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose > 1 else logging.INFO)
+    Gst.init(None)
+
+    writer = DiskWriter(args.max_writers, args.max_pending_mb * 1024 * 1024)
+    recorder = AutoRecorder(
+        args.signaling_host,
+        int(args.signaling_port),
+        args.output_dir,
+        writer,
+        match_names(args.producer_name),
+        max_muxes=args.max_muxes,
+        restart_delay=args.restart_delay,
+    )
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(recorder.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(recorder.close())
+        writer.close()
+        logging.info(f"disk writes: {writer.get_stats()}")
+        for recording in recorder.recordings.values():
+            logging.info(f"{recording.name}: {recording.directory} restarts: {recording.restarts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import collections
+import concurrent.futures
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import IO, Deque, Dict, List, Optional
+
+
+@dataclass
+class DiskWriterStats:
+    """Counters of a disk writer.
+
+    - written_bytes: bytes written to the files
+    - pending_bytes: bytes waiting to be written
+    - blocked: writes that waited for the pending bytes to go below the limit
+    - failed_files: files whose write failed (eg. disk full), with the error
+    """
+
+    written_bytes: int = 0
+    pending_bytes: int = 0
+    blocked: int = 0
+    failed_files: Dict[str, str] = field(default_factory=dict)
+
+
+class _File:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.handle: Optional[IO[bytes]] = None
+        self.chunks: Deque[bytes] = collections.deque()
+        self.scheduled = False
+        self.error: Optional[str] = None
+
+
+class DiskWriter:
+    """Writes the recorded streams with a bounded number of writer threads.
+
+    The chunks of a file are written in order, by a single thread at a time, and the files share
+    max_workers threads. When more than max_pending_bytes are waiting, write blocks the calling (streaming)
+    thread until the disk catches up: the recording falls behind, but the files stay consistent.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending_bytes: int = 64 * 1024 * 1024) -> None:
+        """Initializes the writer.
+
+        Args:
+            max_workers (int): Number of files written concurrently.
+            max_pending_bytes (int): Bytes waiting to be written above which write blocks.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_pending_bytes = max_pending_bytes
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="disk-writer")
+        self._files: Dict[str, _File] = {}
+        self._cond = threading.Condition()
+        self._stats = DiskWriterStats()
+
+    def write(self, path: str, data: bytes) -> bool:
+        """Appends data to a file, opened (truncated) on the first write.
+
+        Args:
+            path (str): Path of the file.
+            data (bytes): Data to append.
+        Returns:
+            bool: False if a previous write of the file failed, the data is dropped.
+        """
+        with self._cond:
+            if self._stats.pending_bytes > self.max_pending_bytes:
+                self._stats.blocked += 1
+                self._cond.wait_for(lambda: self._stats.pending_bytes <= self.max_pending_bytes)
+
+            file = self._files.get(path) or self._files.setdefault(path, _File(path))
+            if file.error is not None:
+                return False
+            file.chunks.append(data)
+            self._stats.pending_bytes += len(data)
+            if not file.scheduled:
+                file.scheduled = True
+                self._executor.submit(self._drain, file)
+        return True
+
+    def _drain(self, file: _File) -> None:
+        while True:
+            with self._cond:
+                if not file.chunks:
+                    file.scheduled = False
+                    self._cond.notify_all()
+                    return
+                data = file.chunks.popleft()
+
+            error = None
+            if file.error is None:
+                try:
+                    if file.handle is None:
+                        file.handle = open(file.path, "wb")
+                    file.handle.write(data)
+                except OSError as e:
+                    error = str(e)
+                    self.logger.error(f"Failed to write {file.path}: {e}")
+
+            with self._cond:
+                self._stats.pending_bytes -= len(data)
+                if error is not None:
+                    file.error = error
+                    self._stats.failed_files[file.path] = error
+                elif file.error is None:
+                    self._stats.written_bytes += len(data)
+                self._cond.notify_all()
+
+    def failed(self, path: str) -> Optional[str]:
+        """Gets the error of a file, None if it was written without error."""
+        with self._cond:
+            file = self._files.get(path)
+            return None if file is None else file.error
+
+    def close_file(self, path: str, timeout: Optional[float] = None) -> bool:
+        """Waits for the pending chunks of a file to be written, and closes it.
+
+        Args:
+            path (str): Path of the file.
+            timeout (float, optional): Time to wait (s), forever if not given.
+        Returns:
+            bool: False if the chunks were not written before the timeout, the file is left open.
+        """
+        with self._cond:
+            closing = self._files.get(path)
+            if closing is None:
+                return True
+            file = closing
+            if not self._cond.wait_for(lambda: not file.scheduled, timeout):
+                return False
+            del self._files[path]
+
+        if file.handle is not None:
+            try:
+                file.handle.close()
+            except OSError as e:
+                self.logger.error(f"Failed to close {path}: {e}")
+        return True
+
+    def get_stats(self) -> DiskWriterStats:
+        """Gets a snapshot of the counters."""
+        with self._cond:
+            return DiskWriterStats(
+                self._stats.written_bytes, self._stats.pending_bytes, self._stats.blocked, dict(self._stats.failed_files)
+            )
+
+    def close(self) -> None:
+        """Writes the pending chunks and closes all the files."""
+        with self._cond:
+            paths: List[str] = list(self._files)
+        for path in paths:
+            self.close_file(path)
+        self._executor.shutdown()
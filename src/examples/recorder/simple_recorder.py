@@ -1,41 +1,65 @@
 import argparse
+import logging
 import os
 import subprocess
-from typing import Optional
+from typing import List, Optional
 
 import gi
 
 gi.require_version("Gst", "1.0")
 from gi.repository import Gst  # noqa : E402
 
+from examples.recorder.disk_writer import DiskWriter  # noqa : E402
 from gst_signalling.utils import find_producer_peer_id_by_name  # noqa : E402
 
 
 class GstRecorder:
     def __init__(
-        self, signalling_host: str, signalling_port: int, peer_id: Optional[str] = None, peer_name: Optional[str] = None
+        self,
+        signalling_host: str,
+        signalling_port: int,
+        peer_id: Optional[str] = None,
+        peer_name: Optional[str] = None,
+        output_dir: str = ".",
+        writer: Optional[DiskWriter] = None,
     ) -> None:
+        """Records the streams of a producer into gdp files, one per stream.
+
+        Args:
+            signalling_host (str): Hostname of the signalling server.
+            signalling_port (int): Port of the signalling server.
+            peer_id (str, optional): Peer ID of the producer.
+            peer_name (str, optional): Name of the producer, used if its peer ID is not given.
+            output_dir (str): Directory of the gdp files.
+            writer (DiskWriter, optional): Writes the files with bounded concurrency, shared by the recorders.
+                The files are written by a filesink in the streaming threads if not given.
+        Raises:
+            RuntimeError: The pipeline or the webrtcsrc element could not be created.
+        """
         Gst.init(None)
 
+        self.logger = logging.getLogger(__name__)
+        self.output_dir = output_dir
+        self.writer = writer
+        self.files: List[str] = []
+
         self.pipeline = Gst.Pipeline.new("webRTC-recorder")
         self.source = Gst.ElementFactory.make("webrtcsrc")
 
         if not self.pipeline:
-            print("Pipeline could be created.")
-            exit(-1)
+            raise RuntimeError("Pipeline could not be created.")
 
         if not self.source:
-            print(
-                "webrtcsrc component could not be created. Please make sure that the plugin is installed \
-                (see https://gitlab.freedesktop.org/gstreamer/gst-plugins-rs/-/tree/main/net/webrtc)"
+            raise RuntimeError(
+                "webrtcsrc component could not be created. Please make sure that the plugin is installed "
+                "(see https://gitlab.freedesktop.org/gstreamer/gst-plugins-rs/-/tree/main/net/webrtc)"
             )
-            exit(-1)
 
         self.pipeline.add(self.source)
 
         if peer_id is None:
             peer_id = find_producer_peer_id_by_name(signalling_host, signalling_port, peer_name)
-            print(f"found peer id: {peer_id}")
+            self.logger.info(f"found peer id: {peer_id}")
 
         self.source.connect("pad-added", self.webrtcsrc_pad_added_cb)
         signaller = self.source.get_property("signaller")
@@ -43,47 +67,53 @@ class GstRecorder:
         signaller.set_property("uri", f"ws://{signalling_host}:{signalling_port}")
 
     def webrtcsrc_pad_added_cb(self, webrtcsrc: Gst.Element, pad: Gst.Pad) -> None:
-        if pad.get_name().startswith("video"):  # type: ignore[union-attr]
-            videodepay = Gst.ElementFactory.make("rtph264depay")
-            assert videodepay is not None
-            gdppay = Gst.ElementFactory.make("gdppay")
-            assert gdppay is not None
-            filesink = Gst.ElementFactory.make("filesink")
-            assert filesink is not None
-            filesink.set_property("location", f"{pad.get_name()}.gdp")
-
-            self.pipeline.add(videodepay)
-            self.pipeline.add(gdppay)
-            self.pipeline.add(filesink)
-            videodepay.link(gdppay)
-            gdppay.link(filesink)
-            pad.link(videodepay.get_static_pad("sink"))  # type: ignore[arg-type]
-
-            videodepay.sync_state_with_parent()
-            gdppay.sync_state_with_parent()
-            filesink.sync_state_with_parent()
-        elif pad.get_name().startswith("audio"):  # type: ignore[union-attr]
-            audiodepay = Gst.ElementFactory.make("rtpopusdepay")
-            assert audiodepay is not None
-            gdppay = Gst.ElementFactory.make("gdppay")
-            assert gdppay is not None
-            filesink = Gst.ElementFactory.make("filesink")
-            assert filesink is not None
-            filesink.set_property("location", f"{pad.get_name()}.gdp")
-
-            self.pipeline.add(audiodepay)
-            self.pipeline.add(gdppay)
-            self.pipeline.add(filesink)
-            audiodepay.link(gdppay)
-            gdppay.link(filesink)
-            pad.link(audiodepay.get_static_pad("sink"))  # type: ignore[arg-type]
-
-            audiodepay.sync_state_with_parent()
-            gdppay.sync_state_with_parent()
-            filesink.sync_state_with_parent()
-
-    def __del__(self) -> None:
-        Gst.deinit()
+        name = pad.get_name()
+        assert name is not None
+        if name.startswith("video"):
+            self.record_pad(pad, "rtph264depay")
+        elif name.startswith("audio"):
+            self.record_pad(pad, "rtpopusdepay")
+
+    def record_pad(self, pad: Gst.Pad, depayloader: str) -> None:
+        depay = Gst.ElementFactory.make(depayloader)
+        assert depay is not None
+        gdppay = Gst.ElementFactory.make("gdppay")
+        assert gdppay is not None
+
+        location = os.path.join(self.output_dir, f"{pad.get_name()}.gdp")
+        self.files.append(location)
+        if self.writer is None:
+            sink = Gst.ElementFactory.make("filesink")
+            assert sink is not None
+            sink.set_property("location", location)
+        else:
+            sink = Gst.ElementFactory.make("appsink")
+            assert sink is not None
+            sink.set_property("emit-signals", True)
+            sink.set_property("sync", False)
+            sink.connect("new-sample", self.on_new_sample, location)
+
+        self.pipeline.add(depay)
+        self.pipeline.add(gdppay)
+        self.pipeline.add(sink)
+        depay.link(gdppay)
+        gdppay.link(sink)
+        pad.link(depay.get_static_pad("sink"))  # type: ignore[arg-type]
+
+        depay.sync_state_with_parent()
+        gdppay.sync_state_with_parent()
+        sink.sync_state_with_parent()
+
+    def on_new_sample(self, appsink: Gst.Element, location: str) -> Gst.FlowReturn:
+        sample = appsink.emit("pull-sample")
+        if sample is None:
+            return Gst.FlowReturn.EOS
+
+        assert self.writer is not None
+        buffer = sample.get_buffer()
+        if not self.writer.write(location, buffer.extract_dup(0, buffer.get_size())):
+            return Gst.FlowReturn.ERROR
+        return Gst.FlowReturn.OK
 
     def get_bus(self) -> Gst.Bus:
         return self.pipeline.get_bus()
@@ -92,14 +122,16 @@ class GstRecorder:
         # Start playing
         ret = self.pipeline.set_state(Gst.State.PLAYING)
         if ret == Gst.StateChangeReturn.FAILURE:
-            print("Error starting playback.")
-            exit(-1)
-        print("recording ... (ctrl+c to quit)")
+            raise RuntimeError("Error starting playback.")
+        self.logger.info("recording ... (ctrl+c to quit)")
 
     def stop(self) -> None:
-        print("stopping")
+        self.logger.info("stopping")
         self.pipeline.send_event(Gst.Event.new_eos())
         self.pipeline.set_state(Gst.State.NULL)
+        if self.writer is not None:
+            for location in self.files:
+                self.writer.close_file(location)
 
 
 def process_msg(bus: Gst.Bus) -> bool:
@@ -117,7 +149,7 @@ def process_msg(bus: Gst.Bus) -> bool:
     return True
 
 
-def save_file(file_name: str) -> None:
+def save_file(file_name: str, directory: str = ".") -> None:
     """
     mux the gdp streams with a command similar to
     gst-launch-1.0 \
@@ -128,7 +160,7 @@ def save_file(file_name: str) -> None:
     """
 
     base_command = f"gst-launch-1.0 mp4mux name=mux ! filesink location={file_name} "
-    files = [f for f in os.listdir() if f.endswith(".gdp")]
+    files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".gdp")]
 
     if len(files) == 0:
         print("no gdp file found")
@@ -140,9 +172,9 @@ def save_file(file_name: str) -> None:
 
     for file in files:
         if os.path.isfile(file):
-            if "video" in file:
+            if "video" in os.path.basename(file):
                 file_commands.append(f"filesrc location={file} ! gdpdepay ! h264parse ! queue ! mux.")
-            elif "audio" in file:
+            elif "audio" in os.path.basename(file):
                 file_commands.append(f"filesrc location={file} ! gdpdepay ! opusparse ! queue ! mux.")
 
     command = base_command + " ".join(file_commands)
@@ -170,14 +202,18 @@ def main() -> None:
     parser.add_argument("--output", type=str, help="output mp4 file", default="recording.mp4")
 
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
 
     if args.remote_producer_peer_id is None and args.remote_producer_peer_name is None:
         exit("You must set either remote_producer_peer_id or remote_producer_peer_name")
 
-    recorder = GstRecorder(
-        args.signaling_host, args.signaling_port, args.remote_producer_peer_id, args.remote_producer_peer_name
-    )
-    recorder.record()
+    try:
+        recorder = GstRecorder(
+            args.signaling_host, args.signaling_port, args.remote_producer_peer_id, args.remote_producer_peer_name
+        )
+        recorder.record()
+    except RuntimeError as e:
+        exit(str(e))
 
     # Wait until error or EOS
     bus = recorder.get_bus()
@@ -193,6 +229,7 @@ def main() -> None:
         recorder.stop()
 
     save_file(args.output)
+    Gst.deinit()
 
 
 if __name__ == "__main__":
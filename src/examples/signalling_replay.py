@@ -0,0 +1,60 @@
+"""Stand-in signalling server replaying a capture to each connecting peer.
+
+Captures are recorded with GstSignalling.start_capture. Once the peers disconnect (or on Ctrl-C), the replay
+statistics are printed: messages delivered, lag behind the capture timing and messages received from the peers.
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import Counter
+
+from gst_signalling.signalling_capture import read_capture
+from gst_signalling.signalling_replay import ReplayServer
+
+
+def describe(path: str) -> None:
+    messages = read_capture(path)
+    duration = messages[-1].time if messages else 0.0
+    print(f"{len(messages)} messages over {duration:.3f}s")
+    for (direction, kind), count in sorted(Counter((m.direction, m.message.get("type")) for m in messages).items()):
+        print(f"  {direction:3s} {kind}: {count}")
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = ReplayServer(args.capture, host=args.host, port=args.port, speed=args.speed)
+    await server.start()
+    try:
+        await asyncio.Future()
+    finally:
+        await server.close()
+        for index, stats in enumerate(server.replays):
+            print(f"peer {index}: {stats.messages} messages in {stats.duration:.3f}s  max lag: {stats.max_lag * 1000:.1f} ms")
+        print(f"received from the peers: {len(server.received)} messages")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a signalling capture as a stand-in signalling server")
+    parser.add_argument("capture", help="capture file (.jsonl or .jsonl.gz)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", default=8443, type=int)
+    parser.add_argument("--speed", default=1.0, type=float, help="time acceleration, 0 for as fast as possible")
+    parser.add_argument("--describe", action="store_true", help="only print the content of the capture")
+    parser.add_argument("--verbose", "-v", action="count")
+    args = parser.parse_args()
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+
+    if args.describe:
+        describe(args.capture)
+        return
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
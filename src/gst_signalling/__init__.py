@@ -1,4 +1,24 @@
+import importlib
+from typing import TYPE_CHECKING, Any
+
 # from .gst_abstract_role import GstSession  # noqa: F401
-from .gst_consumer import GstSignallingConsumer  # noqa: F401
 from .gst_listener import GstSignallingListener  # noqa: F401
-from .gst_producer import GstSignallingProducer  # noqa: F401
+from .gst_signalling import GstSignalling  # noqa: F401
+
+if TYPE_CHECKING:
+    from .gst_consumer import GstSignallingConsumer  # noqa: F401
+    from .gst_producer import GstSignallingProducer  # noqa: F401
+    from .gst_worker_pool import GstSignallingProducerPool  # noqa: F401
+
+# the media roles load GStreamer, and the producer pool multiprocessing, they are only imported when used
+_LAZY_ROLES = {
+    "GstSignallingConsumer": ".gst_consumer",
+    "GstSignallingProducer": ".gst_producer",
+    "GstSignallingProducerPool": ".gst_worker_pool",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ROLES:
+        return getattr(importlib.import_module(_LAZY_ROLES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,170 @@
+"""Binary codec for numpy arrays sent over data channels.
+
+A message holds one or more arrays:
+
+    header      magic "GSA", version (u8), array count (u16), padding
+    descriptors for each array: dtype length (u8), dtype (numpy dtype.str), ndim (u8),
+                shape (u32 * ndim), strides (i64 * ndim), data offset (u64), data size (u64)
+    data        raw array buffers, each aligned on ALIGNMENT bytes
+
+Arrays are copied once, straight into the message buffer, and decoded as read-only views
+over the received buffer (np.frombuffer), without any further copy.
+"""
+
+import functools
+import struct
+from typing import Any, List, Sequence, Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
+
+MAGIC = b"GSA"
+VERSION = 1
+ALIGNMENT = 16
+
+_HEADER = struct.Struct("<3sBH2x")
+_DTYPE_LENGTH = struct.Struct("<B")
+_NDIM = struct.Struct("<B")
+_DATA = struct.Struct("<QQ")
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _layout(array: npt.NDArray[np.generic]) -> npt.NDArray[np.generic]:
+    # C and Fortran contiguous arrays are sent as is, other ones are compacted
+    if array.dtype.hasobject or array.dtype.fields is not None:
+        raise ValueError(f"Unsupported dtype {array.dtype}.")
+    if array.flags.c_contiguous or array.flags.f_contiguous:
+        return array
+    return np.ascontiguousarray(array)
+
+
+@functools.lru_cache(maxsize=256)
+def _strides(shape: Tuple[int, ...], itemsize: int, order: str) -> Tuple[int, ...]:
+    strides = []
+    stride = itemsize
+    for dim in reversed(shape) if order == "C" else shape:
+        strides.append(stride)
+        stride *= max(dim, 1)
+    return tuple(reversed(strides)) if order == "C" else tuple(strides)
+
+
+def _descriptor_size(array: npt.NDArray[np.generic]) -> int:
+    return _DTYPE_LENGTH.size + len(array.dtype.str) + _NDIM.size + 12 * array.ndim + _DATA.size
+
+
+def encode(arrays: Sequence[npt.NDArray[np.generic]]) -> bytes:
+    """Encodes arrays in a single message.
+
+    Args:
+        arrays (Sequence[np.ndarray]): Arrays to encode (up to 65535).
+    Returns:
+        bytes: The message, to be sent with send_data.
+    """
+    if len(arrays) > 0xFFFF:
+        raise ValueError(f"Too many arrays in a single message ({len(arrays)}).")
+
+    layouts = [_layout(np.asarray(a)) for a in arrays]
+
+    header = bytearray(_HEADER.size + sum(_descriptor_size(a) for a in layouts))
+    offset = len(header)
+    offsets = []
+    for array in layouts:
+        offset = _align(offset)
+        offsets.append(offset)
+        offset += array.nbytes
+
+    _HEADER.pack_into(header, 0, MAGIC, VERSION, len(layouts))
+    position = _HEADER.size
+    for array, data_offset in zip(layouts, offsets):
+        position = _pack_descriptor(header, position, array, data_offset)
+
+    parts: List[BytesLike] = [header]
+    position = len(header)
+    for array, data_offset in zip(layouts, offsets):
+        parts.append(bytes(data_offset - position))
+        if array.nbytes:
+            # the transpose of a Fortran array is C contiguous
+            source = array if array.flags.c_contiguous else array.T
+            parts.append(memoryview(source).cast("B"))  # type: ignore[arg-type]
+        position = data_offset + array.nbytes
+
+    # single copy, from the array memory to the message (bytes, that PyGObject hands to GLib.Bytes as is)
+    return b"".join(parts)
+
+
+def _pack_descriptor(buffer: bytearray, position: int, array: npt.NDArray[np.generic], data_offset: int) -> int:
+    dtype = array.dtype.str.encode()
+    _DTYPE_LENGTH.pack_into(buffer, position, len(dtype))
+    position += _DTYPE_LENGTH.size
+    buffer[position : position + len(dtype)] = dtype
+    position += len(dtype)
+
+    _NDIM.pack_into(buffer, position, array.ndim)
+    position += _NDIM.size
+    strides = _strides(array.shape, array.itemsize, "C" if array.flags.c_contiguous else "F")
+    struct.pack_into(f"<{array.ndim}I{array.ndim}q", buffer, position, *array.shape, *strides)
+    position += 12 * array.ndim
+
+    _DATA.pack_into(buffer, position, data_offset, array.nbytes)
+    return position + _DATA.size
+
+
+@functools.lru_cache(maxsize=64)
+def _dtype(descr: bytes) -> np.dtype[Any]:
+    return np.dtype(descr.decode())
+
+
+def _unpack_descriptor(buffer: BytesLike, position: int) -> Tuple[int, npt.NDArray[np.generic]]:
+    (dtype_length,) = _DTYPE_LENGTH.unpack_from(buffer, position)
+    position += _DTYPE_LENGTH.size
+    dtype = _dtype(bytes(buffer[position : position + dtype_length]))
+    position += dtype_length
+
+    (ndim,) = _NDIM.unpack_from(buffer, position)
+    position += _NDIM.size
+    dims = struct.unpack_from(f"<{ndim}I{ndim}q", buffer, position)
+    shape, strides = dims[:ndim], dims[ndim:]
+    position += 12 * ndim
+
+    data_offset, nbytes = _DATA.unpack_from(buffer, position)
+    position += _DATA.size
+
+    if nbytes == 0:
+        return position, np.empty(shape, dtype=dtype)
+
+    flat = np.frombuffer(buffer, dtype=dtype, count=nbytes // dtype.itemsize, offset=data_offset)
+    # arrays are always sent C or Fortran contiguous, reshaping gives a view with the sent strides
+    if strides == _strides(shape, dtype.itemsize, "C"):
+        return position, flat.reshape(shape, order="C")
+    return position, flat.reshape(shape, order="F")
+
+
+def decode(buffer: BytesLike) -> List[npt.NDArray[np.generic]]:
+    """Decodes the arrays of a message.
+
+    The arrays are read-only views over the buffer, copy them to keep them beyond the buffer lifetime
+    or to modify them.
+
+    Args:
+        buffer (bytes): The received message.
+    Returns:
+        List[np.ndarray]: The decoded arrays.
+    """
+    magic, version, count = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not an array message.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported array message version {version}.")
+
+    arrays = []
+    position = _HEADER.size
+    for _ in range(count):
+        position, array = _unpack_descriptor(buffer, position)
+        arrays.append(array)
+
+    return arrays
@@ -0,0 +1,65 @@
+import collections
+import threading
+from dataclasses import dataclass
+from typing import Deque, Optional, Tuple
+
+
+@dataclass
+class ClockSyncStats:
+    """Round trip time and clock offset estimates of a session (in seconds).
+
+    The offset is the remote clock minus the local clock: remote_time = local_time + offset.
+    """
+
+    rtt: Optional[float] = None
+    min_rtt: Optional[float] = None
+    offset: Optional[float] = None
+    samples: int = 0
+
+    @property
+    def one_way_latency(self) -> Optional[float]:
+        """One way latency, assuming a symmetric path."""
+        if self.rtt is None:
+            return None
+        return self.rtt / 2.0
+
+
+class ClockOffsetEstimator:
+    """NTP style round trip time and clock offset estimator.
+
+    Each probe exchange gives four timestamps: t0 (request sent, local clock), t1 (request received,
+    remote clock), t2 (reply sent, remote clock) and t3 (reply received, local clock).
+    The offset retained is the one of the sample with the lowest round trip time among the last
+    window samples (the least affected by queuing), and the round trip time is smoothed with an EWMA.
+    """
+
+    def __init__(self, window: int = 8, alpha: float = 0.125) -> None:
+        """Initializes the estimator.
+
+        Args:
+            window (int): Number of recent samples used for the offset estimate.
+            alpha (float): Smoothing factor of the round trip time.
+        """
+        self.alpha = alpha
+        self._samples: Deque[Tuple[float, float]] = collections.deque(maxlen=window)
+        self._stats = ClockSyncStats()
+        self._lock = threading.Lock()
+
+    def add_sample(self, t0: float, t1: float, t2: float, t3: float) -> None:
+        """Adds the timestamps of a probe exchange."""
+        rtt = max(0.0, (t3 - t0) - (t2 - t1))
+        offset = ((t1 - t0) + (t2 - t3)) / 2.0
+
+        with self._lock:
+            self._samples.append((rtt, offset))
+
+            stats = self._stats
+            stats.samples += 1
+            stats.rtt = rtt if stats.rtt is None else (1.0 - self.alpha) * stats.rtt + self.alpha * rtt
+            stats.min_rtt = rtt if stats.min_rtt is None else min(stats.min_rtt, rtt)
+            stats.offset = min(self._samples)[1]
+
+    def get_stats(self) -> ClockSyncStats:
+        """Gets a copy of the current estimates."""
+        with self._lock:
+            return ClockSyncStats(self._stats.rtt, self._stats.min_rtt, self._stats.offset, self._stats.samples)
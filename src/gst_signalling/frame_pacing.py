@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class MediaSourceStats:
+    """Counters of a media source.
+
+    - pushed: frames pushed in the pipeline
+    - dropped: frames discarded because they came earlier than the target framerate allows,
+      or because no buffer of the pool was available (the pipeline does not keep up)
+    - late: frames that came after their time slot (at least one slot was skipped)
+    - unsubscribed: frames not encoded because no session receives the stream
+    """
+
+    pushed: int = 0
+    dropped: int = 0
+    late: int = 0
+    unsubscribed: int = 0
+
+
+class FramePacer:
+    """Paces the frames pushed from Python to a target framerate.
+
+    The running time is cut into slots of one frame duration. A frame is timestamped with the start of its
+    slot, so that the stream keeps a steady framerate whatever the jitter of the pushes. A frame whose slot
+    already has one is dropped, and a frame that skips slots is counted as late.
+
+    Not thread safe, the media source calls it under its lock.
+    """
+
+    def __init__(self, frame_duration: int, stats: MediaSourceStats) -> None:
+        """Initializes the pacer.
+
+        Args:
+            frame_duration (int): Duration of a slot (ns).
+            stats (MediaSourceStats): Counters of the dropped and late frames.
+        """
+        self.frame_duration = frame_duration
+        self.stats = stats
+        self._last_slot: Optional[int] = None
+
+    def pace(self, running_time: int) -> Optional[int]:
+        """Gets the timestamp of a frame.
+
+        Args:
+            running_time (int): Running time of the pipeline when the frame is pushed (ns).
+        Returns:
+            Optional[int]: pts of the frame (ns), None if it must be dropped.
+        """
+        slot = running_time // self.frame_duration
+        if self._last_slot is not None:
+            if slot <= self._last_slot:
+                self.stats.dropped += 1
+                return None
+            if slot > self._last_slot + 1:
+                self.stats.late += 1
+        self._last_slot = slot
+        return int(slot * self.frame_duration)
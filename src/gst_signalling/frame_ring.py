@@ -0,0 +1,349 @@
+"""Ring of decoded video frames in shared memory, written by one process and read by any number of local processes.
+
+Layout of the shared memory block:
+
+    header      magic "GSFR", version (u32), slot count (u32), metadata size (u32), frame size (u64),
+                sequence number of the last frame written (u64), closed flag (u8), padding to HEADER_SIZE
+    slots       slot header: sequence number (u64), pts (i64), received time (f64), decode time (f64, nan if
+                unknown), width, height, channels (u32), format (8s), metadata length (u32), padding
+                metadata (JSON, metadata size bytes), frame (frame size bytes), each slot aligned on ALIGNMENT
+
+Frame n is written in slot n % slots. The writer clears the sequence number of the slot before overwriting it
+and sets it once the frame is complete. Readers check it before and after reading the slot (like a seqlock),
+so they detect a slot that was overwritten under them and read the latest frame again. Readers get
+numpy views over the shared memory, without copy: a view stays valid until the writer comes back to its slot,
+that is for slots - 1 frames.
+"""
+
+import json
+import logging
+import math
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+MAGIC = b"GSFR"
+VERSION = 1
+ALIGNMENT = 64
+HEADER_SIZE = 64
+SLOT_HEADER_SIZE = 64
+
+_HEADER = struct.Struct("<4sIIIQ")
+_WRITE_SEQUENCE = struct.Struct("<Q")
+_WRITE_SEQUENCE_OFFSET = _HEADER.size
+_CLOSED_OFFSET = _WRITE_SEQUENCE_OFFSET + _WRITE_SEQUENCE.size
+_SLOT_HEADER = struct.Struct("<QqddIII8sI")
+_SLOT_SEQUENCE = struct.Struct("<Q")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _slot_stride(meta_size: int, frame_size: int) -> int:
+    return _align(SLOT_HEADER_SIZE + meta_size) + _align(frame_size)
+
+
+@dataclass
+class FrameRingStats:
+    """Counters of a ring writer or reader.
+
+    - frames: frames written, or read
+    - dropped: frames overwritten before the reader got to them
+    - oversized: frames larger than the slots, not written
+    - torn: reads that found their slot being overwritten, and were retried
+    """
+
+    frames: int = 0
+    dropped: int = 0
+    oversized: int = 0
+    torn: int = 0
+
+
+class FrameRingWriter:
+    """Creates a frame ring and writes frames into it."""
+
+    def __init__(self, name: str, frame_size: int, slots: int = 4, meta_size: int = 512) -> None:
+        """Creates the ring, replacing a stale ring with the same name (eg. left by a crashed writer).
+
+        Args:
+            name (str): Name of the ring, used by the readers to attach to it.
+            frame_size (int): Largest frame written, in bytes (eg. width * height * channels).
+            slots (int): Number of frames in the ring, readers lagging by more frames drop them.
+            meta_size (int): Largest JSON metadata of a frame, in bytes.
+        """
+        if slots < 2:
+            raise ValueError("A frame ring needs at least 2 slots.")
+
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.frame_size = frame_size
+        self.slots = slots
+        self.meta_size = meta_size
+
+        size = HEADER_SIZE + slots * _slot_stride(meta_size, frame_size)
+        try:
+            self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            self.logger.warning(f"Replacing the stale frame ring {name}")
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+
+        self._buf = self._shm.buf
+        _HEADER.pack_into(self._buf, 0, MAGIC, VERSION, slots, meta_size, frame_size)
+        self._sequence = 0
+        self._closed = False
+        self.stats = FrameRingStats()
+
+    def write(
+        self,
+        data: npt.NDArray[np.uint8],
+        pts: int = -1,
+        format: str = "",
+        received_time: Optional[float] = None,
+        decode_time: Optional[float] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Copies a frame into the next slot.
+
+        Args:
+            data (npt.NDArray[np.uint8]): The frame, height x width x channels.
+            pts (int): Presentation timestamp of the frame (ns), -1 if unknown.
+            format (str): Raw video format of the frame (eg. RGB).
+            received_time (float, optional): Time the frame was received (time.monotonic), now if not given.
+            decode_time (float, optional): Time spent decoding the frame (s).
+            meta (Dict[str, Any], optional): JSON serialisable metadata of the frame.
+        Returns:
+            bool: False if the frame or its metadata do not fit in a slot, and were not written.
+        """
+        if data.ndim == 2:
+            data = data[:, :, np.newaxis]
+        encoded_meta = json.dumps(meta).encode() if meta else b""
+        if data.ndim != 3 or data.nbytes > self.frame_size or len(encoded_meta) > self.meta_size:
+            self.stats.oversized += 1
+            return False
+
+        sequence = self._sequence + 1
+        offset = HEADER_SIZE + (sequence % self.slots) * _slot_stride(self.meta_size, self.frame_size)
+        meta_offset = offset + SLOT_HEADER_SIZE
+        data_offset = offset + _align(SLOT_HEADER_SIZE + self.meta_size)
+
+        # readers still holding a view of the slot see it is no longer valid
+        _SLOT_SEQUENCE.pack_into(self._buf, offset, 0)
+
+        height, width, channels = data.shape
+        self._buf[meta_offset : meta_offset + len(encoded_meta)] = encoded_meta
+        slot: npt.NDArray[np.uint8] = np.ndarray(data.shape, dtype=np.uint8, buffer=self._buf, offset=data_offset)
+        np.copyto(slot, data)
+
+        _SLOT_HEADER.pack_into(
+            self._buf,
+            offset,
+            0,
+            pts,
+            time.monotonic() if received_time is None else received_time,
+            math.nan if decode_time is None else decode_time,
+            width,
+            height,
+            channels,
+            format.encode()[:8],
+            len(encoded_meta),
+        )
+        _SLOT_SEQUENCE.pack_into(self._buf, offset, sequence)
+        _WRITE_SEQUENCE.pack_into(self._buf, _WRITE_SEQUENCE_OFFSET, sequence)
+
+        self._sequence = sequence
+        self.stats.frames += 1
+        return True
+
+    def close(self) -> None:
+        """Marks the ring closed for the readers and removes it, the readers keep their mapping until they close."""
+        if self._closed:
+            return
+        self._closed = True
+        self._buf[_CLOSED_OFFSET] = 1
+        del self._buf
+        self._shm.close()
+        if sys.version_info < (3, 13):
+            # a reader of the same process tree may have unregistered the ring from the shared resource tracker
+            resource_tracker.register(getattr(self._shm, "_name"), "shared_memory")
+        self._shm.unlink()
+
+
+class RingFrame:
+    """Frame read from a ring, exposed as a numpy view over the shared memory.
+
+    The writer overwrites the slot after slots - 1 newer frames: check is_valid after using the data,
+    or copy it to keep it longer.
+    """
+
+    def __init__(self, reader: "FrameRingReader", offset: int, data_offset: int, sequence: int) -> None:
+        self._reader = reader
+        self._offset = offset
+        self.sequence = sequence
+
+        _, pts, received_time, decode_time, width, height, channels, format, meta_length = _SLOT_HEADER.unpack_from(
+            reader._buf, offset
+        )
+        self.pts: int = pts
+        self.received_time: float = received_time
+        self.decode_time: Optional[float] = None if math.isnan(decode_time) else decode_time
+        self.width: int = width
+        self.height: int = height
+        self.format: str = format.rstrip(b"\x00").decode()
+
+        meta_offset = offset + SLOT_HEADER_SIZE
+        self.meta: Dict[str, Any] = (
+            json.loads(bytes(reader._buf[meta_offset : meta_offset + meta_length])) if meta_length else {}
+        )
+
+        self.data: npt.NDArray[np.uint8] = np.ndarray(
+            (height, width, channels), dtype=np.uint8, buffer=reader._buf, offset=data_offset
+        )
+        self.data.flags.writeable = False
+
+    def is_valid(self) -> bool:
+        """Checks that the slot was not overwritten since the frame was read."""
+        return self._reader._slot_sequence(self._offset) == self.sequence
+
+    def copy(self) -> Optional[npt.NDArray[np.uint8]]:
+        """Copies the frame data.
+
+        Returns:
+            Optional[npt.NDArray[np.uint8]]: The copy, None if the slot was overwritten during the copy.
+        """
+        data = self.data.copy()
+        return data if self.is_valid() else None
+
+    def release(self) -> None:
+        """Drops the view over the shared memory, the reader cannot close while views are held."""
+        if hasattr(self, "data"):
+            del self.data
+
+    def __enter__(self) -> "RingFrame":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.release()
+
+
+class FrameRingReader:
+    """Attaches to a frame ring and reads its latest frames.
+
+    reader = FrameRingReader("robot-camera")
+    for frame in reader:
+        with frame:
+            process(frame.data)
+    """
+
+    def __init__(self, name: str) -> None:
+        """Attaches to a ring.
+
+        Args:
+            name (str): Name of the ring.
+        Raises:
+            FileNotFoundError: The ring does not exist (yet).
+            ValueError: The shared memory block is not a frame ring of a supported version.
+        """
+        self.name = name
+        if sys.version_info >= (3, 13):
+            self._shm = shared_memory.SharedMemory(name, track=False)
+        else:
+            self._shm = shared_memory.SharedMemory(name)
+            # the resource tracker would remove the ring when this process exits
+            resource_tracker.unregister(getattr(self._shm, "_name"), "shared_memory")
+
+        self._buf = self._shm.buf
+        magic, version, self.slots, self.meta_size, self.frame_size = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self._shm.close()
+            raise ValueError(f"{name} is not a frame ring (version {VERSION}).")
+
+        self._stride = _slot_stride(self.meta_size, self.frame_size)
+        self._last = 0
+        self.stats = FrameRingStats()
+
+    @property
+    def closed(self) -> bool:
+        """True once the writer closed the ring."""
+        return bool(self._buf[_CLOSED_OFFSET])
+
+    def _slot_sequence(self, offset: int) -> int:
+        sequence: int = _SLOT_SEQUENCE.unpack_from(self._buf, offset)[0]
+        return sequence
+
+    def _read_slot(self, offset: int, sequence: int) -> Optional[RingFrame]:
+        # the slot is read between two checks of its sequence number, None if the writer lapped the reader
+        if self._slot_sequence(offset) != sequence:
+            return None
+        try:
+            frame = RingFrame(self, offset, offset + _align(SLOT_HEADER_SIZE + self.meta_size), sequence)
+        except (ValueError, TypeError):
+            # metadata, format or shape half overwritten (JSON or UTF-8 decoding error, frame larger than the slot)
+            return None
+        if not frame.is_valid():
+            frame.release()
+            return None
+        return frame
+
+    def latest(self) -> Optional[RingFrame]:
+        """Reads the latest frame, without waiting.
+
+        Returns:
+            Optional[RingFrame]: The frame, None if no new frame was written since the last call.
+        """
+        while True:
+            sequence: int = _WRITE_SEQUENCE.unpack_from(self._buf, _WRITE_SEQUENCE_OFFSET)[0]
+            if sequence == self._last:
+                return None
+
+            offset = HEADER_SIZE + (sequence % self.slots) * self._stride
+            frame = self._read_slot(offset, sequence)
+            if frame is None:
+                self.stats.torn += 1
+                continue
+
+            if self._last:
+                self.stats.dropped += sequence - self._last - 1
+            self._last = sequence
+            self.stats.frames += 1
+            return frame
+
+    def next_frame(self, timeout: Optional[float] = None, poll_interval: float = 0.001) -> Optional[RingFrame]:
+        """Waits for a new frame.
+
+        Args:
+            timeout (float, optional): Time to wait (s), forever if not given.
+            poll_interval (float): Time between two checks of the ring (s).
+        Returns:
+            Optional[RingFrame]: The frame, None on timeout or if the writer closed the ring.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.closed:
+            frame = self.latest()
+            if frame is not None:
+                return frame
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+        return None
+
+    def __iter__(self) -> Iterator[RingFrame]:
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return
+            yield frame
+
+    def close(self) -> None:
+        """Detaches from the ring, the frames read must be released first."""
+        del self._buf
+        self._shm.close()
@@ -1,16 +1,65 @@
 import asyncio
 import logging
-from typing import Any, Dict, NamedTuple, Optional
+import time
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import gi
-from pyee.asyncio import AsyncIOEventEmitter
 
-from .gst_signalling import GstSignalling
+from .clock_sync import ClockSyncStats
+from .gst_base_role import GstSignallingBaseRole
+from .gst_clock_sync import GstSessionProber, ProbeConfig
+from .gst_datachannel import DataChannelProfile
+from .gst_latency import LatencyProfile, apply_to_webrtc, get_profile
+from .ice_policy import IceCandidateFilter, IcePolicy, IcePolicyStats
+from .ice_recovery import IceRecoveryTracker, IceRestartConfig, RecoveryStats
+from .pipeline_profile import PipelineProfile
+from .session_dispatcher import SessionBacklog, SessionDispatcher
+from .session_lifecycle import (
+    LifecycleStats,
+    SessionLifecycle,
+    SessionState,
+    SessionStats,
+)
+from .watchdog import LoopWatchdog, WatchdogStats
 
 gi.require_version("Gst", "1.0")
 gi.require_version("GstWebRTC", "1.0")
+gi.require_version("GstSdp", "1.0")
+
+from gi.repository import GObject, Gst, GstSdp, GstWebRTC  # noqa : E402
+
+from .gst_pipeline_profile import (  # noqa : E402
+    GstTraceCollector,
+    element_id,
+    get_collector,
+)
+
+
+def element_ids(elements: Iterable[Gst.Element]) -> Set[int]:
+    """Gets the IDs of elements, and of the elements inside them for the bins, as found in the tracer records."""
+    ids = set()
+    for element in elements:
+        ids.add(element_id(element))
+        iterator = element.iterate_recurse() if isinstance(element, Gst.Bin) else None
+        while iterator is not None:
+            ret, child = iterator.next()
+            if ret != Gst.IteratorResult.OK:
+                break
+            ids.add(element_id(child))
+    return ids
 
-from gi.repository import Gst  # noqa : E402
 
 GstSession = NamedTuple(
     "GstSession",
@@ -21,50 +70,67 @@ GstSession = NamedTuple(
 )
 
 
-class GstSignallingAbstractRole(AsyncIOEventEmitter):
+class GstSignallingAbstractRole(GstSignallingBaseRole):
     def __init__(
         self,
         host: str,
         port: int,
     ) -> None:
-        super().__init__()
+        super().__init__(host=host, port=port)
 
         self.logger = logging.getLogger(__name__)
 
-        signalling = GstSignalling(host=host, port=port)
-
-        self.peer_id: Optional[str] = None
-        self.peer_id_evt = asyncio.Event()
-        self._asyncloop = asyncio.get_event_loop()
-
         self.sessions: Dict[str, GstSession] = {}
-
-        @signalling.on("Welcome")  # type: ignore[arg-type]
-        def on_welcome(peer_id: str) -> None:
-            self.peer_id = peer_id
-            self.peer_id_evt.set()
-
-        @signalling.on("StartSession")  # type: ignore[arg-type]
-        async def on_start_session(peer_id: str, session_id: str) -> None:
+        # data channels of each session, indexed by label
+        self.data_channels: Dict[str, Dict[str, GstWebRTC.WebRTCDataChannel]] = {}
+        # round trip time / clock offset probing on the control data channel
+        self.probe_config: Optional[ProbeConfig] = None
+        self.probers: Dict[str, GstSessionProber] = {}
+        # data channels used by the library itself, handled instead of being emitted as new_data_channel
+        self.internal_channels: Dict[str, Callable[[str, GstWebRTC.WebRTCDataChannel], None]] = {}
+        # latency profile of the role, and of the sessions that override it
+        self.latency_profile: Optional[LatencyProfile] = None
+        self.session_latency_profiles: Dict[str, LatencyProfile] = {}
+        # recovery of the sessions whose ICE connection is lost
+        self.ice_restart_config = IceRestartConfig()
+        self.ice_recovery: Dict[str, IceRecoveryTracker] = {}
+        self._recovery_tasks: Dict[str, asyncio.Task[None]] = {}
+        # filter of the local and remote ICE candidates
+        self.ice_filter: Optional[IceCandidateFilter] = None
+        # session states and timeouts, signal handlers connected to the objects of each session
+        self.lifecycle = SessionLifecycle()
+        self.session_signal_handlers: Dict[str, List[Tuple[GObject.Object, int]]] = {}
+        self._reaper_task: Optional[asyncio.Task[None]] = None
+        self._reaping: Set[str] = set()
+        # sessions lost without the application ending them (ended by the peer, not recovered, reaped), by reason
+        self.lost_sessions: Dict[str, str] = {}
+        # event loop lag and GStreamer callback latency monitoring
+        self.watchdog: Optional[LoopWatchdog] = None
+        # per element latency and CPU usage, from the GStreamer tracers
+        self.trace_collector: Optional[GstTraceCollector] = None
+
+        # handlers of a session run in order, sessions are handled concurrently
+        self.dispatcher = SessionDispatcher()
+
+        @self.signalling.on("StartSession")  # type: ignore[arg-type]
+        def on_start_session(peer_id: str, session_id: str) -> None:
             self.logger.info(f"StartSession received, session_id: {session_id}")
-            await self.setup_session(session_id, peer_id)
+            self.dispatcher.dispatch(session_id, self.setup_session, session_id, peer_id)
 
-        @signalling.on("SessionStarted")  # type: ignore[arg-type]
-        async def on_session_started(peer_id: str, session_id: str) -> None:
+        @self.signalling.on("SessionStarted")  # type: ignore[arg-type]
+        def on_session_started(peer_id: str, session_id: str) -> None:
             self.logger.info(f"SessionStarted received, session_id: {session_id}")
-            await self.setup_session(session_id, peer_id)
+            self.dispatcher.dispatch(session_id, self.setup_session, session_id, peer_id)
 
-        @signalling.on("Peer")  # type: ignore[arg-type]
-        async def on_peer(session_id: str, message: Dict[str, Dict[str, Any]]) -> None:
+        @self.signalling.on("Peer")  # type: ignore[arg-type]
+        def on_peer(session_id: str, message: Dict[str, Dict[str, Any]]) -> None:
             self.logger.info(f"Peer received, session_id: {session_id}, message: {message}")
-            await self.peer_for_session(session_id, message)
+            self.dispatcher.dispatch(session_id, self.peer_for_session, session_id, message)
 
-        @signalling.on("EndSession")  # type: ignore[arg-type]
-        async def on_end_session(session_id: str) -> None:
+        @self.signalling.on("EndSession")  # type: ignore[arg-type]
+        def on_end_session(session_id: str) -> None:
             self.logger.info(f"EndSession received, session_id: {session_id}")
-            await self.close_session(session_id)
-
-        self.signalling = signalling
+            self.dispatcher.dispatch(session_id, self.peer_ended_session, session_id)
 
         Gst.init(None)
 
@@ -77,37 +143,365 @@ class GstSignallingAbstractRole(AsyncIOEventEmitter):
         # Gst.deinit()
 
     def make_send_sdp(self, sdp: Any, type: str, session_id: str) -> None:  # sdp is GstWebRTC.WebRTCSessionDescription
-        text = sdp.sdp.as_text()
-        msg = {"type": type, "sdp": text}
-        asyncio.run_coroutine_threadsafe(self.send_sdp(session_id, msg), self._asyncloop)
+        text = self.describe_sdp(sdp.sdp.as_text(), type, session_id)
+        msg: Dict[str, Any] = {"type": type, "sdp": text}
+        self.run_threadsafe(self.send_sdp(session_id, msg), "send_sdp")
 
     def send_ice_candidate_message(self, _: Gst.Element, mlineindex: int, candidate: str, session_id: str) -> None:
+        if self.ice_filter is not None and not self.ice_filter.accept(session_id, "local", candidate):
+            self.logger.debug(f"Local candidate of session {session_id} filtered: {candidate}")
+            return
         icemsg = {"candidate": candidate, "sdpMLineIndex": mlineindex}
-        asyncio.run_coroutine_threadsafe(self.send_ice(session_id, icemsg), self._asyncloop)
+        self.run_threadsafe(self.send_ice(session_id, icemsg), "send_ice")
+
+    def describe_sdp(self, text: str, type: str, session_id: str) -> str:
+        """Returns the SDP sent to the remote peer, overridden to add attributes."""
+        return text
+
+    def run_threadsafe(self, coro: Coroutine[Any, Any, Any], name: str) -> None:
+        """Runs a coroutine on the event loop from a GStreamer thread.
+
+        Args:
+            coro (Coroutine): The coroutine.
+            name (str): Name of the callback, used in the watchdog statistics.
+        """
+        if self.watchdog is not None:
+            self.watchdog.run_threadsafe(coro, self._asyncloop, name)
+        else:
+            asyncio.run_coroutine_threadsafe(coro, self._asyncloop)
 
     def init_webrtc(self, session_id: str) -> Gst.Element:
         webrtc = Gst.ElementFactory.make("webrtcbin")
         assert webrtc
 
         webrtc.set_property("bundle-policy", "max-bundle")
-        webrtc.connect("on-ice-candidate", self.send_ice_candidate_message, session_id)
+        if self.latency_profile is not None:
+            apply_to_webrtc(webrtc, self.latency_profile)
+        self.connect_session_signal(session_id, webrtc, "on-ice-candidate", self.send_ice_candidate_message)
+        self.connect_session_signal(session_id, webrtc, "on-data-channel", self.on_data_channel)
+        self.connect_session_signal(session_id, webrtc, "notify::ice-connection-state", self.on_ice_connection_state)
 
         self._pipeline.add(webrtc)
 
         return webrtc
 
+    def connect_session_signal(
+        self, session_id: str, obj: GObject.Object, signal: str, handler: Callable[..., Any], *args: Any
+    ) -> int:
+        """Connects a handler to a signal of an object of a session, disconnected when the session is closed.
+
+        The session ID is passed to the handler after the signal arguments and the extra arguments.
+
+        Args:
+            session_id (str): Session ID.
+            obj (GObject.Object): The object (eg. the webrtcbin of the session).
+            signal (str): Name of the signal.
+            handler (Callable): The handler.
+            *args: Extra arguments of the handler.
+        Returns:
+            int: The handler ID.
+        """
+        handler_id: int = obj.connect(signal, handler, *args, session_id)
+        self.session_signal_handlers.setdefault(session_id, []).append((obj, handler_id))
+        return handler_id
+
+    def on_ice_connection_state(self, webrtc: Gst.Element, _: Any, session_id: str) -> None:
+        state = webrtc.get_property("ice-connection-state")
+        self.run_threadsafe(self.ice_connection_state_changed(session_id, state), "ice_connection_state")
+
+    async def ice_connection_state_changed(self, session_id: str, state: GstWebRTC.WebRTCICEConnectionState) -> None:
+        tracker = self.ice_recovery.get(session_id)
+
+        if state in (GstWebRTC.WebRTCICEConnectionState.CONNECTED, GstWebRTC.WebRTCICEConnectionState.COMPLETED):
+            self.lifecycle.set_state(session_id, SessionState.CONNECTED)
+            if tracker is not None:
+                self._ice_recovered(session_id, tracker)
+        elif state in (GstWebRTC.WebRTCICEConnectionState.DISCONNECTED, GstWebRTC.WebRTCICEConnectionState.FAILED):
+            self.lifecycle.set_state(session_id, SessionState.DISCONNECTED)
+            if tracker is not None:
+                self._ice_lost(session_id, tracker, state)
+
+    def _ice_recovered(self, session_id: str, tracker: IceRecoveryTracker) -> None:
+        recovery_time = tracker.recovered()
+        if recovery_time is not None:
+            self.logger.info(f"Session {session_id} recovered in {recovery_time * 1000:.0f} ms")
+            task = self._recovery_tasks.pop(session_id, None)
+            if task is not None:
+                task.cancel()
+
+    def _ice_lost(self, session_id: str, tracker: IceRecoveryTracker, state: GstWebRTC.WebRTCICEConnectionState) -> None:
+        failed = state == GstWebRTC.WebRTCICEConnectionState.FAILED
+        if tracker.lost():
+            self.logger.warning(f"ICE connection of session {session_id} lost ({state.value_nick})")
+        if self.ice_restart_config.enabled and (session_id not in self._recovery_tasks or failed):
+            previous = self._recovery_tasks.pop(session_id, None)
+            if previous is not None:
+                previous.cancel()
+            self._recovery_tasks[session_id] = asyncio.create_task(self._recover(session_id, tracker, failed))
+
+    async def _recover(self, session_id: str, tracker: IceRecoveryTracker, failed: bool) -> None:
+        config = self.ice_restart_config
+        if not failed:
+            # a disconnected connection may come back by itself
+            await asyncio.sleep(config.grace_period)
+            if not tracker.is_lost:
+                return
+
+        if not self.restart_ice(session_id):
+            return
+        tracker.restarted()
+
+        await asyncio.sleep(config.timeout)
+        if tracker.is_lost:
+            self.logger.error(f"Session {session_id} not recovered after ICE restart, ending it")
+            tracker.failed()
+            self._recovery_tasks.pop(session_id, None)
+            self.lost_sessions[session_id] = "not recovered"
+            await self.end_session(session_id)
+
+    def restart_ice(self, session_id: str) -> bool:
+        """Triggers an ICE restart of a session.
+
+        Only the offerer (the producer) can restart, the other peer only tracks the recovery.
+
+        Args:
+            session_id (str): Session ID.
+        Returns:
+            bool: True if a restart was triggered.
+        """
+        return False
+
+    def get_recovery_stats(self, session_id: str) -> Optional[RecoveryStats]:
+        """Gets the ICE recovery counters and times of a session."""
+        tracker = self.ice_recovery.get(session_id)
+        if tracker is None:
+            return None
+        return tracker.stats
+
+    def create_data_channel(
+        self,
+        session_id: str,
+        label: str,
+        options: Optional[Gst.Structure] = None,
+        profile: Optional[DataChannelProfile] = None,
+    ) -> GstWebRTC.WebRTCDataChannel:
+        """Creates a data channel on a session and keeps track of it.
+
+        Args:
+            session_id (str): Session ID.
+            label (str): Label of the data channel.
+            options (Gst.Structure, optional): "application/data-channel" options passed to webrtcbin.
+            profile (DataChannelProfile, optional): Delivery guarantees of the channel (eg. LATEST_VALUE),
+                ignored if options are given. Reliable and ordered by default.
+        Returns:
+            GstWebRTC.WebRTCDataChannel: The created data channel.
+        """
+        session = self.sessions[session_id]
+        if options is None and profile is not None:
+            options = profile.to_options()
+        channel = session.pc.emit("create-data-channel", label, options)
+        if not channel:
+            raise RuntimeError(f"Failed to create data channel {label} for session {session_id}")
+
+        self.add_data_channel(session_id, channel)
+        return channel  # type: ignore[no-any-return]
+
+    def on_data_channel(self, _: Gst.Element, channel: GstWebRTC.WebRTCDataChannel, session_id: str) -> None:
+        # channel created by the remote peer
+        self.add_data_channel(session_id, channel)
+
+    def add_data_channel(self, session_id: str, channel: GstWebRTC.WebRTCDataChannel) -> None:
+        label = channel.props.label
+        self.data_channels.setdefault(session_id, {})[label] = channel
+
+        if label == (self.probe_config or ProbeConfig()).label:
+            self.probers[session_id] = GstSessionProber(channel, self._asyncloop, self.probe_config)
+        elif label in self.internal_channels:
+            self.internal_channels[label](session_id, channel)
+        else:
+            self.emit("new_data_channel", session_id, channel)
+
+    def set_latency_profile(self, profile: Union[str, LatencyProfile]) -> None:
+        """Sets the latency profile applied to the next sessions.
+
+        Args:
+            profile (Union[str, LatencyProfile]): Profile or name of a predefined profile
+                ("teleop-ultra-low", "balanced" or "recording").
+        """
+        self.latency_profile = get_profile(profile)
+
+    def set_session_latency_profile(self, session_id: str, profile: Union[str, LatencyProfile]) -> None:
+        """Sets the latency profile of an existing session.
+
+        Args:
+            session_id (str): Session ID.
+            profile (Union[str, LatencyProfile]): Profile or name of a predefined profile.
+        """
+        latency_profile = get_profile(profile)
+        self.session_latency_profiles[session_id] = latency_profile
+        apply_to_webrtc(self.sessions[session_id].pc, latency_profile)
+
+    def get_session_latency_profile(self, session_id: str) -> Optional[LatencyProfile]:
+        """Gets the latency profile of a session (the one of the role if not overridden)."""
+        return self.session_latency_profiles.get(session_id, self.latency_profile)
+
+    def enable_clock_probe(self, config: ProbeConfig = ProbeConfig()) -> None:
+        """Enables round trip time and clock offset estimation on the next sessions.
+
+        The producer creates a control data channel on each session, on which both peers answer
+        the probes of the other one. The estimates are available with get_clock_sync.
+
+        Args:
+            config (ProbeConfig): Probe frequency and filtering configuration.
+        """
+        self.probe_config = config
+
+    def get_clock_sync(self, session_id: str) -> Optional[ClockSyncStats]:
+        """Gets the round trip time and clock offset estimates of a session.
+
+        Args:
+            session_id (str): Session ID.
+        Returns:
+            Optional[ClockSyncStats]: The estimates, None if the session has no control channel.
+        """
+        prober = self.probers.get(session_id)
+        if prober is None:
+            return None
+        return prober.get_stats()
+
+    def enable_watchdog(self, budget: float = 0.05, interval: float = 0.1) -> None:
+        """Monitors the event loop lag and the delay before the GStreamer callbacks run on the loop.
+
+        Handlers that take longer than the budget are reported, and the loop thread is sampled while
+        it is blocked to find the function responsible. Must be called from the event loop thread;
+        the statistics are available with get_watchdog_stats.
+
+        Args:
+            budget (float): Lag, callback delay or handler duration considered too long (s).
+            interval (float): Period of the loop lag measure (s).
+        """
+        if self.watchdog is None:
+            self.watchdog = LoopWatchdog(interval=interval, budget=budget)
+            self.dispatcher.on_handler_done = self.watchdog.record_handler_time
+        if self._asyncloop.is_running():
+            self.watchdog.start()
+
+    def get_watchdog_stats(self) -> Optional[WatchdogStats]:
+        """Gets the event loop health statistics, None if the watchdog is not enabled."""
+        if self.watchdog is None:
+            return None
+        return self.watchdog.get_stats()
+
+    def enable_pipeline_profiling(self) -> None:
+        """Aggregates the per element latency and the CPU usage measured by the GStreamer tracers.
+
+        The tracers must be loaded before GStreamer is initialised, with
+        pipeline_profile.configure_tracers() called before the first role is created (or GST_TRACERS set).
+        The statistics are available with get_pipeline_profile.
+        """
+        self.trace_collector = get_collector()
+
+    def get_pipeline_profile(self) -> Optional[PipelineProfile]:
+        """Gets the latency of the elements of the pipeline, by session, None if profiling is not enabled."""
+        if self.trace_collector is None:
+            return None
+
+        sessions = {element: session_id for session_id in self.sessions for element in self.session_element_ids(session_id)}
+        return self.trace_collector.aggregator.get_profile(sessions, element_ids([self._pipeline]))
+
+    def session_element_ids(self, session_id: str) -> Set[int]:
+        """Gets the IDs of the elements of a session: its webrtcbin, the elements inside it and the ones linked to it."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return set()
+        return element_ids([session.pc])
+
+    def forget_session_profile(self, session_id: str) -> None:
+        """Drops the profiling statistics of the elements of a session, before they are released."""
+        if self.trace_collector is not None:
+            self.trace_collector.aggregator.forget(self.session_element_ids(session_id))
+
     async def connect(self) -> None:
-        assert self.signalling is not None
+        if self.watchdog is not None:
+            self.watchdog.start()
+        if self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self._reap())
 
-        await self.signalling.connect()
-        await self.peer_id_evt.wait()
+        await super().connect()
 
     async def close(self) -> None:
-        await self.signalling.close()
-
-    async def consume(self) -> None:
+        await super().close()
+        await self.dispatcher.close()
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+        if self.watchdog is not None:
+            await self.watchdog.stop()
+
+    async def _reap(self) -> None:
+        # ends the half-open sessions: never connected, or disconnected for too long
         while True:
-            await asyncio.sleep(1000)
+            await asyncio.sleep(self.lifecycle.config.reap_interval)
+            for session_id, reason in self.lifecycle.expired():
+                if session_id in self._reaping:
+                    continue
+                self.logger.warning(f"Reaping session {session_id} ({reason})")
+                if self.dispatcher.dispatch(session_id, self.reap_session, session_id, reason):
+                    self._reaping.add(session_id)
+
+    async def reap_session(self, session_id: str, reason: str) -> None:
+        """Ends a half-open session, it is counted as reaped once it is released.
+
+        Args:
+            session_id (str): Session ID.
+            reason (str): Timeout the session exceeded.
+        """
+        self.lost_sessions[session_id] = reason
+        try:
+            await self.end_session(session_id)
+        finally:
+            self._reaping.discard(session_id)
+            self.lost_sessions.pop(session_id, None)
+            if session_id not in self.sessions:
+                # released, the record is already removed unless the session was never set up
+                self.lifecycle.remove(session_id)
+                self.lifecycle.record_reaped(reason)
+
+    def count_session_elements(self, session_id: str) -> int:
+        """Counts the elements of a session: its webrtcbin, the elements inside it and the ones linked to it."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return 0
+
+        count = 1
+        iterator = session.pc.iterate_recurse()  # type: ignore[attr-defined]
+        while iterator is not None and iterator.next()[0] == Gst.IteratorResult.OK:
+            count += 1
+        return count
+
+    def get_session_stats(self) -> Dict[str, SessionStats]:
+        """Gets the state and the resources (elements, data channels, buffered bytes) of each session."""
+        now = time.monotonic()
+        stats = {}
+        for session_id, record in self.lifecycle.records.items():
+            channels = self.data_channels.get(session_id, {}).values()
+            stats[session_id] = SessionStats(
+                state=record.state,
+                age=now - record.created,
+                state_age=now - record.state_since,
+                elements=self.count_session_elements(session_id),
+                data_channels=len(channels),
+                buffered_bytes=sum(channel.props.buffered_amount for channel in channels),
+            )
+        return stats
+
+    def get_lifecycle_stats(self) -> LifecycleStats:
+        """Gets the session counters (by state, created, closed and reaped) and the memory of the process."""
+        return self.lifecycle.get_stats()
+
+    def get_dispatch_backlogs(self) -> Dict[str, SessionBacklog]:
+        """Gets the dispatch statistics (queued, processed and dropped events, wait times) of each session."""
+        return self.dispatcher.get_backlogs()
 
     # Session management
     async def setup_session(self, session_id: str, peer_id: str) -> GstSession:
@@ -117,26 +511,126 @@ class GstSignallingAbstractRole(AsyncIOEventEmitter):
         session = GstSession(peer_id, pc)
 
         self.sessions[session_id] = session
+        self.ice_recovery[session_id] = IceRecoveryTracker()
+        self.lifecycle.add(session_id)
 
         return session
 
     async def peer_for_session(self, session_id: str, message: Dict[str, Dict[str, str]]) -> None:
         self.logger.info(f"peer for session {session_id} {message}")
 
-    def handle_ice_message(self, webrtc: Gst.Element, ice_msg: Dict[str, Any]) -> None:
+    def on_offer_created(self, promise: Gst.Promise, webrtc: Gst.Element, session_id: str) -> None:
+        self.logger.debug(f"on offer created {promise} {webrtc} {session_id}")
+        assert promise.wait() == Gst.PromiseResult.REPLIED
+        reply = promise.get_reply()
+        offer = reply.get_value("offer")  # type: ignore[union-attr]
+        self.update_ice_credentials(session_id, "local", offer.sdp.as_text())  # type: ignore[union-attr]
+
+        promise = Gst.Promise.new()
+        self.logger.info("Offer created, setting local description")
+        webrtc.emit("set-local-description", offer, promise)
+        promise.interrupt()
+        self.make_send_sdp(offer, "offer", session_id)
+
+    def on_answer_created(self, promise: Gst.Promise, webrtc: Gst.Element, session_id: str) -> None:
+        assert promise.wait() == Gst.PromiseResult.REPLIED
+        reply = promise.get_reply()
+        # answer = reply["answer"]
+        answer = reply.get_value("answer")  # type: ignore[union-attr]
+        self.update_ice_credentials(session_id, "local", answer.sdp.as_text())  # type: ignore[union-attr]
+        promise = Gst.Promise.new()
+        webrtc.emit("set-local-description", answer, promise)
+        promise.interrupt()  # we don't care about the result, discard it
+        self.make_send_sdp(answer, "answer", session_id)
+
+    def set_remote_offer(self, webrtc: Gst.Element, sdp: str, session_id: str) -> None:
+        self.update_ice_credentials(session_id, "remote", sdp)
+        _, sdpmsg = GstSdp.SDPMessage.new_from_text(sdp)
+        offer = GstWebRTC.WebRTCSessionDescription.new(GstWebRTC.WebRTCSDPType.OFFER, sdpmsg)
+        promise = Gst.Promise.new_with_change_func(self.on_offer_set, webrtc, session_id)
+        webrtc.emit("set-remote-description", offer, promise)
+
+    def set_remote_answer(self, webrtc: Gst.Element, sdp: str, session_id: str = "") -> None:
+        self.update_ice_credentials(session_id, "remote", sdp)
+        _, sdpmsg = GstSdp.SDPMessage.new_from_text(sdp)
+        answer = GstWebRTC.WebRTCSessionDescription.new(GstWebRTC.WebRTCSDPType.ANSWER, sdpmsg)
+        promise = Gst.Promise.new()
+        webrtc.emit("set-remote-description", answer, promise)
+        promise.interrupt()
+
+    def on_offer_set(self, promise: Gst.Promise, webrtc: Gst.Element, session_id: str) -> None:
+        assert promise.wait() == Gst.PromiseResult.REPLIED
+        promise = Gst.Promise.new_with_change_func(self.on_answer_created, webrtc, session_id)
+        webrtc.emit("create-answer", None, promise)
+
+    def set_ice_policy(self, policy: Optional[IcePolicy]) -> None:
+        """Filters the candidates gathered before they are sent, and the candidates received from the remote peers.
+
+        Args:
+            policy (IcePolicy, optional): The policy, None to accept every candidate.
+        """
+        self.ice_filter = IceCandidateFilter(policy) if policy is not None else None
+
+    def get_ice_policy_stats(self) -> Optional[IcePolicyStats]:
+        """Gets the counts of accepted and filtered candidates, None if no ICE policy is set."""
+        return self.ice_filter.get_stats() if self.ice_filter is not None else None
+
+    def update_ice_credentials(self, session_id: str, direction: str, sdp: str) -> None:
+        # an ICE restart gathers new candidates, not capped by the count of the previous ones
+        if self.ice_filter is not None and self.ice_filter.update_credentials(session_id, direction, sdp):
+            self.logger.info(f"ICE restart of session {session_id}, {direction} candidate count reset")
+
+    def handle_ice_message(self, webrtc: Gst.Element, ice_msg: Dict[str, Any], session_id: str = "") -> None:
         candidate = ice_msg["candidate"]
+        if self.ice_filter is not None and not self.ice_filter.accept(session_id, "remote", candidate):
+            self.logger.debug(f"Remote candidate of session {session_id} filtered: {candidate}")
+            return
         sdpmlineindex = ice_msg["sdpMLineIndex"]
         webrtc.emit("add-ice-candidate", sdpmlineindex, candidate)
 
+    async def peer_ended_session(self, session_id: str) -> None:
+        if session_id in self.sessions:
+            self.lost_sessions[session_id] = "ended by the peer"
+        await self.close_session(session_id)
+
     async def close_session(self, session_id: str) -> None:
         self.logger.info("close session")
 
+        self.lost_sessions.pop(session_id, None)
         session = self.sessions.pop(session_id)
-        self._pipeline.remove(session.pc)
+        self.dispatcher.forget(session_id)
+        self.data_channels.pop(session_id, None)
+        self.session_latency_profiles.pop(session_id, None)
+        self.ice_recovery.pop(session_id, None)
+        if self.ice_filter is not None:
+            self.ice_filter.forget(session_id)
+        task = self._recovery_tasks.pop(session_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        prober = self.probers.pop(session_id, None)
+        if prober is not None:
+            prober.stop()
+        self.lifecycle.remove(session_id)
+        for obj, handler_id in self.session_signal_handlers.pop(session_id, []):
+            obj.disconnect(handler_id)
         session.pc.set_state(Gst.State.NULL)
+        self._pipeline.remove(session.pc)
         # self.emit("close_session", session)
         # await session.pc.close()
 
+    async def end_session(self, session_id: str) -> None:
+        """Ends a session on the signalling server and releases it locally.
+
+        Args:
+            session_id (str): Session ID.
+        """
+        try:
+            await self.signalling.end_session(session_id)
+        finally:
+            # a lost signalling connection must not keep the resources of the session alive
+            if session_id in self.sessions:
+                await self.close_session(session_id)
+
     async def send_sdp(self, session_id: str, sdp: Dict[str, Dict[str, str]]) -> None:
         await self.signalling.send_peer_message(session_id, "sdp", sdp)
 
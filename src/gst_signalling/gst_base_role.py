@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Optional
+
+from pyee.asyncio import AsyncIOEventEmitter
+
+from .gst_signalling import GstSignalling
+
+
+class GstSignallingBaseRole(AsyncIOEventEmitter):
+    """Signalling part of the roles: connection to the server and peer ID.
+
+    Does not load GStreamer, so that signalling-only roles (eg. the listener) start fast.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+    ) -> None:
+        super().__init__()
+
+        self.logger = logging.getLogger(__name__)
+
+        signalling = self.create_signalling(host, port)
+
+        self.peer_id: Optional[str] = None
+        self.peer_id_evt = asyncio.Event()
+        self._asyncloop = asyncio.get_event_loop()
+
+        @signalling.on("Welcome")  # type: ignore[arg-type]
+        def on_welcome(peer_id: str) -> None:
+            self.peer_id = peer_id
+            self.peer_id_evt.set()
+
+        self.signalling = signalling
+
+    def create_signalling(self, host: str, port: int) -> GstSignalling:
+        """Creates the signalling peer of the role, overridden to replace the websocket connection."""
+        return GstSignalling(host=host, port=port)
+
+    async def connect(self) -> None:
+        assert self.signalling is not None
+
+        await self.signalling.connect()
+        await self.peer_id_evt.wait()
+
+    async def close(self) -> None:
+        await self.signalling.close()
+
+    async def consume(self) -> None:
+        while True:
+            await asyncio.sleep(1000)
@@ -0,0 +1,242 @@
+import collections
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+import gi
+
+gi.require_version("Gst", "1.0")
+gi.require_version("GstWebRTC", "1.0")
+
+from gi.repository import GLib, GstWebRTC  # noqa : E402
+
+Payload = Union[str, GLib.Bytes]
+
+
+class DropPolicy(str, Enum):
+    """What to do with a consumer whose data channel buffers more than allowed.
+
+    - DROP_OLDEST: keep the newest messages in a bounded pending queue, flushed when the channel drains.
+    - DROP_NEWEST: discard the messages published while the channel is congested.
+    - DISCONNECT: close the session of the slow consumer.
+    """
+
+    DROP_OLDEST = "drop-oldest"
+    DROP_NEWEST = "drop-newest"
+    DISCONNECT = "disconnect"
+
+
+@dataclass
+class ConsumerLagStats:
+    """Per consumer delivery statistics of a broadcast channel.
+
+    - sent: messages handed to the data channel
+    - dropped: messages discarded by the drop policy
+    - pending: messages waiting for the channel to drain (DROP_OLDEST policy only)
+    - buffered_amount: bytes buffered by the data channel, at the last publish or get_stats
+    - max_buffered_amount: highest buffered amount seen
+    - last_sent_time: time.monotonic() of the last message handed to the data channel
+    - oldest_pending_time: time.monotonic() of the publication of the oldest pending message
+    """
+
+    sent: int = 0
+    dropped: int = 0
+    pending: int = 0
+    buffered_amount: int = 0
+    max_buffered_amount: int = 0
+    last_sent_time: Optional[float] = None
+    oldest_pending_time: Optional[float] = None
+
+    @property
+    def lag(self) -> float:
+        """Age of the oldest message published but not handed to this consumer yet (in seconds)."""
+        if self.oldest_pending_time is None:
+            return 0.0
+        return time.monotonic() - self.oldest_pending_time
+
+    @property
+    def idle_time(self) -> float:
+        """Time elapsed since the last message was handed to this consumer (in seconds)."""
+        if self.last_sent_time is None:
+            return 0.0
+        return time.monotonic() - self.last_sent_time
+
+
+class _BroadcastConsumer:
+    def __init__(self, channel: GstWebRTC.WebRTCDataChannel, max_pending: int) -> None:
+        self.channel = channel
+        # with their publication time
+        self.pending: Deque[Tuple[float, Payload]] = collections.deque(maxlen=max_pending)
+        self.stats = ConsumerLagStats()
+        self.lock = threading.Lock()
+        self.disconnected = False
+        self.handler_id: Optional[int] = None
+
+    def is_open(self) -> bool:
+        return bool(self.channel.props.ready_state == GstWebRTC.WebRTCDataChannelState.OPEN)
+
+    def send(self, payload: Payload) -> None:
+        if isinstance(payload, str):
+            self.channel.send_string(payload)
+        else:
+            self.channel.send_data(payload)
+        self.stats.sent += 1
+        self.stats.last_sent_time = time.monotonic()
+
+    def flush(self, max_buffered_amount: int) -> None:
+        with self.lock:
+            self.drain(max_buffered_amount)
+
+    def drain(self, max_buffered_amount: int) -> None:
+        # lock must be held
+        while self.pending and self.channel.props.buffered_amount <= max_buffered_amount:
+            self.send(self.pending.popleft()[1])
+        self.update_pending()
+
+    def queue(self, payload: Payload) -> None:
+        # lock must be held
+        self.pending.append((time.monotonic(), payload))
+        self.update_pending()
+
+    def update_pending(self) -> None:
+        # lock must be held
+        self.stats.pending = len(self.pending)
+        self.stats.oldest_pending_time = self.pending[0][0] if self.pending else None
+
+
+class GstBroadcaster:
+    """Publishes the same message on a named data channel of every live session.
+
+    The message is serialised once and the same buffer is handed to each data channel.
+    Consumers that cannot keep up (their channel buffers more than max_buffered_amount bytes)
+    are handled according to the drop policy.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        policy: DropPolicy = DropPolicy.DROP_NEWEST,
+        max_buffered_amount: int = 256 * 1024,
+        max_pending: int = 8,
+        on_disconnect: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """Initializes the broadcaster.
+
+        Args:
+            label (str): Label of the data channel to publish on.
+            policy (DropPolicy): Policy applied to slow consumers.
+            max_buffered_amount (int): Buffered bytes above which a consumer is considered slow.
+            max_pending (int): Size of the pending queue of each consumer (DROP_OLDEST policy only).
+            on_disconnect (Callable[[str], None], optional): Called with the session ID of a consumer
+                disconnected by the DISCONNECT policy.
+        """
+        self.logger = logging.getLogger(__name__)
+
+        self.label = label
+        self.policy = DropPolicy(policy)
+        self.max_buffered_amount = max_buffered_amount
+        self.max_pending = max_pending
+        self.on_disconnect = on_disconnect
+
+        self._consumers: Dict[str, _BroadcastConsumer] = {}
+
+    def add_channel(self, session_id: str, channel: GstWebRTC.WebRTCDataChannel) -> None:
+        """Adds the data channel of a session to the broadcast.
+
+        Args:
+            session_id (str): Session ID.
+            channel (GstWebRTC.WebRTCDataChannel): Data channel of the session.
+        """
+        consumer = _BroadcastConsumer(channel, self.max_pending)
+        if self.policy == DropPolicy.DROP_OLDEST:
+            channel.props.buffered_amount_low_threshold = self.max_buffered_amount // 2
+            consumer.handler_id = channel.connect("on-buffered-amount-low", lambda _: consumer.flush(self.max_buffered_amount))
+        self._consumers[session_id] = consumer
+
+    def remove_channel(self, session_id: str) -> None:
+        """Removes the data channel of a session from the broadcast.
+
+        Args:
+            session_id (str): Session ID.
+        """
+        consumer = self._consumers.pop(session_id, None)
+        if consumer is not None and consumer.handler_id is not None:
+            consumer.channel.disconnect(consumer.handler_id)
+            consumer.handler_id = None
+
+    def publish(self, message: Union[str, bytes]) -> int:
+        """Publishes a message to all consumers.
+
+        Args:
+            message (Union[str, bytes]): Message, sent as a string or binary message.
+        Returns:
+            int: Number of consumers the message was handed to (or queued for).
+        """
+        payload: Payload = message if isinstance(message, str) else GLib.Bytes.new(message)
+
+        delivered = 0
+        for session_id, consumer in list(self._consumers.items()):
+            if consumer.disconnected or not consumer.is_open():
+                continue
+            if self._publish_to(session_id, consumer, payload):
+                delivered += 1
+
+        return delivered
+
+    def publish_json(self, message: Any) -> int:
+        """Serialises a message as JSON once and publishes it to all consumers.
+
+        Args:
+            message (Any): JSON serialisable message.
+        Returns:
+            int: Number of consumers the message was handed to (or queued for).
+        """
+        return self.publish(json.dumps(message))
+
+    def _publish_to(self, session_id: str, consumer: _BroadcastConsumer, payload: Payload) -> bool:
+        with consumer.lock:
+            buffered_amount = consumer.channel.props.buffered_amount
+            consumer.stats.buffered_amount = buffered_amount
+            consumer.stats.max_buffered_amount = max(consumer.stats.max_buffered_amount, buffered_amount)
+
+            if consumer.pending:
+                consumer.drain(self.max_buffered_amount)
+                buffered_amount = consumer.channel.props.buffered_amount
+
+            if buffered_amount <= self.max_buffered_amount and not consumer.pending:
+                consumer.send(payload)
+                return True
+
+            if self.policy == DropPolicy.DROP_NEWEST:
+                consumer.stats.dropped += 1
+                return False
+
+            if self.policy == DropPolicy.DROP_OLDEST:
+                if len(consumer.pending) == consumer.pending.maxlen:
+                    consumer.stats.dropped += 1
+                consumer.queue(payload)
+                return True
+
+            self.logger.warning(f"Consumer of session {session_id} is too slow ({buffered_amount} bytes buffered)")
+            consumer.disconnected = True
+            consumer.stats.dropped += 1
+
+        consumer.channel.close()
+        self.remove_channel(session_id)
+        if self.on_disconnect is not None:
+            self.on_disconnect(session_id)
+        return False
+
+    def get_stats(self) -> Dict[str, ConsumerLagStats]:
+        """Gets the lag statistics of each consumer.
+
+        Returns:
+            Dict[str, ConsumerLagStats]: Statistics indexed by session ID.
+        """
+        for consumer in self._consumers.values():
+            consumer.stats.buffered_amount = consumer.channel.props.buffered_amount
+        return {session_id: consumer.stats for session_id, consumer in self._consumers.items()}
@@ -0,0 +1,97 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+import gi
+
+gi.require_version("GstWebRTC", "1.0")
+
+from gi.repository import GstWebRTC  # noqa : E402
+
+from .clock_sync import ClockOffsetEstimator, ClockSyncStats  # noqa : E402
+
+CONTROL_CHANNEL_LABEL = "gst-signalling-control"
+
+
+class ProbeConfig(NamedTuple):
+    """Configuration of the round trip time / clock offset probing.
+
+    Each probe is a small JSON message (about 60 bytes) and its reply (about 100 bytes).
+    """
+
+    interval: float = 1.0  # seconds between two probes
+    window: int = 8  # number of samples used by the offset filter
+    alpha: float = 0.125  # round trip time smoothing factor
+    label: str = CONTROL_CHANNEL_LABEL
+
+
+class GstSessionProber:
+    """Runs NTP style probe exchanges over the control data channel of a session.
+
+    Probes received from the remote peer are always answered, probes are only sent if a config is given.
+    """
+
+    def __init__(
+        self,
+        channel: GstWebRTC.WebRTCDataChannel,
+        loop: asyncio.AbstractEventLoop,
+        config: Optional[ProbeConfig] = None,
+    ) -> None:
+        """Initializes the prober.
+
+        Args:
+            channel (GstWebRTC.WebRTCDataChannel): Control data channel of the session.
+            loop (asyncio.AbstractEventLoop): Event loop running the probes.
+            config (ProbeConfig, optional): Probing configuration, None to only answer the remote probes.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.channel = channel
+
+        self.config = config or ProbeConfig()
+        self.estimator = ClockOffsetEstimator(self.config.window, self.config.alpha)
+
+        self._probe_id = 0
+        self._task: Optional[concurrent.futures.Future[None]] = None
+
+        self._handler_id: Optional[int] = channel.connect("on-message-string", self._on_message)
+        if config is not None:
+            self._task = asyncio.run_coroutine_threadsafe(self._probe_loop(), loop)
+
+    def stop(self) -> None:
+        """Stops sending probes, and answering the remote ones."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._handler_id is not None:
+            self.channel.disconnect(self._handler_id)
+            self._handler_id = None
+
+    def get_stats(self) -> ClockSyncStats:
+        """Gets the current round trip time and clock offset estimates."""
+        return self.estimator.get_stats()
+
+    async def _probe_loop(self) -> None:
+        while True:
+            if self.channel.props.ready_state == GstWebRTC.WebRTCDataChannelState.OPEN:
+                self._probe_id += 1
+                self._send({"type": "probe", "id": self._probe_id, "t0": time.time()})
+            await asyncio.sleep(self.config.interval)
+
+    def _on_message(self, _: GstWebRTC.WebRTCDataChannel, message: str) -> None:
+        t_received = time.time()
+        try:
+            data = json.loads(message)
+        except ValueError:
+            self.logger.warning(f"Invalid control message: {message}")
+            return
+
+        if data.get("type") == "probe":
+            self._send({"type": "probe-reply", "id": data["id"], "t0": data["t0"], "t1": t_received, "t2": time.time()})
+        elif data.get("type") == "probe-reply":
+            self.estimator.add_sample(data["t0"], data["t1"], data["t2"], t_received)
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        self.channel.send_string(json.dumps(message))
@@ -1,5 +1,8 @@
+import asyncio
+import json
 import logging
-from typing import Dict
+import time
+from typing import Any, Dict, List, Optional, Set
 
 import gi
 
@@ -7,9 +10,29 @@ gi.require_version("Gst", "1.0")
 gi.require_version("GstWebRTC", "1.0")
 gi.require_version("GstSdp", "1.0")
 
-from gi.repository import Gst, GstSdp, GstWebRTC  # noqa : E402
+from gi.repository import Gst, GstWebRTC  # noqa : E402
 
-from .gst_abstract_role import GstSession, GstSignallingAbstractRole  # noqa : E402
+from .frame_ring import FrameRingWriter  # noqa : E402
+from .gst_abstract_role import (  # noqa : E402
+    GstSession,
+    GstSignallingAbstractRole,
+    element_ids,
+)
+from .gst_frame_tap import CHANNELS, GstFrameTap  # noqa : E402
+from .gst_simulcast import LAYER_CHANNEL_LABEL  # noqa : E402
+from .producer_resolver import (  # noqa : E402
+    ProducerMatcher,
+    ReestablishConfig,
+    ReestablishStats,
+    match_name,
+    resolve_producer,
+)
+from .subscription import (  # noqa : E402
+    MEDIA_KINDS,
+    StreamSubscription,
+    parse_media_lines,
+)
+from .watchdog import DelayStats  # noqa : E402
 
 
 class GstSignallingConsumer(GstSignallingAbstractRole):
@@ -17,14 +40,80 @@ class GstSignallingConsumer(GstSignallingAbstractRole):
         self,
         host: str,
         port: int,
-        producer_peer_id: str,
+        producer_peer_id: Optional[str] = None,
+        producer_name: Optional[str] = None,
+        producer_matcher: Optional[ProducerMatcher] = None,
+        resolve_timeout: Optional[float] = None,
+        reestablish: bool = False,
     ) -> None:
+        """Initializes the consumer.
+
+        The producer is given by its peer ID, or found on the signalling connection of the consumer by its
+        name or a matcher, waiting for it to appear if it is not connected yet.
+
+        With reestablish, a session lost with the producer (ended by the producer, eg. restarted with a new peer
+        ID, not recovered after an ICE restart, or reaped) is started again as soon as a producer with the same
+        name (or matching the matcher) is connected, retrying until it succeeds (see reestablish_config).
+        A session ended with end_session is not re-established. The frame taps and frame rings of the lost
+        session are reused by the new one, which is emitted as session_reestablished instead of new_session.
+
+        Args:
+            host (str): Hostname of the signalling server.
+            port (int): Port of the signalling server.
+            producer_peer_id (str, optional): Peer ID of the producer.
+            producer_name (str, optional): Name of the producer.
+            producer_matcher (ProducerMatcher, optional): Selects the producer from its peer ID and metadata.
+            resolve_timeout (float, optional): Time to wait for the producer to appear (s), forever if not given.
+            reestablish (bool): Starts a new session when the producer comes back after the session is lost.
+        """
         super().__init__(host, port)
         self.logger = logging.getLogger(__name__)
+
+        if producer_matcher is None and producer_name is not None:
+            producer_matcher = match_name(producer_name)
+        if producer_peer_id is None and producer_matcher is None:
+            raise ValueError("Either the producer peer ID, name or matcher is required.")
+        if reestablish and producer_matcher is None:
+            raise ValueError("Re-establishing the session requires the producer name or matcher.")
         self.producer_peer_id = producer_peer_id
+        self.producer_matcher = producer_matcher
+        self.resolve_timeout = resolve_timeout
+        # time spent finding the producer, None if its peer ID was given
+        self.resolve_time: Optional[float] = None
+
+        self.frame_taps: Dict[str, List[GstFrameTap]] = {}
+        self.frame_rings: Dict[str, List[FrameRingWriter]] = {}
+        # streams received by default, and by the sessions that override it
+        self.subscription: Optional[StreamSubscription] = None
+        self.session_subscriptions: Dict[str, StreamSubscription] = {}
+        # layer requested to the layered sources of the producer as soon as a session starts
+        self.preferred_layer: Optional[str] = None
+        self.internal_channels[LAYER_CHANNEL_LABEL] = self.on_layer_channel
+        # session started again when the producer comes back, with the taps, rings and subscription of the lost one
+        self.reestablish = reestablish
+        self.reestablish_config = ReestablishConfig()
+        self._carried_taps: List[GstFrameTap] = []
+        self._carried_rings: List[FrameRingWriter] = []
+        self._carried_subscription: Optional[StreamSubscription] = None
+        self._outage_start: Optional[float] = None
+        self._reestablish_task: Optional[asyncio.Task[None]] = None
+        self._reestablished_setup = asyncio.Event()
+        self._reestablish_stats = ReestablishStats()
+        self._closing = False
 
     async def connect(self) -> None:
         await super().connect()
+
+        if self.producer_peer_id is None:
+            assert self.producer_matcher is not None
+            t_start = time.monotonic()
+            self.producer_peer_id = await resolve_producer(
+                self.signalling, self.producer_matcher, f"consumer-{self.peer_id}", self.resolve_timeout
+            )
+            self.resolve_time = time.monotonic() - t_start
+            self.logger.info(f"Producer {self.producer_peer_id} found in {self.resolve_time * 1000:.1f} ms")
+
+        self._reestablish_stats.producer_peer_ids.append(self.producer_peer_id)
         await self.signalling.start_session(self.producer_peer_id)
         self.logger.info("connect")
 
@@ -33,24 +122,244 @@ class GstSignallingConsumer(GstSignallingAbstractRole):
         self.logger.info("setup session consumer")
 
         self._pipeline.set_state(Gst.State.PLAYING)
-        self.emit("new_session", session)
+        if self._outage_start is not None:
+            self._resume_session(session_id, session)
+            self._reestablished_setup.set()
+            self.emit("session_reestablished", session)
+        else:
+            self.emit("new_session", session)
 
         return session
 
-    def on_answer_created(self, promise: Gst.Promise, webrtc: Gst.Element, session_id: str) -> None:
-        assert promise.wait() == Gst.PromiseResult.REPLIED
-        reply = promise.get_reply()
-        # answer = reply["answer"]
-        answer = reply.get_value("answer")  # type: ignore[union-attr]
-        promise = Gst.Promise.new()
-        webrtc.emit("set-local-description", answer, promise)
-        promise.interrupt()  # we don't care about the result, discard it
-        self.make_send_sdp(answer, "answer", session_id)
+    def _resume_session(self, session_id: str, session: GstSession) -> None:
+        for tap in self._carried_taps:
+            tap.attach(session.pc)
+        if self._carried_taps:
+            self.frame_taps[session_id] = self._carried_taps
+        if self._carried_rings:
+            self.frame_rings[session_id] = self._carried_rings
+        if self._carried_subscription is not None:
+            self.session_subscriptions[session_id] = self._carried_subscription
+        self._carried_taps, self._carried_rings, self._carried_subscription = [], [], None
+
+    def _session_lost(self) -> None:
+        if self._outage_start is None:
+            self._outage_start = time.monotonic()
+            self._reestablish_stats.outages += 1
+        self.logger.warning(f"Session with producer {self.producer_peer_id} lost, waiting for the producer")
+        if self._reestablish_task is None or self._reestablish_task.done():
+            self._reestablish_task = asyncio.create_task(self._reestablish_session())
+
+    async def _reestablish_session(self) -> None:
+        assert self.producer_matcher is not None
+        config = self.reestablish_config
+        delay = config.retry_delay
+        while True:
+            try:
+                # the producer is listed again as soon as it is connected, with a new peer ID if it was restarted
+                self.producer_peer_id = await resolve_producer(
+                    self.signalling, self.producer_matcher, f"consumer-{self.peer_id}"
+                )
+                self._reestablish_stats.producer_peer_ids.append(self.producer_peer_id)
+                self.logger.info(f"Producer {self.producer_peer_id} found, starting a new session")
+                self._reestablished_setup.clear()
+                await self.signalling.start_session(self.producer_peer_id)
+                await asyncio.wait_for(self._reestablished_setup.wait(), config.setup_timeout)
+                return
+            except Exception as e:
+                self._reestablish_stats.failed += 1
+                self.logger.error(f"Failed to re-establish the session: {e!r}, retrying in {delay:.1f} s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, config.max_retry_delay)
+
+    async def ice_connection_state_changed(self, session_id: str, state: GstWebRTC.WebRTCICEConnectionState) -> None:
+        await super().ice_connection_state_changed(session_id, state)
+        connected = state in (GstWebRTC.WebRTCICEConnectionState.CONNECTED, GstWebRTC.WebRTCICEConnectionState.COMPLETED)
+        if connected and self._outage_start is not None:
+            outage = time.monotonic() - self._outage_start
+            self._outage_start = None
+            self._reestablish_stats.reestablished += 1
+            self._reestablish_stats.outage.add(outage)
+            self.logger.info(f"Session {session_id} re-established after an outage of {outage * 1000:.0f} ms")
+
+    def get_reestablish_stats(self) -> ReestablishStats:
+        """Gets the number and duration of the outages of the sessions re-established with the producer."""
+        stats = self._reestablish_stats
+        outage = stats.outage
+        return ReestablishStats(
+            stats.outages,
+            stats.reestablished,
+            DelayStats(outage.count, outage.last, outage.max, outage.total),
+            None if self._outage_start is None else time.monotonic() - self._outage_start,
+            list(stats.producer_peer_ids),
+            stats.failed,
+        )
+
+    def create_frame_tap(self, session: GstSession, index: int = 0, format: str = "RGB") -> GstFrameTap:
+        """Decodes a video stream of a session and exposes its latest frame as a numpy array.
+
+        Must be called before the session is negotiated, typically from the new_session handler.
+
+        Args:
+            session (GstSession): The session.
+            index (int): Index of the video stream to tap, in the order they are received.
+            format (str): Raw video format of the frames (eg. RGB, BGRx, GRAY8).
+        Returns:
+            GstFrameTap: The tap, to be iterated with async for.
+        """
+        session_id = next(sid for sid, s in self.sessions.items() if s is session)
+        tap = GstFrameTap(self._pipeline, session.pc, self._asyncloop, index, format)
+        self.frame_taps.setdefault(session_id, []).append(tap)
+        return tap
+
+    def publish_frames(
+        self,
+        session: GstSession,
+        name: str,
+        index: int = 0,
+        format: str = "RGB",
+        max_width: int = 1920,
+        max_height: int = 1080,
+        slots: int = 4,
+    ) -> FrameRingWriter:
+        """Decodes a video stream of a session once and publishes its frames in a shared memory ring.
+
+        Any number of local processes read the frames with a FrameRingReader attached to the ring name,
+        so that a single session serves all of them. Must be called before the session is negotiated,
+        typically from the new_session handler. The ring is removed when the session is closed.
+
+        Args:
+            session (GstSession): The session.
+            name (str): Name of the ring.
+            index (int): Index of the video stream, in the order they are received.
+            format (str): Raw video format of the frames (eg. RGB, BGRx, GRAY8).
+            max_width (int): Largest frame width published, larger frames are dropped.
+            max_height (int): Largest frame height published, larger frames are dropped.
+            slots (int): Number of frames in the ring.
+        Returns:
+            FrameRingWriter: The ring, with its stats.
+        """
+        session_id = next(sid for sid, s in self.sessions.items() if s is session)
+        tap = self.create_frame_tap(session, index, format)
+        ring = FrameRingWriter(name, max_width * max_height * CHANNELS[format], slots)
+        self.frame_rings.setdefault(session_id, []).append(ring)
+
+        meta = {"session_id": session_id, "peer_id": session.peer_id, "index": index}
+        asyncio.create_task(self._publish_frames(tap, ring, meta), name=f"publish frames {name}")
+        return ring
+
+    async def _publish_frames(self, tap: GstFrameTap, ring: FrameRingWriter, meta: Dict[str, Any]) -> None:
+        async for frame in tap:
+            with frame:
+                if not ring.write(frame.data, frame.pts, frame.format, frame.received_time, frame.decode_time, meta):
+                    self.logger.warning(f"Frame {frame.width}x{frame.height} too large for the ring {ring.name}")
+
+    def count_session_elements(self, session_id: str) -> int:
+        taps = self.frame_taps.get(session_id, [])
+        return super().count_session_elements(session_id) + sum(tap.element_count for tap in taps)
+
+    def set_subscription(self, subscription: Optional[StreamSubscription], session_id: Optional[str] = None) -> None:
+        """Selects the audio / video streams received, the others are answered inactive.
+
+        Without session ID, the subscription applies to the next sessions. For an existing session,
+        the consumer renegotiates it with an offer reflecting the new subscription.
+
+        Args:
+            subscription (StreamSubscription, optional): Streams to receive, None to receive all of them.
+            session_id (str, optional): Session ID.
+        """
+        if session_id is None:
+            self.subscription = subscription
+            return
+
+        self.session_subscriptions[session_id] = subscription or StreamSubscription()
+        webrtc = self.sessions[session_id].pc
+        self.apply_subscription(webrtc, session_id)
+        promise = Gst.Promise.new_with_change_func(self.on_offer_created, webrtc, session_id)
+        webrtc.emit("create-offer", None, promise)
+
+    def apply_subscription(self, webrtc: Gst.Element, session_id: str) -> None:
+        """Sets the direction of the transceivers of a session from the offer of the producer and the subscription."""
+        subscription = self.session_subscriptions.get(session_id, self.subscription)
+        remote = webrtc.get_property("remote-description")
+        if subscription is None or remote is None:
+            return
+
+        media_lines = {line.mline_index: line for line in parse_media_lines(remote.sdp.as_text())}
+        for transceiver in webrtc.emit("get-transceivers"):
+            line = media_lines.get(transceiver.props.mlineindex)
+            if line is None or line.kind not in MEDIA_KINDS:
+                continue
+            accepted = subscription.accepts(line)
+            direction = "recvonly" if accepted else "inactive"
+            Gst.util_set_object_arg(transceiver, "direction", direction)
+            self.logger.info(f"Stream {line.label or line.mid} of session {session_id} {direction}")
+
+    def on_layer_channel(self, session_id: str, channel: GstWebRTC.WebRTCDataChannel) -> None:
+        if self.preferred_layer is None:
+            return
+        if channel.props.ready_state == GstWebRTC.WebRTCDataChannelState.OPEN:
+            self.request_layer(session_id, self.preferred_layer)
+        else:
+            channel.connect("on-open", lambda _: self.request_layer(session_id, self.preferred_layer or "auto"))
+
+    def request_layer(self, session_id: str, layer: str, source: Optional[str] = None) -> None:
+        """Asks the producer to switch a session to another layer of its layered sources.
+
+        Args:
+            session_id (str): Session ID.
+            layer (str): Name of the layer, or "auto" to let the producer select it.
+            source (str, optional): Label of the layered source, all of them if not given.
+        """
+        channel = self.data_channels.get(session_id, {}).get(LAYER_CHANNEL_LABEL)
+        if channel is None:
+            raise RuntimeError(f"Producer of session {session_id} has no layered source.")
+        channel.send_string(json.dumps({"layer": layer, "source": source}))
 
     def on_offer_set(self, promise: Gst.Promise, webrtc: Gst.Element, session_id: str) -> None:
-        assert promise.wait() == Gst.PromiseResult.REPLIED
-        promise = Gst.Promise.new_with_change_func(self.on_answer_created, webrtc, session_id)
-        webrtc.emit("create-answer", None, promise)
+        self.apply_subscription(webrtc, session_id)
+        super().on_offer_set(promise, webrtc, session_id)
+
+    def session_element_ids(self, session_id: str) -> Set[int]:
+        taps = self.frame_taps.get(session_id, [])
+        return super().session_element_ids(session_id) | element_ids(element for tap in taps for element in tap.elements)
+
+    async def close_session(self, session_id: str) -> None:
+        self.forget_session_profile(session_id)
+        # only the sessions lost without the application ending them are re-established
+        carry = self.reestablish and not self._closing and session_id in self.lost_sessions
+        taps = self.frame_taps.pop(session_id, [])
+        rings = self.frame_rings.pop(session_id, [])
+        subscription = self.session_subscriptions.pop(session_id, None)
+        if carry:
+            for tap in taps:
+                tap.detach()
+            self._carried_taps.extend(taps)
+            self._carried_rings.extend(rings)
+            self._carried_subscription = subscription
+        else:
+            for tap in taps:
+                tap.close()
+            for ring in rings:
+                ring.close()
+        await super().close_session(session_id)
+
+        if carry:
+            self._session_lost()
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._reestablish_task is not None:
+            self._reestablish_task.cancel()
+        await super().close()
+        for tap in self._carried_taps:
+            tap.close()
+        # the shared memory rings outlive the process if they are not removed
+        for rings in [*self.frame_rings.values(), self._carried_rings]:
+            for ring in rings:
+                ring.close()
+        self.frame_rings.clear()
+        self._carried_taps, self._carried_rings = [], []
 
     async def peer_for_session(self, session_id: str, message: Dict[str, Dict[str, str]]) -> None:
         self.logger.info(f"peer for session {session_id} {message}")
@@ -60,20 +369,18 @@ class GstSignallingConsumer(GstSignallingAbstractRole):
 
         if "sdp" in message:
             if message["sdp"]["type"] == "offer":
-                _, sdpmsg = GstSdp.SDPMessage.new_from_text(message["sdp"]["sdp"])
-                sdp_type = GstWebRTC.WebRTCSDPType.OFFER
-                offer = GstWebRTC.WebRTCSessionDescription.new(sdp_type, sdpmsg)
-                promise = Gst.Promise.new_with_change_func(self.on_offer_set, webrtc, session_id)
-                webrtc.emit("set-remote-description", offer, promise)
+                # first offer, or renegotiation / ICE restart of the producer
+                self.set_remote_offer(webrtc, message["sdp"]["sdp"], session_id)
                 self.logger.debug("set remote desc done")
 
             elif message["sdp"]["type"] == "answer":
-                self.logger.warning("Consumer should not receive the answer")
+                # answer to a renegotiation started by the consumer
+                self.set_remote_answer(webrtc, message["sdp"]["sdp"], session_id)
             else:
                 self.logger.error(f"SDP not properly formatted {message['sdp']}")
 
         elif "ice" in message:
-            self.handle_ice_message(webrtc, message["ice"])
+            self.handle_ice_message(webrtc, message["ice"], session_id)
 
         else:
             self.logger.error(f"message not processed {message}")
@@ -0,0 +1,168 @@
+import asyncio
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import gi
+import numpy as np
+import numpy.typing as npt
+
+gi.require_version("Gst", "1.0")
+gi.require_version("GstWebRTC", "1.0")
+
+from gi.repository import GLib, Gst, GstWebRTC  # noqa : E402
+
+from . import array_codec  # noqa : E402
+from .latest_value import (  # noqa : E402
+    KeyStats,
+    LatestValueDecoder,
+    LatestValueEncoder,
+)
+from .rpc import RpcEndpoint  # noqa : E402
+
+
+class DataChannelProfile(NamedTuple):
+    """Delivery guarantees of a data channel.
+
+    By default a data channel is reliable and ordered: a lost packet delays every following message.
+    Setting ordered to False and either max_retransmits or max_packet_lifetime gives a partially reliable
+    channel where late messages are dropped instead.
+    """
+
+    ordered: bool = True
+    max_retransmits: Optional[int] = None
+    max_packet_lifetime: Optional[int] = None  # in milliseconds
+
+    def to_options(self) -> Gst.Structure:
+        """Converts the profile to the options of the webrtcbin "create-data-channel" signal."""
+        fields = [f"ordered=(boolean){'true' if self.ordered else 'false'}"]
+        if self.max_retransmits is not None:
+            fields.append(f"max-retransmits=(int){self.max_retransmits}")
+        if self.max_packet_lifetime is not None:
+            fields.append(f"max-packet-lifetime=(int){self.max_packet_lifetime}")
+
+        options = Gst.Structure.new_from_string(f"application/data-channel, {', '.join(fields)}")
+        assert options is not None
+        return options
+
+
+RELIABLE = DataChannelProfile()
+# unordered, never retransmitted: a lost command is superseded by the next one
+LATEST_VALUE = DataChannelProfile(ordered=False, max_retransmits=0)
+
+
+def latest_value_profile(max_packet_lifetime: int) -> DataChannelProfile:
+    """Unordered profile where messages are retransmitted during at most max_packet_lifetime ms."""
+    return DataChannelProfile(ordered=False, max_packet_lifetime=max_packet_lifetime)
+
+
+class LatestValueChannel:
+    """Latest value wins messaging over a data channel.
+
+    Values are sent with a key and a sequence number. The receiving side drops the messages older than
+    the last one received for the same key, so only the newest value of each key is delivered.
+    It should be used on a channel created with the LATEST_VALUE profile (or latest_value_profile).
+
+    channel = producer.create_data_channel(session_id, "teleop", profile=LATEST_VALUE)
+    teleop = LatestValueChannel(channel, on_value=lambda key, value: print(key, value))
+    """
+
+    def __init__(self, channel: GstWebRTC.WebRTCDataChannel, on_value: Optional[Callable[[str, Any], None]] = None) -> None:
+        """Initializes the channel.
+
+        Args:
+            channel (GstWebRTC.WebRTCDataChannel): Underlying data channel.
+            on_value (Callable[[str, Any], None], optional): Called (from a GStreamer thread)
+                with the key and value of each fresh message.
+        """
+        self.channel = channel
+        self.encoder = LatestValueEncoder()
+        self.decoder = LatestValueDecoder(on_value)
+
+        channel.connect("on-message-string", self._on_message)
+
+    def _on_message(self, _: GstWebRTC.WebRTCDataChannel, message: str) -> None:
+        self.decoder.decode(message)
+
+    def send(self, key: str, value: Any) -> None:
+        """Sends the new value of a key.
+
+        Args:
+            key (str): Key of the value (eg. the name of the command).
+            value (Any): JSON serialisable value.
+        """
+        self.channel.send_string(self.encoder.encode(key, value))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Gets the newest value received for a key."""
+        return self.decoder.get(key, default)
+
+    def get_stats(self) -> Dict[str, KeyStats]:
+        """Gets the delivery statistics (delivered and stale counts, latencies) of each received key."""
+        return self.decoder.get_stats()
+
+
+class RpcChannel(RpcEndpoint):
+    """Pipelined remote procedure calls over a data channel (see RpcEndpoint).
+
+    Both peers of the session wrap the same channel, and can call the methods registered by the other.
+    It should be used on a reliable channel.
+
+    channel = producer.create_data_channel(session_id, "rpc")
+    rpc = RpcChannel(channel, asyncio.get_running_loop())
+    rpc.register("get_position", get_position)
+    """
+
+    def __init__(
+        self,
+        channel: GstWebRTC.WebRTCDataChannel,
+        loop: asyncio.AbstractEventLoop,
+        max_concurrency: int = 16,
+        max_queued: int = 256,
+        default_timeout: Optional[float] = None,
+    ) -> None:
+        """Initializes the channel.
+
+        Args:
+            channel (GstWebRTC.WebRTCDataChannel): Underlying data channel.
+            loop (asyncio.AbstractEventLoop): Event loop running the calls and the handlers.
+            max_concurrency (int): Number of requests of the remote peer handled at once.
+            max_queued (int): Number of requests waiting for a handler slot before new ones are rejected.
+            default_timeout (float, optional): Deadline of the calls made without timeout (s).
+        """
+        super().__init__(channel.send_string, max_concurrency, max_queued, default_timeout)
+        self.channel = channel
+        self._loop = loop
+
+        channel.connect("on-message-string", self._on_message)
+        channel.connect("on-close", self._on_close)
+
+    def _on_message(self, _: GstWebRTC.WebRTCDataChannel, message: str) -> None:
+        self._loop.call_soon_threadsafe(self.feed, message)
+
+    def _on_close(self, _: GstWebRTC.WebRTCDataChannel) -> None:
+        self._loop.call_soon_threadsafe(self.close)
+
+
+def send_arrays(channel: GstWebRTC.WebRTCDataChannel, arrays: Sequence[npt.NDArray[np.generic]]) -> None:
+    """Sends numpy arrays as a single binary message (see array_codec).
+
+    Args:
+        channel (GstWebRTC.WebRTCDataChannel): Data channel to send on.
+        arrays (Sequence[np.ndarray]): Arrays to send.
+    """
+    # GLib.Bytes owns its own copy of the data, the only copy besides the encoding
+    channel.send_data(GLib.Bytes.new(array_codec.encode(arrays)))
+
+
+def receive_arrays(data: GLib.Bytes) -> List[npt.NDArray[np.generic]]:
+    """Decodes the numpy arrays of a binary message, as received by the "on-message-data" signal.
+
+    The arrays are read-only views over the message buffer.
+
+    Args:
+        data (GLib.Bytes): The received message.
+    Returns:
+        List[np.ndarray]: The decoded arrays.
+    """
+    buffer = data.get_data()
+    assert buffer is not None
+    return array_codec.decode(buffer)
@@ -0,0 +1,346 @@
+import asyncio
+import collections
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import gi
+import numpy as np
+import numpy.typing as npt
+
+gi.require_version("Gst", "1.0")
+gi.require_version("GstVideo", "1.0")
+
+from gi.repository import Gst  # noqa : E402
+from gi.repository import GstVideo  # type: ignore[attr-defined]  # noqa : E402
+
+CHANNELS = {"RGB": 3, "BGR": 3, "RGBA": 4, "BGRA": 4, "RGBx": 4, "BGRx": 4, "GRAY8": 1}
+
+
+class VideoFrame:
+    """Decoded video frame exposed as a numpy view over the mapped GStreamer buffer.
+
+    The buffer stays mapped until release is called (or the frame is used as a context manager),
+    copy the data to keep it longer.
+    """
+
+    def __init__(self, buffer: Gst.Buffer, caps: Gst.Caps, format: str, decode_time: Optional[float]) -> None:
+        """Maps a raw video buffer.
+
+        The layout of the rows is read from the video meta of the buffer, set by the elements whose
+        buffers are padded (eg. hardware decoders), or else computed from the caps.
+
+        Args:
+            buffer (Gst.Buffer): Raw video buffer.
+            caps (Gst.Caps): Raw video caps of the buffer.
+            format (str): Raw video format of the buffer (RGB, BGR, RGBA, BGRA, RGBx, BGRx or GRAY8).
+            decode_time (float, optional): Time from the arrival of the encoded frame to its decoding (s).
+        """
+        info = GstVideo.VideoInfo.new_from_caps(caps)
+        if info is None:
+            raise ValueError(f"Invalid raw video caps {caps.to_string()}.")
+        meta = GstVideo.buffer_get_video_meta(buffer)
+        if meta is not None:
+            width, height, stride, offset = meta.width, meta.height, meta.stride[0], meta.offset[0]
+        else:
+            width, height, stride, offset = info.width, info.height, info.stride[0], info.offset[0]
+
+        self.pts = buffer.pts
+        self.width = width
+        self.height = height
+        self.format = format
+        self.decode_time = decode_time
+        self.received_time = time.monotonic()
+
+        self._buffer = buffer
+        ok, self._mapinfo = buffer.map(Gst.MapFlags.READ)
+        if not ok:
+            raise RuntimeError("Failed to map the video buffer.")
+        self._mapped = True
+
+        channels = CHANNELS[format]
+        # rows may be padded, the view skips the padding
+        self.data: npt.NDArray[np.uint8] = np.ndarray(
+            (height, width, channels),
+            dtype=np.uint8,
+            buffer=self._mapinfo.data,
+            offset=offset,
+            strides=(stride, channels, 1),
+        )
+
+    def release(self) -> None:
+        """Unmaps the buffer, data must not be used afterwards."""
+        if self._mapped:
+            self._mapped = False
+            del self.data
+            self._buffer.unmap(self._mapinfo)
+
+    def __enter__(self) -> "VideoFrame":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.release()
+
+
+@dataclass
+class FrameTapStats:
+    """Counters of a frame tap. Times are in seconds."""
+
+    received: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    last_decode_time: Optional[float] = None
+    mean_decode_time: Optional[float] = None
+    max_decode_time: Optional[float] = None
+
+
+class GstFrameTap:
+    """Decodes a video stream of a session and keeps only the latest frame.
+
+    Incoming video pads of the webrtcbin are linked to decodebin ! videoconvert ! appsink.
+    The appsink keeps at most one buffer, and the tap mailbox holds the latest decoded frame:
+    frames that are not consumed before the next one arrives are dropped.
+
+    tap = consumer.create_frame_tap(session)
+    async for frame in tap:
+        with frame:
+            process(frame.data)
+    """
+
+    def __init__(
+        self,
+        pipeline: Gst.Pipeline,
+        webrtc: Gst.Element,
+        loop: asyncio.AbstractEventLoop,
+        index: int = 0,
+        format: str = "RGB",
+    ) -> None:
+        """Initializes the tap.
+
+        Args:
+            pipeline (Gst.Pipeline): Pipeline containing the webrtcbin.
+            webrtc (Gst.Element): webrtcbin of the session.
+            loop (asyncio.AbstractEventLoop): Event loop used to wake up the frame readers.
+            index (int): Index of the video stream to tap, in the order the pads are added.
+            format (str): Raw video format of the frames (RGB, BGR, RGBA, BGRA, RGBx, BGRx or GRAY8).
+        """
+        if format not in CHANNELS:
+            raise ValueError(f"Unsupported format {format}.")
+
+        self.logger = logging.getLogger(__name__)
+
+        self.index = index
+        self.format = format
+
+        self._pipeline = pipeline
+        self._loop = loop
+        self._video_pads = 0
+        self._elements: List[Gst.Element] = []
+
+        self._lock = threading.Lock()
+        self._frame: Optional[VideoFrame] = None
+        self._new_frame = asyncio.Event()
+        self._closed = False
+
+        self._arrivals: collections.OrderedDict[int, float] = collections.OrderedDict()
+        self._decode_time_sum = 0.0
+        self._decode_time_count = 0
+        self.stats = FrameTapStats()
+
+        self._webrtc = webrtc
+        self._handler_id: Optional[int] = webrtc.connect("pad-added", self._on_pad_added)
+
+    def _disconnect(self) -> None:
+        if self._handler_id is not None:
+            self._webrtc.disconnect(self._handler_id)
+            self._handler_id = None
+
+    def detach(self) -> None:
+        """Unlinks the tap from its webrtcbin, keeping its decoding elements and its readers.
+
+        The decoding elements are reset, ready to be linked to the webrtcbin of another session with attach.
+        """
+        self._disconnect()
+        if self._elements:
+            queue_sink = self._elements[0].get_static_pad("sink")
+            assert queue_sink is not None
+            peer = queue_sink.get_peer()
+            if peer is not None:
+                peer.unlink(queue_sink)
+            for element in self._elements:
+                element.set_state(Gst.State.READY)
+        self._arrivals.clear()
+
+    def attach(self, webrtc: Gst.Element) -> None:
+        """Taps the same video stream of the webrtcbin of another session, after detach."""
+        with self._lock:
+            self._video_pads = 0
+        self._webrtc = webrtc
+        self._handler_id = webrtc.connect("pad-added", self._on_pad_added)
+
+    def _on_pad_added(self, _: Gst.Element, pad: Gst.Pad) -> None:
+        if pad.direction != Gst.PadDirection.SRC:
+            return
+
+        caps = pad.get_current_caps() or pad.query_caps(None)
+        if caps.get_structure(0).get_string("media") != "video":
+            return
+
+        with self._lock:
+            index = self._video_pads
+            self._video_pads += 1
+        if index != self.index:
+            return
+
+        if self._elements:
+            self._relink(pad)
+        else:
+            self._link(pad)
+
+    def _link(self, pad: Gst.Pad) -> None:
+        queue = Gst.ElementFactory.make("queue")
+        decodebin = Gst.ElementFactory.make("decodebin")
+        convert = Gst.ElementFactory.make("videoconvert")
+        capsfilter = Gst.ElementFactory.make("capsfilter")
+        appsink = Gst.ElementFactory.make("appsink")
+        assert queue and decodebin and convert and capsfilter and appsink
+
+        capsfilter.set_property("caps", Gst.Caps.from_string(f"video/x-raw,format={self.format}"))
+        appsink.set_property("emit-signals", True)
+        appsink.set_property("max-buffers", 1)
+        appsink.set_property("drop", True)
+        appsink.set_property("sync", False)
+        appsink.connect("new-sample", self._on_new_sample)
+
+        self._elements = [queue, decodebin, convert, capsfilter, appsink]
+        for element in self._elements:
+            self._pipeline.add(element)
+
+        queue.link(decodebin)
+        decodebin.connect("pad-added", self._on_decoded_pad, convert)
+        convert.link(capsfilter)
+        capsfilter.link(appsink)
+
+        queue_sink = queue.get_static_pad("sink")
+        assert queue_sink is not None
+        queue_sink.add_probe(Gst.PadProbeType.BUFFER, self._on_encoded_buffer)
+        pad.link(queue_sink)
+
+        for element in self._elements:
+            element.sync_state_with_parent()
+
+    def _relink(self, pad: Gst.Pad) -> None:
+        # decoding elements reused after attach
+        queue_sink = self._elements[0].get_static_pad("sink")
+        assert queue_sink is not None
+        pad.link(queue_sink)
+        for element in self._elements:
+            element.sync_state_with_parent()
+
+    def _on_decoded_pad(self, _: Gst.Element, pad: Gst.Pad, convert: Gst.Element) -> None:
+        sink = convert.get_static_pad("sink")
+        assert sink is not None
+        if not sink.is_linked():
+            pad.link(sink)
+
+    def _on_encoded_buffer(self, _: Gst.Pad, info: Gst.PadProbeInfo) -> Gst.PadProbeReturn:
+        buffer = info.get_buffer()
+        if buffer is not None and buffer.pts not in self._arrivals:
+            self._arrivals[buffer.pts] = time.monotonic()
+            while len(self._arrivals) > 256:
+                self._arrivals.popitem(last=False)
+        return Gst.PadProbeReturn.OK
+
+    def _on_new_sample(self, appsink: Gst.Element) -> Gst.FlowReturn:
+        sample = appsink.emit("pull-sample")
+        if sample is None:
+            return Gst.FlowReturn.ERROR
+
+        buffer = sample.get_buffer()
+        arrival = self._arrivals.pop(buffer.pts, None)
+        decode_time = None if arrival is None else time.monotonic() - arrival
+        frame = VideoFrame(buffer, sample.get_caps(), self.format, decode_time)
+
+        with self._lock:
+            previous, self._frame = self._frame, frame
+            self._update_stats(decode_time, dropped=previous is not None)
+
+        if previous is not None:
+            previous.release()
+        self._loop.call_soon_threadsafe(self._new_frame.set)
+
+        return Gst.FlowReturn.OK
+
+    def _update_stats(self, decode_time: Optional[float], dropped: bool) -> None:
+        # lock must be held
+        self.stats.received += 1
+        if dropped:
+            self.stats.dropped += 1
+        if decode_time is not None:
+            self._decode_time_sum += decode_time
+            self._decode_time_count += 1
+            self.stats.last_decode_time = decode_time
+            self.stats.mean_decode_time = self._decode_time_sum / self._decode_time_count
+            self.stats.max_decode_time = max(self.stats.max_decode_time or 0.0, decode_time)
+
+    def latest(self) -> Optional[VideoFrame]:
+        """Takes the latest frame out of the mailbox, without waiting.
+
+        Returns:
+            Optional[VideoFrame]: The frame, None if no new frame was received since the last call.
+        """
+        with self._lock:
+            frame, self._frame = self._frame, None
+            if frame is not None:
+                self.stats.delivered += 1
+            self._new_frame.clear()
+        return frame
+
+    async def next_frame(self) -> Optional[VideoFrame]:
+        """Waits for a new frame and takes it out of the mailbox.
+
+        Returns:
+            Optional[VideoFrame]: The frame, None if the tap was closed.
+        """
+        while not self._closed:
+            frame = self.latest()
+            if frame is not None:
+                return frame
+            await self._new_frame.wait()
+        return None
+
+    def __aiter__(self) -> "GstFrameTap":
+        return self
+
+    async def __anext__(self) -> VideoFrame:
+        frame = await self.next_frame()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+    @property
+    def elements(self) -> List[Gst.Element]:
+        """Decoding elements added to the pipeline."""
+        return list(self._elements)
+
+    @property
+    def element_count(self) -> int:
+        """Number of decoding elements added to the pipeline."""
+        return len(self._elements)
+
+    def close(self) -> None:
+        """Releases the decoding elements and the pending frame, and stops the iteration."""
+        self._closed = True
+        self._disconnect()
+        for element in self._elements:
+            element.set_state(Gst.State.NULL)
+            self._pipeline.remove(element)
+        self._elements = []
+
+        with self._lock:
+            frame, self._frame = self._frame, None
+        if frame is not None:
+            frame.release()
+        self._loop.call_soon_threadsafe(self._new_frame.set)
@@ -0,0 +1,123 @@
+import logging
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Union
+
+import gi
+
+gi.require_version("Gst", "1.0")
+
+from gi.repository import Gst  # noqa : E402
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyProfile(NamedTuple):
+    """Settings of the elements that decide the end-to-end latency of a session.
+
+    - latency: webrtcbin (jitterbuffer) latency in ms
+    - jitterbuffer_mode: rtpjitterbuffer mode (none, slave, buffer or synced)
+    - drop_on_latency: drop packets arriving after the latency instead of waiting for them
+    - do_retransmission: request the retransmission of lost packets
+    - queue_max_buffers: size of the queues linked to the sessions (0 for unlimited)
+    - queue_leaky: what to drop when these queues are full (no, upstream or downstream)
+    - encoder_properties: properties set on the encoders of the media sources, if they exist
+      (eg. {"deadline": "1"} for vp8enc or {"tune": "zerolatency"} for x264enc), None to keep the encoder settings
+    """
+
+    latency: int
+    jitterbuffer_mode: str = "slave"
+    drop_on_latency: bool = False
+    do_retransmission: bool = False
+    queue_max_buffers: int = 200
+    queue_leaky: str = "no"
+    encoder_properties: Optional[Mapping[str, str]] = None
+
+
+PROFILES: Dict[str, LatencyProfile] = {
+    "teleop-ultra-low": LatencyProfile(
+        latency=20,
+        jitterbuffer_mode="none",
+        drop_on_latency=True,
+        queue_max_buffers=1,
+        queue_leaky="downstream",
+        encoder_properties=MappingProxyType(
+            {
+                "deadline": "1",
+                "cpu-used": "8",
+                "lag-in-frames": "0",
+                "tune": "zerolatency",
+                "speed-preset": "ultrafast",
+            }
+        ),
+    ),
+    "balanced": LatencyProfile(
+        latency=200,
+        do_retransmission=True,
+        encoder_properties=MappingProxyType({"deadline": "1", "tune": "zerolatency"}),
+    ),
+    "recording": LatencyProfile(
+        latency=2000,
+        jitterbuffer_mode="synced",
+        do_retransmission=True,
+        queue_max_buffers=0,
+        encoder_properties=MappingProxyType({"deadline": "0", "speed-preset": "medium"}),
+    ),
+}
+
+
+def get_profile(profile: Union[str, LatencyProfile]) -> LatencyProfile:
+    """Gets a profile by name (see PROFILES), profiles are returned as is."""
+    if isinstance(profile, LatencyProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown latency profile {profile}, available: {', '.join(PROFILES)}.")
+    return PROFILES[profile]
+
+
+def apply_to_webrtc(webrtc: Gst.Element, profile: LatencyProfile) -> None:
+    """Configures a webrtcbin and the jitterbuffers it creates."""
+    webrtc.set_property("latency", profile.latency)
+
+    rtpbin = webrtc.get_by_name("rtpbin")  # type: ignore[attr-defined]
+    if rtpbin is None:
+        logger.warning("webrtcbin has no rtpbin, jitterbuffers not configured")
+        return
+
+    # rtpbin forwards these settings to its jitterbuffers
+    rtpbin.set_property("drop-on-latency", profile.drop_on_latency)
+    rtpbin.set_property("do-retransmission", profile.do_retransmission)
+    Gst.util_set_object_arg(rtpbin, "buffer-mode", profile.jitterbuffer_mode)
+
+
+def apply_to_queue(queue: Gst.Element, profile: LatencyProfile) -> None:
+    """Configures a queue linked to a session."""
+    queue.set_property("max-size-buffers", profile.queue_max_buffers)
+    if profile.queue_max_buffers == 0:
+        queue.set_property("max-size-bytes", 0)
+        queue.set_property("max-size-time", 0)
+    Gst.util_set_object_arg(queue, "leaky", profile.queue_leaky)
+
+
+def apply_to_encoder(encoder: Gst.Element, profile: LatencyProfile) -> None:
+    """Sets the encoder properties of the profile on an element, or on the elements of a bin.
+
+    Properties that do not exist on an element are ignored.
+    """
+    if not profile.encoder_properties:
+        return
+
+    elements = [encoder]
+    if isinstance(encoder, Gst.Bin):
+        iterator = encoder.iterate_recurse()
+        assert iterator is not None
+        elements = []
+        while True:
+            ret, element = iterator.next()
+            if ret != Gst.IteratorResult.OK:
+                break
+            elements.append(element)
+
+    for element in elements:
+        for name, value in profile.encoder_properties.items():
+            if element.find_property(name) is not None:
+                Gst.util_set_object_arg(element, name, value)
@@ -1,12 +1,12 @@
 import asyncio
 from typing import Dict, List
 
-from .gst_abstract_role import GstSignallingAbstractRole
+from .gst_base_role import GstSignallingBaseRole
 
 
-class GstSignallingListener(GstSignallingAbstractRole):
+class GstSignallingListener(GstSignallingBaseRole):
     def __init__(self, host: str, port: int, name: str) -> None:
-        GstSignallingAbstractRole.__init__(self, host=host, port=port)
+        GstSignallingBaseRole.__init__(self, host=host, port=port)
         self.name = name
 
         @self.signalling.on("PeerStatusChanged")  # type: ignore[arg-type]
@@ -28,6 +28,3 @@ class GstSignallingListener(GstSignallingAbstractRole):
     async def consume(self) -> None:
         while True:
             await asyncio.sleep(1)
-
-    async def close(self) -> None:
-        await self.signalling.close()
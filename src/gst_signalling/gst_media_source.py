@@ -0,0 +1,468 @@
+import logging
+import threading
+import time
+from dataclasses import replace
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import gi
+import numpy as np
+import numpy.typing as npt
+
+gi.require_version("Gst", "1.0")
+
+from gi.repository import Gst  # noqa : E402
+
+from .frame_pacing import FramePacer, MediaSourceStats  # noqa : E402
+from .gst_frame_tap import CHANNELS  # noqa : E402
+from .gst_latency import LatencyProfile, apply_to_encoder, apply_to_queue  # noqa : E402
+from .keyframes import GopCache, JoinStats  # noqa : E402
+
+DEFAULT_ENCODER = "vp8enc deadline=1 keyframe-max-dist=60 ! rtpvp8pay pt=96 ! application/x-rtp,media=video,payload=96"
+FORCE_KEY_UNIT = "GstForceKeyUnit, all-headers=(boolean)true"
+
+
+def force_key_unit(pad: Gst.Pad) -> None:
+    """Asks the encoder upstream of a pad for a key frame."""
+    structure = Gst.Structure.new_from_string(FORCE_KEY_UNIT)
+    assert structure is not None
+    event = Gst.Event.new_custom(Gst.EventType.CUSTOM_UPSTREAM, structure)
+    assert event is not None
+    pad.send_event(event)
+
+
+def find_encoder(bin: Gst.Bin) -> Optional[Gst.Element]:
+    """Finds the encoder element of a bin built from a description, None if it has none."""
+    for element in bin.children:
+        factory = element.get_factory()
+        if factory is not None and "Encoder" in (factory.get_metadata(Gst.ELEMENT_METADATA_KLASS) or ""):
+            return element
+    return None
+
+
+def is_keyframe(buffer: Gst.Buffer) -> bool:
+    return not buffer.has_flags(Gst.BufferFlags.DELTA_UNIT)
+
+
+class GstVideoSource:
+    """Feeds raw video frames from Python to every session of a producer.
+
+    appsrc ! videoconvert ! queue ! encoder/payloader ! tee, then one queue per session to its webrtcbin.
+    Frames are timestamped with the pipeline running time, paced to the target framerate, and copied
+    once into buffers of a pool, so that no memory is allocated per frame.
+
+    source = GstVideoSource(640, 480, framerate=30)
+    producer.add_media_source(source)
+    ...
+    source.push_frame(frame)  # (480, 640, 3) uint8 array
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        framerate: int = 30,
+        format: str = "RGB",
+        encoder: str = DEFAULT_ENCODER,
+        pool_size: int = 4,
+        label: Optional[str] = None,
+        gop_cache: bool = False,
+        gop_cache_size: int = 4 * 1024 * 1024,
+    ) -> None:
+        """Initializes the source.
+
+        Args:
+            width (int): Frame width.
+            height (int): Frame height.
+            framerate (int): Target framerate, frames pushed faster are dropped.
+            format (str): Raw video format of the frames (RGB, BGR, RGBA, BGRA, RGBx, BGRx or GRAY8).
+            encoder (str): Description of the encoding and payloading elements, producing RTP.
+            pool_size (int): Number of frames that can be in flight in the pipeline.
+            label (str, optional): Label of the stream, declared in the offers so that consumers can subscribe to it.
+            gop_cache (bool): Keep the packets since the last key frame, sent first to the joining sessions.
+                The packets of a session are then held until it joins (see join_session).
+            gop_cache_size (int): Maximum size of the cached packets (bytes), longer groups of pictures are not cached.
+        """
+        if format not in CHANNELS:
+            raise ValueError(f"Unsupported format {format}.")
+
+        self.logger = logging.getLogger(__name__)
+
+        self.width = width
+        self.height = height
+        self.framerate = framerate
+        self.format = format
+        self.encoder_description = encoder
+        self.pool_size = pool_size
+        self.label = label
+
+        channels = CHANNELS[format]
+        self.row_size = width * channels
+        # raw video rows are aligned on 4 bytes
+        self.stride = (self.row_size + 3) // 4 * 4
+        self.frame_size = self.stride * height
+        self.frame_duration = Gst.SECOND // framerate
+
+        self.caps = Gst.Caps.from_string(f"video/x-raw,format={format},width={width},height={height},framerate={framerate}/1")
+
+        self.stats = MediaSourceStats()
+        self._lock = threading.Lock()
+        self._pacer = FramePacer(self.frame_duration, self.stats)
+
+        self._pipeline: Optional[Gst.Pipeline] = None
+        self._appsrc: Optional[Gst.Element] = None
+        self._tee: Optional[Gst.Element] = None
+        self._encoder: Optional[Gst.Element] = None
+        self._pool: Optional[Gst.BufferPool] = None
+        self._branches: Dict[str, Tuple[Gst.Pad, Gst.Element]] = {}
+        # drop probes of the sessions that do not receive the stream
+        self._inactive: Dict[str, int] = {}
+
+        self.join_stats = JoinStats()
+        self.gop_cache = gop_cache
+        self.gop_cache_size = gop_cache_size
+        # join time of the sessions waiting for a key frame
+        self._joining: Dict[str, float] = {}
+        # RTP packets since the last key frame
+        self._gop: GopCache[Gst.Buffer] = GopCache(gop_cache_size)
+        # sessions whose packets are dropped until they join, with the packets to send them first once joined
+        self._held: Dict[str, Optional[List[Gst.Buffer]]] = {}
+        self._replaying: Set[str] = set()
+
+    def _make_appsrc(self) -> Gst.Element:
+        appsrc = Gst.ElementFactory.make("appsrc")
+        assert appsrc is not None
+        appsrc.set_property("caps", self.caps)
+        appsrc.set_property("format", Gst.Format.TIME)
+        appsrc.set_property("is-live", True)
+        appsrc.set_property("do-timestamp", False)
+        return appsrc
+
+    def _start_pool(self) -> None:
+        self._pool = Gst.BufferPool.new()
+        config = self._pool.get_config()
+        Gst.BufferPool.config_set_params(config, self.caps, self.frame_size, self.pool_size, self.pool_size)
+        self._pool.set_config(config)
+        self._pool.set_active(True)
+
+    def attach(self, pipeline: Gst.Pipeline) -> None:
+        """Adds the source elements to the pipeline of a role."""
+        appsrc = self._make_appsrc()
+
+        tee = Gst.ElementFactory.make("tee")
+        assert tee is not None
+        tee.set_property("allow-not-linked", True)
+
+        convert = Gst.ElementFactory.make("videoconvert")
+        queue = Gst.ElementFactory.make("queue")
+        assert convert is not None and queue is not None
+        encoder = Gst.parse_bin_from_description(self.encoder_description, True)
+
+        elements = [appsrc, convert, queue, encoder, tee]
+        for element in elements:
+            pipeline.add(element)
+        for upstream, downstream in zip(elements, elements[1:]):
+            upstream.link(downstream)
+        for element in elements:
+            element.sync_state_with_parent()
+
+        self._start_pool()
+
+        self._pipeline = pipeline
+        self._appsrc = appsrc
+        self._tee = tee
+        self._encoder = encoder
+        self._watch_keyframes(encoder, tee)
+
+    def _watch_keyframes(self, encoder: Gst.Bin, tee: Gst.Element) -> None:
+        encoder_src = None
+        element = find_encoder(encoder)
+        if element is not None:
+            encoder_src = element.get_static_pad("src")
+        if encoder_src is None:
+            self.logger.warning("No encoder found, key frames of the joining sessions are not tracked")
+            return
+        encoder_src.add_probe(Gst.PadProbeType.BUFFER, self._on_encoded_frame)
+
+        tee_sink = tee.get_static_pad("sink")
+        if self.gop_cache and tee_sink is not None:
+            tee_sink.add_probe(Gst.PadProbeType.BUFFER, self._on_packet)
+
+    def _on_encoded_frame(self, _: Gst.Pad, info: Gst.PadProbeInfo) -> Gst.PadProbeReturn:
+        buffer = info.get_buffer()
+        if buffer is not None and is_keyframe(buffer):
+            with self._lock:
+                # the payloader runs in the same thread, the next packets are the ones of this frame
+                self._gop.keyframe()
+                self._keyframe_sent(list(self._joining))
+        return Gst.PadProbeReturn.OK
+
+    def _keyframe_sent(self, session_ids: List[str]) -> None:
+        now = time.monotonic()
+        for session_id in session_ids:
+            joined = self._joining.pop(session_id, None)
+            if joined is not None:
+                self.join_stats.time_to_keyframe.add(now - joined)
+
+    def _on_packet(self, _: Gst.Pad, info: Gst.PadProbeInfo) -> Gst.PadProbeReturn:
+        buffer = info.get_buffer()
+        if buffer is None:
+            return Gst.PadProbeReturn.OK
+
+        with self._lock:
+            self._gop.add(buffer, buffer.get_size())
+        return Gst.PadProbeReturn.OK
+
+    def join_session(self, session_id: str) -> bool:
+        """Starts timing the first key frame of a session that just connected, and sends it the cached packets.
+
+        With the GOP cache, the packets of the session were held since it was linked: the cached packets
+        (from the last key frame) are sent first, followed by the live ones. They keep their sequence numbers
+        and timestamps, the session receives them as the start of a continuous stream, in a burst.
+
+        Args:
+            session_id (str): Session ID.
+        Returns:
+            bool: True if the session was started with the cached group of pictures, False if it needs a key frame.
+        """
+        if session_id not in self._branches:
+            return False
+
+        with self._lock:
+            self.join_stats.joins += 1
+            gop = self._gop.get()
+            if session_id in self._held:
+                # released by the next packet, an empty replay if no group of pictures is cached
+                self._held[session_id] = gop or []
+            else:
+                gop = None
+            if gop is None:
+                self._joining[session_id] = time.monotonic()
+                return False
+            self.join_stats.gop_replays += 1
+            self.join_stats.time_to_keyframe.add(0.0)
+        return True
+
+    def _on_held_packet(self, pad: Gst.Pad, _: Gst.PadProbeInfo, session_id: str) -> Gst.PadProbeReturn:
+        with self._lock:
+            if session_id in self._replaying:
+                return Gst.PadProbeReturn.OK
+            if session_id not in self._held:
+                return Gst.PadProbeReturn.REMOVE
+            gop = self._held[session_id]
+            if gop is None:
+                # not joined yet, its packets would be sent before the cached ones
+                return Gst.PadProbeReturn.DROP
+            del self._held[session_id]
+            self._replaying.add(session_id)
+
+        try:
+            # pushed from the streaming thread, before the current packet which comes after them
+            for buffer in gop:
+                pad.push(buffer)
+        finally:
+            with self._lock:
+                self._replaying.discard(session_id)
+        return Gst.PadProbeReturn.REMOVE
+
+    def force_keyframe(self, session_id: Optional[str] = None) -> None:
+        """Asks the encoder for a key frame.
+
+        Args:
+            session_id (str, optional): Session needing it, unused as the encoder is shared by all sessions.
+        """
+        if self._tee is None:
+            return
+        tee_sink = self._tee.get_static_pad("sink")
+        assert tee_sink is not None
+        force_key_unit(tee_sink)
+        self.join_stats.keyframes_forced += 1
+
+    def get_join_stats(self) -> JoinStats:
+        """Gets the join statistics (forced key frames, cache replays, time to the first key frame)."""
+        with self._lock:
+            return replace(self.join_stats, time_to_keyframe=replace(self.join_stats.time_to_keyframe))
+
+    def link_session(self, session_id: str, webrtc: Gst.Element, profile: Optional[LatencyProfile] = None) -> None:
+        """Sends the encoded stream to the webrtcbin of a session.
+
+        Args:
+            session_id (str): Session ID.
+            webrtc (Gst.Element): webrtcbin of the session.
+            profile (LatencyProfile, optional): Latency profile applied to the session queue.
+        """
+        assert self._pipeline is not None and self._tee is not None
+
+        queue = Gst.ElementFactory.make("queue")
+        assert queue is not None
+        if profile is not None:
+            apply_to_queue(queue, profile)
+        self._pipeline.add(queue)
+
+        tee_pad = self._tee.request_pad_simple("src_%u")
+        webrtc_pad = webrtc.request_pad_simple("sink_%u")
+        queue_sink = queue.get_static_pad("sink")
+        queue_src = queue.get_static_pad("src")
+        assert tee_pad and webrtc_pad and queue_sink and queue_src
+
+        if self.gop_cache:
+            # the packets are sent once the session joins, after the cached group of pictures
+            with self._lock:
+                self._held[session_id] = None
+            tee_pad.add_probe(Gst.PadProbeType.BUFFER, self._on_held_packet, session_id)
+
+        tee_pad.link(queue_sink)
+        queue_src.link(webrtc_pad)
+        queue.sync_state_with_parent()
+
+        self._branches[session_id] = (tee_pad, queue)
+
+    def session_elements(self, session_id: str) -> List[Gst.Element]:
+        """Gets the elements linking the source to the webrtcbin of a session."""
+        branch = self._branches.get(session_id)
+        return [] if branch is None else [branch[1]]
+
+    def apply_latency_profile(self, profile: LatencyProfile, session_id: Optional[str] = None) -> None:
+        """Applies a latency profile to the encoder, or to the queue of a session.
+
+        Args:
+            profile (LatencyProfile): The profile.
+            session_id (str, optional): Session ID, None to configure the encoder shared by all sessions.
+        """
+        if session_id is None:
+            if self._encoder is not None:
+                apply_to_encoder(self._encoder, profile)
+        elif session_id in self._branches:
+            apply_to_queue(self._branches[session_id][1], profile)
+
+    def set_session_active(self, session_id: str, active: bool) -> None:
+        """Resumes or suspends the stream of a session (eg. when the consumer does not subscribe to it).
+
+        Frames are not encoded at all while no session is active.
+        """
+        branch = self._branches.get(session_id)
+        if branch is None or active == (session_id not in self._inactive):
+            return
+
+        tee_pad = branch[0]
+        if active:
+            tee_pad.remove_probe(self._inactive.pop(session_id))
+        else:
+            self._inactive[session_id] = tee_pad.add_probe(Gst.PadProbeType.BUFFER, lambda *_: Gst.PadProbeReturn.DROP)
+
+    def unlink_session(self, session_id: str) -> None:
+        """Stops sending the encoded stream to a session."""
+        with self._lock:
+            self._joining.pop(session_id, None)
+            self._held.pop(session_id, None)
+        branch = self._branches.pop(session_id, None)
+        if branch is None:
+            return
+        probe_id = self._inactive.pop(session_id, None)
+        if probe_id is not None:
+            branch[0].remove_probe(probe_id)
+
+        tee_pad, queue = branch
+        # unlink once no buffer is flowing through the tee pad
+        tee_pad.add_probe(Gst.PadProbeType.IDLE, self._remove_branch, queue)
+
+    def _remove_branch(self, tee_pad: Gst.Pad, _: Gst.PadProbeInfo, queue: Gst.Element) -> Gst.PadProbeReturn:
+        assert self._pipeline is not None and self._tee is not None
+
+        queue_sink = queue.get_static_pad("sink")
+        assert queue_sink is not None
+        tee_pad.unlink(queue_sink)
+        self._tee.release_request_pad(tee_pad)
+
+        queue.set_state(Gst.State.NULL)
+        self._pipeline.remove(queue)
+        return Gst.PadProbeReturn.REMOVE
+
+    def _timestamp(self) -> Optional[int]:
+        # returns the pts of the frame, None if it must be dropped
+        assert self._pipeline is not None
+        clock = self._pipeline.get_clock()
+        if clock is None:
+            return None
+
+        running_time = clock.get_time() - self._pipeline.get_base_time()
+        with self._lock:
+            return self._pacer.pace(running_time)
+
+    def _acquire_buffer(self) -> Optional[Gst.Buffer]:
+        assert self._pool is not None
+        params = Gst.BufferPoolAcquireParams()
+        params.flags = Gst.BufferPoolAcquireFlags.DONTWAIT
+        ret, buffer = self._pool.acquire_buffer(params)
+        if ret != Gst.FlowReturn.OK:
+            with self._lock:
+                self.stats.dropped += 1
+            return None
+        return buffer
+
+    def _fill(self, buffer: Gst.Buffer, frame: npt.NDArray[np.uint8]) -> None:
+        ok, mapinfo = buffer.map(Gst.MapFlags.WRITE)
+        if not ok:
+            raise RuntimeError("Failed to map the video buffer.")
+        try:
+            rows = np.frombuffer(mapinfo.data, dtype=np.uint8, count=self.frame_size).reshape(self.height, self.stride)
+            # single copy, from the frame to the pooled buffer
+            rows[:, : self.row_size] = frame.reshape(self.height, self.row_size)
+        finally:
+            buffer.unmap(mapinfo)
+
+    def push_frame(self, frame: Union[npt.NDArray[np.uint8], bytes]) -> bool:
+        """Pushes a frame to every session.
+
+        Args:
+            frame (Union[np.ndarray, bytes]): (height, width, channels) uint8 array, or raw bytes
+                already laid out as expected by the caps (including the row padding).
+        Returns:
+            bool: True if the frame was pushed, False if it was dropped.
+        """
+        if self._appsrc is None:
+            raise RuntimeError("Source not attached to a pipeline.")
+
+        if self._branches and len(self._inactive) == len(self._branches):
+            with self._lock:
+                self.stats.unsubscribed += 1
+            return False
+
+        # a frame that is invalid, or finds no pooled buffer, does not take a time slot
+        if isinstance(frame, bytes):
+            if len(frame) != self.frame_size:
+                raise ValueError(f"Invalid frame size {len(frame)}, expected {self.frame_size}.")
+            pts = self._timestamp()
+            if pts is None:
+                return False
+            buffer = Gst.Buffer.new_wrapped(frame)
+        else:
+            if frame.nbytes != self.row_size * self.height:
+                raise ValueError(f"Invalid frame shape {frame.shape} for {self.width}x{self.height} {self.format}.")
+            pooled = self._acquire_buffer()
+            if pooled is None:
+                return False
+            pts = self._timestamp()
+            if pts is None:
+                # the pooled buffer goes back to the pool
+                return False
+            buffer = pooled
+            self._fill(buffer, frame)
+
+        buffer.pts = pts
+        buffer.duration = self.frame_duration
+        self._appsrc.emit("push-buffer", buffer)
+        with self._lock:
+            self.stats.pushed += 1
+        return True
+
+    def get_stats(self) -> MediaSourceStats:
+        """Gets a snapshot of the frame counters (pushed, dropped, late, unsubscribed)."""
+        with self._lock:
+            return replace(self.stats)
+
+    def detach(self) -> None:
+        """Stops the source and releases the buffer pool."""
+        if self._appsrc is not None:
+            self._appsrc.emit("end-of-stream")
+        if self._pool is not None:
+            self._pool.set_active(False)
@@ -0,0 +1,84 @@
+import logging
+import threading
+from typing import Any, Optional
+
+import gi
+
+gi.require_version("Gst", "1.0")
+
+from gi.repository import Gst  # noqa : E402
+
+from .pipeline_profile import TraceAggregator, tracers_configured  # noqa : E402
+
+TRACER_CATEGORY = "GST_TRACER"
+
+_LEVELS = {
+    Gst.DebugLevel.ERROR: logging.ERROR,
+    Gst.DebugLevel.WARNING: logging.WARNING,
+    Gst.DebugLevel.FIXME: logging.INFO,
+    Gst.DebugLevel.INFO: logging.INFO,
+}
+
+
+class GstTraceCollector:
+    """Collects the tracer records of the process from the GStreamer debug log.
+
+    The default log handler would print every record on stderr: it is replaced by a handler feeding
+    the records to the aggregator, and forwarding the other GStreamer debug messages to the logging module.
+    There is a single collector per process (see get_collector), shared by the roles.
+    """
+
+    def __init__(self) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.gst_logger = logging.getLogger("gstreamer")
+        self.aggregator = TraceAggregator()
+        self._started = False
+
+    def start(self) -> None:
+        if self._started:
+            return
+        if not tracers_configured():
+            self.logger.warning("The latency tracer is not loaded, call configure_tracers before creating the roles")
+
+        self._started = True
+        Gst.debug_remove_log_function(None)
+        Gst.debug_add_log_function(self._on_log, None)
+        Gst.debug_set_threshold_for_name(TRACER_CATEGORY, Gst.DebugLevel.TRACE)
+
+    def _on_log(
+        self,
+        category: Gst.DebugCategory,
+        level: Gst.DebugLevel,
+        file: str,
+        function: str,
+        line: int,
+        object: Optional[Any],
+        message: Gst.DebugMessage,
+        *_: Any,
+    ) -> None:
+        text = message.get()
+        if text is None:
+            return
+        if category.get_name() == TRACER_CATEGORY:
+            self.aggregator.add(text)
+        else:
+            self.gst_logger.log(_LEVELS.get(level, logging.DEBUG), f"{category.get_name()} {function}: {text}")
+
+
+def element_id(element: Gst.Element) -> int:
+    """Gets the ID of an element in the tracer records: its address, which is the hash of the Python wrapper."""
+    return hash(element)
+
+
+_collector: Optional[GstTraceCollector] = None
+_collector_lock = threading.Lock()
+
+
+def get_collector() -> GstTraceCollector:
+    """Gets the trace collector of the process, started on first use."""
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = GstTraceCollector()
+            _collector.start()
+        return _collector
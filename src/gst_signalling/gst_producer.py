@@ -1,9 +1,20 @@
+import asyncio
+import json
 import logging
-from typing import Dict
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
-from gi.repository import Gst, GstSdp, GstWebRTC
+from gi.repository import Gst, GstWebRTC
 
-from .gst_abstract_role import GstSession, GstSignallingAbstractRole
+from .gst_abstract_role import GstSession, GstSignallingAbstractRole, element_ids
+from .gst_broadcast import DropPolicy, GstBroadcaster
+from .gst_datachannel import DataChannelProfile
+from .gst_latency import LatencyProfile, get_profile
+from .gst_media_source import GstVideoSource
+from .gst_simulcast import LAYER_CHANNEL_LABEL, GstLayeredVideoSource
+from .keyframes import JoinStats, KeyframeLimiter
+from .simulcast import LayerPolicy, LayerStats
+from .subscription import MEDIA_KINDS, add_media_labels, parse_media_lines
 
 
 class GstSignallingProducer(GstSignallingAbstractRole):
@@ -11,6 +22,21 @@ class GstSignallingProducer(GstSignallingAbstractRole):
         super().__init__(host, port)
         self.name = name
         self.logger = logging.getLogger(__name__)
+        self.broadcasters: Dict[str, GstBroadcaster] = {}
+        self._broadcast_options: Dict[str, Optional[Gst.Structure]] = {}
+        self.media_sources: List[GstVideoSource] = []
+        # sessions that need a new offer once the current offer / answer exchange is complete
+        self._pending_negotiations: Set[str] = set()
+        self._pending_ice_restarts: Set[str] = set()
+        # automatic layer selection of the layered sources, from the receiver reports
+        self.layer_policy: Optional[LayerPolicy] = None
+        self.layer_stats_interval = 2.0
+        self.auto_layer_sessions: Set[str] = set()
+        self._auto_layer_task: Optional[asyncio.Task[None]] = None
+        # key frame forced on the media sources when a session connects, rate limited by source
+        self.keyframe_on_join = True
+        self.keyframe_min_interval = 0.5
+        self.keyframe_limiters: Dict[int, KeyframeLimiter] = {}
 
     async def connect(self) -> None:
         await super().connect()
@@ -20,36 +46,323 @@ class GstSignallingProducer(GstSignallingAbstractRole):
         await self.connect()
         await self.consume()
 
-    def on_offer_created(self, promise: Gst.Promise, webrtc: Gst.Element, session_id: str) -> None:
-        self.logger.debug(f"on offer created {promise} {webrtc} {session_id}")
-        assert promise.wait() == Gst.PromiseResult.REPLIED
-        reply = promise.get_reply()
-        offer = reply.get_value("offer")  # type: ignore[union-attr]
+    def create_broadcast_channel(
+        self,
+        label: str,
+        policy: DropPolicy = DropPolicy.DROP_NEWEST,
+        max_buffered_amount: int = 256 * 1024,
+        max_pending: int = 8,
+        options: Optional[Gst.Structure] = None,
+        profile: Optional[DataChannelProfile] = None,
+    ) -> GstBroadcaster:
+        """Declares a data channel created on every session and published to with broadcast.
 
-        promise = Gst.Promise.new()
-        self.logger.info("Offer created, setting local description")
-        webrtc.emit("set-local-description", offer, promise)
-        promise.interrupt()
-        self.make_send_sdp(offer, "offer", session_id)
+        Must be called before the sessions are set up.
+
+        Args:
+            label (str): Label of the data channel.
+            policy (DropPolicy): Policy applied to slow consumers.
+            max_buffered_amount (int): Buffered bytes above which a consumer is considered slow.
+            max_pending (int): Size of the pending queue of each consumer (DROP_OLDEST policy only).
+            options (Gst.Structure, optional): "application/data-channel" options passed to webrtcbin.
+            profile (DataChannelProfile, optional): Delivery guarantees of the channel, ignored if options are given.
+        Returns:
+            GstBroadcaster: The broadcaster of the channel.
+        """
+
+        def on_disconnect(session_id: str) -> None:
+            self.run_threadsafe(self.end_session(session_id), "broadcast_disconnect")
+
+        broadcaster = GstBroadcaster(label, policy, max_buffered_amount, max_pending, on_disconnect)
+        self.broadcasters[label] = broadcaster
+        if options is None and profile is not None:
+            options = profile.to_options()
+        self._broadcast_options[label] = options
+        return broadcaster
+
+    def add_media_source(self, source: GstVideoSource) -> None:
+        """Adds a media source, streamed to every session set up afterwards.
+
+        Args:
+            source (GstVideoSource): The source, fed with push_frame.
+        """
+        source.attach(self._pipeline)
+        if self.latency_profile is not None:
+            source.apply_latency_profile(self.latency_profile)
+        self.media_sources.append(source)
+        if isinstance(source, GstLayeredVideoSource):
+            self.internal_channels[LAYER_CHANNEL_LABEL] = self.on_layer_channel
+
+    @property
+    def layered_sources(self) -> List[GstLayeredVideoSource]:
+        return [source for source in self.media_sources if isinstance(source, GstLayeredVideoSource)]
+
+    def enable_auto_layers(self, policy: Optional[LayerPolicy] = None, interval: float = 2.0) -> None:
+        """Selects the layer of the next sessions from their receiver reports (packet loss, round trip time).
+
+        Sessions whose consumer requests a given layer leave the automatic selection, until it requests "auto".
+
+        Args:
+            policy (LayerPolicy, optional): Policy, built from the layers of the first layered source by default.
+            interval (float): Period of the receiver report checks (s).
+        """
+        if policy is None:
+            if not self.layered_sources:
+                raise RuntimeError("Automatic layers need a layered media source.")
+            policy = LayerPolicy(len(self.layered_sources[0].layers))
+        self.layer_policy = policy
+        self.layer_stats_interval = interval
+
+    def set_session_layer(self, session_id: str, layer: str, source: Optional[str] = None) -> bool:
+        """Switches the layer a session receives.
+
+        Args:
+            session_id (str): Session ID.
+            layer (str): Name of the layer.
+            source (str, optional): Label of the layered source, all of them if not given.
+        Returns:
+            bool: True if at least one source switched.
+        """
+        switched = False
+        for media_source in self.layered_sources:
+            if source is None or media_source.label == source:
+                switched = media_source.set_session_layer(session_id, layer) or switched
+        return switched
+
+    def on_layer_channel(self, session_id: str, channel: GstWebRTC.WebRTCDataChannel) -> None:
+        channel.connect("on-message-string", self.on_layer_request, session_id)
+
+    def on_layer_request(self, _: GstWebRTC.WebRTCDataChannel, message: str, session_id: str) -> None:
+        try:
+            request = json.loads(message)
+            layer, source = request["layer"], request.get("source")
+        except (ValueError, KeyError, TypeError):
+            self.logger.warning(f"Invalid layer request {message} from session {session_id}")
+            return
+        self.run_threadsafe(self.handle_layer_request(session_id, layer, source), "layer_request")
+
+    async def handle_layer_request(self, session_id: str, layer: str, source: Optional[str]) -> None:
+        if layer == "auto":
+            if self.layer_policy is not None:
+                self.auto_layer_sessions.add(session_id)
+            return
+
+        self.auto_layer_sessions.discard(session_id)
+        if not self.set_session_layer(session_id, layer, source):
+            self.logger.warning(f"Layer {layer} requested by session {session_id} not found")
+
+    async def _auto_layers(self) -> None:
+        while True:
+            await asyncio.sleep(self.layer_stats_interval)
+            for session_id in list(self.auto_layer_sessions):
+                session = self.sessions.get(session_id)
+                if session is not None:
+                    promise = Gst.Promise.new_with_change_func(self.on_session_stats, session_id)
+                    session.pc.emit("get-stats", None, promise)
+
+    def on_session_stats(self, promise: Gst.Promise, session_id: str) -> None:
+        if promise.wait() != Gst.PromiseResult.REPLIED:
+            return
+        stats = promise.get_reply()
+        if stats is None:
+            return
+        reports = _remote_inbound_reports(stats)
+        if reports:
+            fraction_lost = max(loss for loss, _ in reports)
+            rtts = [rtt for _, rtt in reports if rtt is not None]
+            self.run_threadsafe(
+                self.apply_layer_policy(session_id, fraction_lost, max(rtts) if rtts else None), "session_stats"
+            )
+
+    async def apply_layer_policy(self, session_id: str, fraction_lost: float, rtt: Optional[float]) -> None:
+        if self.layer_policy is None or session_id not in self.auto_layer_sessions:
+            return
+
+        for index, source in enumerate(self.layered_sources):
+            names = [layer.name for layer in source.layers]
+            current = source.get_session_layer(session_id)
+            if current is None:
+                continue
+            selected = self.layer_policy.update(f"{session_id}/{index}", names.index(current), fraction_lost, rtt)
+            if names[selected] != current:
+                self.logger.info(f"Session {session_id} switched from layer {current} to {names[selected]}")
+                source.set_session_layer(session_id, names[selected])
+
+    def get_layer_stats(self) -> Dict[str, Dict[str, LayerStats]]:
+        """Gets the session distribution and the encoder cost of the layers, by layered source (label or index)."""
+        return {source.label or str(index): source.get_layer_stats() for index, source in enumerate(self.layered_sources)}
+
+    def on_connection_state(self, webrtc: Gst.Element, _: Any, session_id: str) -> None:
+        # ICE and DTLS are both established, packets sent from now on reach the consumer
+        if webrtc.get_property("connection-state") == GstWebRTC.WebRTCPeerConnectionState.CONNECTED:
+            self.run_threadsafe(self.session_connected(session_id), "connection_state")
+
+    async def session_connected(self, session_id: str) -> None:
+        for index, source in enumerate(self.media_sources):
+            if not source.join_session(session_id) and self.keyframe_on_join:
+                self.request_keyframe(index, session_id)
+
+    def request_keyframe(self, index: int, session_id: Optional[str] = None) -> None:
+        """Forces a key frame on a media source, rate limited by keyframe_min_interval.
+
+        Args:
+            index (int): Index of the media source.
+            session_id (str, optional): Session needing the key frame.
+        """
+        source = self.media_sources[index]
+        limiter = self.keyframe_limiters.setdefault(index, KeyframeLimiter(self.keyframe_min_interval))
+        delay = limiter.request(time.monotonic())
+        if delay is None:
+            source.join_stats.keyframes_coalesced += 1
+        elif delay == 0:
+            source.force_keyframe(session_id)
+        else:
+            asyncio.get_running_loop().call_later(delay, self._force_scheduled_keyframe, source, limiter)
+
+    def _force_scheduled_keyframe(self, source: GstVideoSource, limiter: KeyframeLimiter) -> None:
+        limiter.fired(time.monotonic())
+        source.force_keyframe()
+
+    def get_join_stats(self) -> Dict[str, JoinStats]:
+        """Gets the join statistics (forced key frames, cache replays, time to the first key frame), by media source."""
+        return {source.label or str(index): source.get_join_stats() for index, source in enumerate(self.media_sources)}
+
+    def set_latency_profile(self, profile: Union[str, LatencyProfile]) -> None:
+        super().set_latency_profile(profile)
+        assert self.latency_profile is not None
+        for source in self.media_sources:
+            source.apply_latency_profile(self.latency_profile)
+
+    def set_session_latency_profile(self, session_id: str, profile: Union[str, LatencyProfile]) -> None:
+        super().set_session_latency_profile(session_id, profile)
+        for source in self.media_sources:
+            source.apply_latency_profile(get_profile(profile), session_id)
+
+    def broadcast(self, label: str, message: Union[str, bytes]) -> int:
+        """Publishes a message on the named data channel of every live session.
+
+        Args:
+            label (str): Label of a channel declared with create_broadcast_channel.
+            message (Union[str, bytes]): Message, sent as a string or binary message.
+        Returns:
+            int: Number of consumers the message was handed to (or queued for).
+        """
+        return self.broadcasters[label].publish(message)
+
+    def describe_sdp(self, text: str, type: str, session_id: str) -> str:
+        labels = [source.label for source in self.media_sources]
+        if type != "offer" or not any(labels):
+            return text
+        # media sources are linked in order, before the data channels are created
+        return add_media_labels(text, labels)
+
+    def update_media_activity(self, session_id: str, sdp: str) -> None:
+        """Suspends the media sources whose stream the consumer does not receive.
+
+        Args:
+            session_id (str): Session ID.
+            sdp (str): Offer or answer of the consumer.
+        """
+        media_lines = [line for line in parse_media_lines(sdp) if line.kind in MEDIA_KINDS]
+        for source, line in zip(self.media_sources, media_lines):
+            source.set_session_active(session_id, line.active)
 
     def on_negotiation_needed(self, element: Gst.Element, session_id: str) -> None:
         self.logger.debug(f"on negociation needed {element} {session_id}")
+        if element.get_property("signaling-state") != GstWebRTC.WebRTCSignalingState.STABLE:
+            self._pending_negotiations.add(session_id)
+            return
         promise = Gst.Promise.new_with_change_func(self.on_offer_created, element, session_id)
         element.emit("create-offer", None, promise)
 
+    def on_signaling_state(self, element: Gst.Element, _: Any, session_id: str) -> None:
+        if element.get_property("signaling-state") != GstWebRTC.WebRTCSignalingState.STABLE:
+            return
+        if session_id in self._pending_ice_restarts:
+            self._pending_ice_restarts.discard(session_id)
+            self._pending_negotiations.discard(session_id)
+            self.restart_ice(session_id)
+        elif session_id in self._pending_negotiations:
+            self._pending_negotiations.discard(session_id)
+            self.on_negotiation_needed(element, session_id)
+
+    def restart_ice(self, session_id: str) -> bool:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+
+        webrtc = session.pc
+        if webrtc.get_property("signaling-state") != GstWebRTC.WebRTCSignalingState.STABLE:
+            self.logger.warning(f"Session {session_id} is negotiating, ICE restart postponed")
+            self._pending_ice_restarts.add(session_id)
+            return True
+
+        self.logger.info(f"ICE restart of session {session_id}")
+        options = Gst.Structure.new_from_string("offer-options, ice-restart=(boolean)true")
+        promise = Gst.Promise.new_with_change_func(self.on_offer_created, webrtc, session_id)
+        webrtc.emit("create-offer", options, promise)
+        return True
+
     async def setup_session(self, session_id: str, peer_id: str) -> GstSession:
         session = await super().setup_session(session_id, peer_id)
         self.logger.info("setup session producer")
 
         # send offer
         pc = session.pc
-        pc.connect("on-negotiation-needed", self.on_negotiation_needed, session_id)
+        self.connect_session_signal(session_id, pc, "on-negotiation-needed", self.on_negotiation_needed)
+        self.connect_session_signal(session_id, pc, "notify::signaling-state", self.on_signaling_state)
+        self.connect_session_signal(session_id, pc, "notify::connection-state", self.on_connection_state)
+
+        for source in self.media_sources:
+            source.link_session(session_id, pc, self.latency_profile)
+
+        if self.probe_config is not None:
+            self.create_data_channel(session_id, self.probe_config.label)
+
+        if LAYER_CHANNEL_LABEL in self.internal_channels:
+            self.create_data_channel(session_id, LAYER_CHANNEL_LABEL)
+        if self.layer_policy is not None:
+            self.auto_layer_sessions.add(session_id)
+            if self._auto_layer_task is None:
+                self._auto_layer_task = asyncio.create_task(self._auto_layers())
+
+        for label, broadcaster in self.broadcasters.items():
+            channel = self.create_data_channel(session_id, label, self._broadcast_options[label])
+            broadcaster.add_channel(session_id, channel)
 
         pc.sync_state_with_parent()
         self.emit("new_session", session)
 
         return session
 
+    def count_session_elements(self, session_id: str) -> int:
+        # plus the queue of each media source
+        return super().count_session_elements(session_id) + len(self.media_sources)
+
+    def session_element_ids(self, session_id: str) -> Set[int]:
+        ids = super().session_element_ids(session_id)
+        return ids | element_ids(element for source in self.media_sources for element in source.session_elements(session_id))
+
+    async def close_session(self, session_id: str) -> None:
+        self.forget_session_profile(session_id)
+        for broadcaster in self.broadcasters.values():
+            broadcaster.remove_channel(session_id)
+        for source in self.media_sources:
+            source.unlink_session(session_id)
+        self._pending_negotiations.discard(session_id)
+        self._pending_ice_restarts.discard(session_id)
+        self.auto_layer_sessions.discard(session_id)
+        if self.layer_policy is not None:
+            for index in range(len(self.layered_sources)):
+                self.layer_policy.forget(f"{session_id}/{index}")
+        await super().close_session(session_id)
+
+    async def close(self) -> None:
+        if self._auto_layer_task is not None:
+            self._auto_layer_task.cancel()
+            self._auto_layer_task = None
+        await super().close()
+
     async def peer_for_session(self, session_id: str, message: Dict[str, Dict[str, str]]) -> None:
         self.logger.info(f"peer for session {session_id} {message}")
 
@@ -59,20 +372,34 @@ class GstSignallingProducer(GstSignallingAbstractRole):
         if "sdp" in message:
             if message["sdp"]["type"] == "answer":
                 self.logger.debug("set remote desc")
-                _, sdpmsg = GstSdp.SDPMessage.new_from_text(message["sdp"]["sdp"])
-
-                sdp_type = GstWebRTC.WebRTCSDPType.ANSWER
-                answer = GstWebRTC.WebRTCSessionDescription.new(sdp_type, sdpmsg)
-
-                promise = Gst.Promise.new()
-                webrtc.emit("set-remote-description", answer, promise)
-                promise.interrupt()
+                self.set_remote_answer(webrtc, message["sdp"]["sdp"], session_id)
+                self.update_media_activity(session_id, message["sdp"]["sdp"])
                 self.logger.debug("set remote desc done")
             elif message["sdp"]["type"] == "offer":
-                self.logger.warning("producer should not receive the offer")
+                # renegotiation started by the consumer, the offer of the producer wins on collision
+                if webrtc.get_property("signaling-state") != GstWebRTC.WebRTCSignalingState.STABLE:
+                    self.logger.warning(f"Offer of session {session_id} ignored, an offer is already pending")
+                else:
+                    self.set_remote_offer(webrtc, message["sdp"]["sdp"], session_id)
+                    self.update_media_activity(session_id, message["sdp"]["sdp"])
             else:
                 self.logger.error(f"SDP not properly formatted {message['sdp']}")
         elif "ice" in message:
-            self.handle_ice_message(webrtc, message["ice"])
+            self.handle_ice_message(webrtc, message["ice"], session_id)
         else:
             self.logger.error(f"message not processed {message}")
+
+
+def _remote_inbound_reports(stats: Gst.Structure) -> List[Tuple[float, Optional[float]]]:
+    # fraction of lost packets and round trip time of the receiver reports of the consumer
+    reports: List[Tuple[float, Optional[float]]] = []
+
+    def on_field(_: int, value: Any, __: Any) -> bool:
+        if isinstance(value, Gst.Structure) and value.get_name() == "remote-inbound-rtp":
+            has_loss, fraction_lost = value.get_double("fraction-lost")
+            has_rtt, rtt = value.get_double("round-trip-time")
+            reports.append((fraction_lost if has_loss else 0.0, rtt if has_rtt else None))
+        return True
+
+    stats.foreach(on_field, None)
+    return reports
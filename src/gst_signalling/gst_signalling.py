@@ -6,6 +6,8 @@ from typing import Any, Dict, List, Optional
 from pyee.asyncio import AsyncIOEventEmitter
 from websockets.legacy.client import WebSocketClientProtocol, connect
 
+from .signalling_capture import SignallingCapture
+
 
 class GstSignalling(AsyncIOEventEmitter):
     """Signalling peer for the GStreamer WebRTC implementation.
@@ -58,6 +60,21 @@ class GstSignalling(AsyncIOEventEmitter):
 
         self.peer_id: Optional[str] = None
         self.handler_task: Optional[asyncio.Task[None]] = None
+        self.capture: Optional[SignallingCapture] = None
+
+    def start_capture(self, path: str) -> None:
+        """Records every message received from and sent to the server, for a later replay (see signalling_replay).
+
+        Args:
+            path (str): Path of the capture file, gzip compressed if it ends with .gz.
+        """
+        self.stop_capture()
+        self.capture = SignallingCapture(path)
+
+    def stop_capture(self) -> None:
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
 
     async def connect(self) -> None:
         """Connects to the signalling server."""
@@ -81,6 +98,8 @@ class GstSignalling(AsyncIOEventEmitter):
             await self.handler_task
             self.handler_task = None
 
+        self.stop_capture()
+
         self.logger.info("Closing connection.")
         await self.ws.close()
         self.logger.info("Closed.")
@@ -102,6 +121,9 @@ class GstSignalling(AsyncIOEventEmitter):
             self.logger.info("Input message handler cancelled.")
 
     async def _handle_messages(self, message: Dict[str, Any]) -> None:
+        if self.capture is not None:
+            self.capture.record("in", message)
+
         # Welcoming message, sets the Peer ID linked to a new connection
         if message["type"] == "welcome":
             peer_id = message["peerId"]
@@ -225,6 +247,8 @@ class GstSignalling(AsyncIOEventEmitter):
     async def _send(self, message: Dict[str, Any]) -> None:
         if self.ws is None:
             raise RuntimeError("Not connected.")
+        if self.capture is not None:
+            self.capture.record("out", message)
 
         self.logger.debug(f"Sending message: {message}")
         await self.ws.send(json.dumps(message))
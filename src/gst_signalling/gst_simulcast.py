@@ -0,0 +1,332 @@
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import gi
+
+gi.require_version("Gst", "1.0")
+
+from gi.repository import Gst  # noqa : E402
+
+from .gst_latency import LatencyProfile, apply_to_encoder  # noqa : E402
+from .gst_media_source import GstVideoSource, force_key_unit, is_keyframe  # noqa : E402
+from .simulcast import DEFAULT_LADDER, LayerStats, VideoLayer  # noqa : E402
+
+LAYER_CHANNEL_LABEL = "gst-signalling-layers"
+DEFAULT_LAYER_ENCODER = "vp8enc deadline=1 keyframe-max-dist=60 target-bitrate={bitrate}"
+DEFAULT_PAYLOADER = "rtpvp8pay pt=96 ! application/x-rtp,media=video,payload=96"
+
+
+class _Layer:
+    def __init__(self, spec: VideoLayer, valve: Gst.Element, encoder: Gst.Element, tee: Gst.Element) -> None:
+        self.spec = spec
+        self.valve = valve
+        self.encoder = encoder
+        self.tee = tee
+        self.stats = LayerStats()
+        # time each frame entered the encoder, by pts
+        self.pending: Dict[int, float] = {}
+
+
+@dataclass
+class _LayeredBranch:
+    elements: List[Gst.Element]  # input-selector, payloader, queue
+    pads: Dict[str, Tuple[Gst.Pad, Gst.Pad]]  # layer tee pad and selector sink pad, by layer
+    layer: Optional[str] = None
+    remaining: int = 0
+
+
+class GstLayeredVideoSource(GstVideoSource):
+    """Feeds raw video frames from Python to every session of a producer, encoded in several layers.
+
+    appsrc ! videoconvert ! tee, then for each layer queue ! valve ! videoscale ! capsfilter ! encoder ! tee.
+    Each session has an input-selector over the layers, followed by its own payloader and queue, so that
+    switching layers keeps a continuous RTP stream. Layers that no session receives are not encoded.
+
+    source = GstLayeredVideoSource(1280, 720, layers=DEFAULT_LADDER)
+    producer.add_media_source(source)
+    ...
+    source.set_session_layer(session_id, "low")
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        framerate: int = 30,
+        format: str = "RGB",
+        layers: Sequence[VideoLayer] = DEFAULT_LADDER,
+        default_layer: Optional[str] = None,
+        encoder: str = DEFAULT_LAYER_ENCODER,
+        payloader: str = DEFAULT_PAYLOADER,
+        pool_size: int = 4,
+        label: Optional[str] = None,
+    ) -> None:
+        """Initializes the source.
+
+        Args:
+            width (int): Frame width.
+            height (int): Frame height.
+            framerate (int): Target framerate, frames pushed faster are dropped.
+            format (str): Raw video format of the frames (RGB, BGR, RGBA, BGRA, RGBx, BGRx or GRAY8).
+            layers (Sequence[VideoLayer]): Layers, from the highest to the lowest quality.
+            default_layer (str, optional): Layer of the new sessions, the highest by default.
+            encoder (str): Description of the encoding elements, formatted with the bitrate of each layer (bit/s).
+            payloader (str): Description of the payloading elements of each session, producing RTP.
+            pool_size (int): Number of frames that can be in flight in the pipeline.
+            label (str, optional): Label of the stream, declared in the offers.
+        """
+        super().__init__(width, height, framerate, format, encoder, pool_size, label)
+
+        if not layers:
+            raise ValueError("At least one layer is required.")
+        self.layers = list(layers)
+        self.default_layer = default_layer or self.layers[0].name
+        self.payloader_description = payloader
+
+        self._layers: Dict[str, _Layer] = {}
+        self._layered: Dict[str, _LayeredBranch] = {}
+        self._release_lock = threading.Lock()
+
+    def attach(self, pipeline: Gst.Pipeline) -> None:
+        appsrc = self._make_appsrc()
+        convert = Gst.ElementFactory.make("videoconvert")
+        raw_tee = Gst.ElementFactory.make("tee")
+        assert convert is not None and raw_tee is not None
+        raw_tee.set_property("allow-not-linked", True)
+
+        elements = [appsrc, convert, raw_tee]
+        for element in elements:
+            pipeline.add(element)
+        appsrc.link(convert)
+        convert.link(raw_tee)
+
+        for spec in self.layers:
+            self._layers[spec.name] = self._add_layer(pipeline, raw_tee, spec)
+        for element in elements:
+            element.sync_state_with_parent()
+
+        self._start_pool()
+
+        self._pipeline = pipeline
+        self._appsrc = appsrc
+
+    def _add_layer(self, pipeline: Gst.Pipeline, raw_tee: Gst.Element, spec: VideoLayer) -> _Layer:
+        queue = Gst.ElementFactory.make("queue")
+        valve = Gst.ElementFactory.make("valve")
+        scale = Gst.ElementFactory.make("videoscale")
+        capsfilter = Gst.ElementFactory.make("capsfilter")
+        tee = Gst.ElementFactory.make("tee")
+        assert queue and valve and scale and capsfilter and tee
+
+        # a slow encoder drops frames of its own layer only
+        queue.set_property("max-size-buffers", 1)
+        Gst.util_set_object_arg(queue, "leaky", "downstream")
+        valve.set_property("drop", True)
+        capsfilter.set_property("caps", Gst.Caps.from_string(f"video/x-raw,width={spec.width},height={spec.height}"))
+        tee.set_property("allow-not-linked", True)
+        encoder = Gst.parse_bin_from_description(self.encoder_description.format(bitrate=spec.bitrate * 1000), True)
+
+        elements = [queue, valve, scale, capsfilter, encoder, tee]
+        for element in elements:
+            pipeline.add(element)
+        for upstream, downstream in zip(elements, elements[1:]):
+            upstream.link(downstream)
+        raw_tee_pad = raw_tee.request_pad_simple("src_%u")
+        queue_sink = queue.get_static_pad("sink")
+        assert raw_tee_pad and queue_sink
+        raw_tee_pad.link(queue_sink)
+        for element in elements:
+            element.sync_state_with_parent()
+
+        layer = _Layer(spec, valve, encoder, tee)
+        encoder_sink = encoder.get_static_pad("sink")
+        encoder_src = encoder.get_static_pad("src")
+        assert encoder_sink and encoder_src
+        encoder_sink.add_probe(Gst.PadProbeType.BUFFER, self._on_encoder_input, layer)
+        encoder_src.add_probe(Gst.PadProbeType.BUFFER, self._on_encoder_output, layer)
+        return layer
+
+    def _on_encoder_input(self, _: Gst.Pad, info: Gst.PadProbeInfo, layer: _Layer) -> Gst.PadProbeReturn:
+        buffer = info.get_buffer()
+        if buffer is not None:
+            if len(layer.pending) > 64:
+                layer.pending.clear()
+            layer.pending[buffer.pts] = time.monotonic()
+        return Gst.PadProbeReturn.OK
+
+    def _on_encoder_output(self, _: Gst.Pad, info: Gst.PadProbeInfo, layer: _Layer) -> Gst.PadProbeReturn:
+        buffer = info.get_buffer()
+        if buffer is not None:
+            layer.stats.frames += 1
+            layer.stats.bytes += buffer.get_size()
+            entered = layer.pending.pop(buffer.pts, None)
+            if entered is not None:
+                layer.stats.encode_time += time.monotonic() - entered
+            if is_keyframe(buffer):
+                with self._lock:
+                    self._keyframe_sent([sid for sid in self._joining if self.get_session_layer(sid) == layer.spec.name])
+        return Gst.PadProbeReturn.OK
+
+    def link_session(
+        self,
+        session_id: str,
+        webrtc: Gst.Element,
+        profile: Optional[LatencyProfile] = None,
+        layer: Optional[str] = None,
+    ) -> None:
+        """Sends the encoded layers to the webrtcbin of a session, starting with one of them.
+
+        Args:
+            session_id (str): Session ID.
+            webrtc (Gst.Element): webrtcbin of the session.
+            profile (LatencyProfile, optional): Latency profile applied to the session queue.
+            layer (str, optional): Initial layer, the default layer of the source if not given.
+        """
+        assert self._pipeline is not None
+
+        selector = Gst.ElementFactory.make("input-selector")
+        queue = Gst.ElementFactory.make("queue")
+        assert selector is not None and queue is not None
+        payloader = Gst.parse_bin_from_description(self.payloader_description, True)
+
+        elements = [selector, payloader, queue]
+        for element in elements:
+            self._pipeline.add(element)
+        selector.link(payloader)
+        payloader.link(queue)
+
+        webrtc_pad = webrtc.request_pad_simple("sink_%u")
+        queue_src = queue.get_static_pad("src")
+        selector_src = selector.get_static_pad("src")
+        assert webrtc_pad and queue_src and selector_src
+        queue_src.link(webrtc_pad)
+
+        pads = {}
+        for name, encoded in self._layers.items():
+            tee_pad = encoded.tee.request_pad_simple("src_%u")
+            selector_sink = selector.request_pad_simple("sink_%u")
+            assert tee_pad and selector_sink
+            tee_pad.link(selector_sink)
+            pads[name] = (tee_pad, selector_sink)
+
+        for element in elements:
+            element.sync_state_with_parent()
+
+        self._branches[session_id] = (selector_src, queue)
+        self._layered[session_id] = _LayeredBranch(elements, pads)
+        if profile is not None:
+            self.apply_latency_profile(profile, session_id)
+        self.set_session_layer(session_id, layer or self.default_layer)
+
+    def set_session_layer(self, session_id: str, layer: str) -> bool:
+        """Switches a session to another layer, starting with a key frame.
+
+        Args:
+            session_id (str): Session ID.
+            layer (str): Name of the layer.
+        Returns:
+            bool: False if the session or the layer does not exist.
+        """
+        branch = self._layered.get(session_id)
+        if branch is None or layer not in self._layers:
+            return False
+        if branch.layer == layer:
+            return True
+
+        branch.elements[0].set_property("active-pad", branch.pads[layer][1])
+        if branch.layer is not None:
+            self._layers[branch.layer].stats.sessions -= 1
+        branch.layer = layer
+        self._layers[layer].stats.sessions += 1
+        self._layers[layer].stats.switches += 1
+
+        self._update_valves()
+        self.request_keyframe(layer)
+        return True
+
+    def get_session_layer(self, session_id: str) -> Optional[str]:
+        branch = self._layered.get(session_id)
+        return branch.layer if branch is not None else None
+
+    def request_keyframe(self, layer: str) -> None:
+        """Asks the encoder of a layer for a key frame."""
+        encoder_src = self._layers[layer].encoder.get_static_pad("src")
+        assert encoder_src is not None
+        force_key_unit(encoder_src)
+
+    def join_session(self, session_id: str) -> bool:
+        # the packets are payloaded per session, there is no group of pictures to replay
+        if session_id not in self._layered:
+            return False
+        with self._lock:
+            self.join_stats.joins += 1
+            self._joining[session_id] = time.monotonic()
+        return False
+
+    def force_keyframe(self, session_id: Optional[str] = None) -> None:
+        """Asks for a key frame on the layer of a session, or on every layer received by a session."""
+        if session_id is not None:
+            layers = {self.get_session_layer(session_id)}
+        else:
+            layers = {branch.layer for branch in self._layered.values()}
+        for layer in layers:
+            if layer is not None:
+                self.request_keyframe(layer)
+                self.join_stats.keyframes_forced += 1
+
+    def _update_valves(self) -> None:
+        # layers that no session receives are not encoded
+        for encoded in self._layers.values():
+            encoded.valve.set_property("drop", encoded.stats.sessions == 0)
+
+    def get_layer_stats(self) -> Dict[str, LayerStats]:
+        """Gets the distribution of the sessions and the encoder cost of each layer."""
+        return {name: replace(encoded.stats) for name, encoded in self._layers.items()}
+
+    def apply_latency_profile(self, profile: LatencyProfile, session_id: Optional[str] = None) -> None:
+        if session_id is None:
+            for encoded in self._layers.values():
+                apply_to_encoder(encoded.encoder, profile)
+        else:
+            super().apply_latency_profile(profile, session_id)
+
+    def unlink_session(self, session_id: str) -> None:
+        with self._lock:
+            self._joining.pop(session_id, None)
+        branch = self._layered.pop(session_id, None)
+        if branch is None:
+            return
+
+        selector_src, _ = self._branches.pop(session_id)
+        probe_id = self._inactive.pop(session_id, None)
+        if probe_id is not None:
+            selector_src.remove_probe(probe_id)
+        if branch.layer is not None:
+            self._layers[branch.layer].stats.sessions -= 1
+        self._update_valves()
+
+        branch.remaining = len(branch.pads)
+        for tee_pad, selector_sink in branch.pads.values():
+            # unlink once no buffer is flowing through the tee pad
+            tee_pad.add_probe(Gst.PadProbeType.IDLE, self._release_layer_pad, branch, selector_sink)
+
+    def _release_layer_pad(
+        self, tee_pad: Gst.Pad, _: Gst.PadProbeInfo, branch: _LayeredBranch, selector_sink: Gst.Pad
+    ) -> Gst.PadProbeReturn:
+        assert self._pipeline is not None
+
+        tee = tee_pad.get_parent_element()
+        tee_pad.unlink(selector_sink)
+        if tee is not None:
+            tee.release_request_pad(tee_pad)
+
+        with self._release_lock:
+            branch.remaining -= 1
+            last = branch.remaining == 0
+        if last:
+            for element in branch.elements:
+                element.set_state(Gst.State.NULL)
+                self._pipeline.remove(element)
+        return Gst.PadProbeReturn.REMOVE
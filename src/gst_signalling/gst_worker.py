@@ -0,0 +1,54 @@
+import asyncio
+import time
+from multiprocessing.connection import Connection
+from typing import Optional
+
+from .gst_producer import GstSignallingProducer
+from .gst_signalling import GstSignalling
+from .gst_worker_pool import WorkerSetup, WorkerSignalling
+
+
+class GstSignallingWorkerProducer(GstSignallingProducer):
+    """Producer of a worker process, hosting the sessions assigned by a GstSignallingProducerPool."""
+
+    def __init__(self, conn: Connection, name: str) -> None:
+        self._conn = conn
+        super().__init__(host="", port=0, name=name)
+
+    def create_signalling(self, host: str, port: int) -> GstSignalling:
+        return WorkerSignalling(self._conn)
+
+
+async def _heartbeat(producer: GstSignallingWorkerProducer, signalling: WorkerSignalling, interval: float) -> None:
+    while True:
+        expected = time.monotonic() + interval
+        await asyncio.sleep(interval)
+        loop_lag = max(0.0, time.monotonic() - expected)
+        await signalling.send_worker_stats(len(producer.sessions), loop_lag)
+
+
+async def serve_worker(conn: Connection, name: str, setup: Optional[WorkerSetup], heartbeat_interval: float) -> None:
+    """Runs the producer of a worker process until the front process closes the pipe.
+
+    Args:
+        conn (Connection): Worker end of the pipe to the front process.
+        name (str): Name of the producer.
+        setup (Callable, optional): Function called with the producer before it connects.
+        heartbeat_interval (float): Period of the health reports (s).
+    """
+    producer = GstSignallingWorkerProducer(conn, name)
+    signalling = producer.signalling
+    assert isinstance(signalling, WorkerSignalling)
+
+    if setup is not None:
+        setup(producer)
+
+    await producer.connect()
+    heartbeat = asyncio.create_task(_heartbeat(producer, signalling, heartbeat_interval))
+
+    await signalling.closed.wait()
+
+    heartbeat.cancel()
+    for session_id in list(producer.sessions):
+        await producer.close_session(session_id)
+    await producer.close()
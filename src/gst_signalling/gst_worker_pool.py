@@ -0,0 +1,314 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass, replace
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .gst_base_role import GstSignallingBaseRole
+from .gst_signalling import GstSignalling
+
+# called in each worker process with its producer, to declare channels, media sources and handlers
+WorkerSetup = Callable[[Any], None]
+
+
+class WorkerSignalling(GstSignalling):
+    """Signalling peer of a worker process.
+
+    Instead of a websocket connection to the server, the signalling messages are exchanged with the
+    front process over a pipe, in the format of the signalling protocol.
+    """
+
+    def __init__(self, conn: Connection) -> None:
+        """Initializes the signalling peer.
+
+        Args:
+            conn (Connection): Worker end of the pipe to the front process.
+        """
+        super().__init__(host="", port=0)
+        self.conn = conn
+        self.closed = asyncio.Event()
+        self._messages: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+
+    async def connect(self) -> None:
+        """Starts receiving the messages of the front process."""
+        asyncio.get_running_loop().add_reader(self.conn.fileno(), self._on_readable)
+        self.handler_task = asyncio.create_task(self._handler())
+
+    def _on_readable(self) -> None:
+        try:
+            while self.conn.poll():
+                self._messages.put_nowait(self.conn.recv())
+        except (EOFError, OSError):
+            self.logger.info("Front process closed the pipe.")
+            asyncio.get_running_loop().remove_reader(self.conn.fileno())
+            self.closed.set()
+
+    async def _handler(self) -> None:
+        try:
+            while True:
+                message = await self._messages.get()
+                await self._handle_messages(message)
+        except asyncio.CancelledError:
+            self.logger.info("Input message handler cancelled.")
+
+    async def close(self) -> None:
+        """Stops receiving the messages of the front process and closes the pipe."""
+        if self.handler_task is not None:
+            self.handler_task.cancel()
+            await self.handler_task
+            self.handler_task = None
+        if not self.closed.is_set():
+            asyncio.get_running_loop().remove_reader(self.conn.fileno())
+        self.conn.close()
+        self.stop_capture()
+
+    async def send_worker_stats(self, sessions: int, loop_lag: float) -> None:
+        """Reports the load and health of the worker to the front process."""
+        await self._send({"type": "workerStats", "sessions": sessions, "loopLag": loop_lag})
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        if self.capture is not None:
+            self.capture.record("out", message)
+        self.logger.debug(f"Sending message: {message}")
+        self.conn.send(message)
+
+
+@dataclass
+class WorkerStats:
+    """Load and health of a worker process.
+
+    - sessions: sessions currently assigned to the worker
+    - sessions_total: sessions assigned since the worker started
+    - messages_in: signalling messages forwarded to the worker
+    - messages_out: signalling messages sent by the worker
+    - loop_lag: event loop lag of the worker at its last heartbeat (s)
+    - last_heartbeat: time.monotonic() of the last heartbeat, None if none was received
+    """
+
+    index: int
+    pid: Optional[int] = None
+    alive: bool = False
+    sessions: int = 0
+    sessions_total: int = 0
+    messages_in: int = 0
+    messages_out: int = 0
+    loop_lag: float = 0.0
+    last_heartbeat: Optional[float] = None
+
+
+class _Worker:
+    def __init__(self, index: int, process: BaseProcess, conn: Connection) -> None:
+        self.process = process
+        self.conn = conn
+        self.session_ids: Set[str] = set()
+        self.stats = WorkerStats(index)
+
+    def send(self, message: Dict[str, Any]) -> None:
+        self.conn.send(message)
+        self.stats.messages_in += 1
+
+
+def _run_worker(conn: Connection, name: str, setup: Optional[WorkerSetup], heartbeat_interval: float) -> None:
+    # imported here, so that the front process does not load GStreamer
+    from .gst_worker import serve_worker
+
+    asyncio.run(serve_worker(conn, name, setup, heartbeat_interval))
+
+
+class GstSignallingProducerPool(GstSignallingBaseRole):
+    """Producer whose sessions are spread across worker processes.
+
+    The front process owns the connection to the signalling server and assigns each new session to the
+    least loaded worker. Workers host the webrtcbins of their sessions in a GstSignallingProducer,
+    configured by the setup function, and the SDP and ICE messages are forwarded over local pipes.
+
+    def setup(producer: GstSignallingProducer) -> None:
+        producer.create_broadcast_channel("state")
+        ...
+
+    pool = GstSignallingProducerPool(host, port, name="robot", workers=4, setup=setup)
+    await pool.serve4ever()
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        name: str,
+        workers: Optional[int] = None,
+        setup: Optional[WorkerSetup] = None,
+        heartbeat_interval: float = 1.0,
+    ) -> None:
+        """Initializes the pool.
+
+        Args:
+            host (str): Hostname of the signalling server.
+            port (int): Port of the signalling server.
+            name (str): Name of the producer.
+            workers (int, optional): Number of worker processes, the number of cores by default.
+            setup (Callable, optional): Picklable function called with the producer of each worker.
+            heartbeat_interval (float): Period of the worker health reports (s).
+        """
+        super().__init__(host, port)
+        self.logger = logging.getLogger(__name__)
+
+        self.name = name
+        self.setup = setup
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_count = workers or os.cpu_count() or 1
+
+        self.workers: List[_Worker] = []
+        self.assignments: Dict[str, _Worker] = {}
+        self._outgoing: asyncio.Queue[Callable[[], Awaitable[None]]] = asyncio.Queue()
+        self._sender_task: Optional[asyncio.Task[None]] = None
+
+        @self.signalling.on("StartSession")  # type: ignore[arg-type]
+        def on_start_session(peer_id: str, session_id: str) -> None:
+            self.assign_session(session_id, {"type": "startSession", "peerId": peer_id, "sessionId": session_id})
+
+        @self.signalling.on("Peer")  # type: ignore[arg-type]
+        def on_peer(session_id: str, message: Dict[str, Any]) -> None:
+            worker = self.assignments.get(session_id)
+            if worker is None:
+                self.logger.warning(f"Peer message for unknown session {session_id}")
+                return
+            worker.send({"type": "peer", "sessionId": session_id, **message})
+
+        @self.signalling.on("EndSession")  # type: ignore[arg-type]
+        def on_end_session(session_id: str) -> None:
+            worker = self.unassign_session(session_id)
+            if worker is not None and worker.stats.alive:
+                worker.send({"type": "endSession", "sessionId": session_id})
+
+    def start_workers(self) -> None:
+        context = multiprocessing.get_context("spawn")
+        loop = asyncio.get_running_loop()
+
+        for index in range(self.worker_count):
+            conn, worker_conn = context.Pipe()
+            process = context.Process(
+                target=_run_worker,
+                args=(worker_conn, self.name, self.setup, self.heartbeat_interval),
+                name=f"{self.name}-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            worker_conn.close()
+
+            worker = _Worker(index, process, conn)
+            worker.stats.pid = process.pid
+            worker.stats.alive = True
+            loop.add_reader(conn.fileno(), self._on_worker_readable, worker)
+            self.workers.append(worker)
+
+    async def connect(self) -> None:
+        self.start_workers()
+        self._sender_task = asyncio.create_task(self._sender())
+
+        await super().connect()
+        for worker in self.workers:
+            worker.send({"type": "welcome", "peerId": self.peer_id})
+        await self.signalling.set_peer_status(roles=["producer"], name=self.name)
+
+    async def serve4ever(self) -> None:
+        await self.connect()
+        await self.consume()
+
+    def select_worker(self) -> Optional[_Worker]:
+        """Selects the alive worker with the fewest sessions."""
+        alive = [worker for worker in self.workers if worker.stats.alive]
+        if not alive:
+            return None
+        return min(alive, key=lambda worker: worker.stats.sessions)
+
+    def assign_session(self, session_id: str, message: Dict[str, Any]) -> None:
+        worker = self.select_worker()
+        if worker is None:
+            self.logger.error(f"No worker alive for session {session_id}, ending it")
+            self._outgoing.put_nowait(functools.partial(self.signalling.end_session, session_id))
+            return
+
+        self.logger.info(f"Session {session_id} assigned to worker {worker.stats.index}")
+        self.assignments[session_id] = worker
+        worker.session_ids.add(session_id)
+        worker.stats.sessions += 1
+        worker.stats.sessions_total += 1
+        worker.send(message)
+
+    def unassign_session(self, session_id: str) -> Optional[_Worker]:
+        worker = self.assignments.pop(session_id, None)
+        if worker is not None:
+            worker.session_ids.discard(session_id)
+            worker.stats.sessions -= 1
+        return worker
+
+    def _on_worker_readable(self, worker: _Worker) -> None:
+        try:
+            while worker.conn.poll():
+                self._on_worker_message(worker, worker.conn.recv())
+        except (EOFError, OSError):
+            self._on_worker_died(worker)
+
+    def _on_worker_message(self, worker: _Worker, message: Dict[str, Any]) -> None:
+        worker.stats.messages_out += 1
+
+        if message["type"] == "peer":
+            session_id = message["sessionId"]
+            kind = "sdp" if "sdp" in message else "ice"
+            send = functools.partial(self.signalling.send_peer_message, session_id, kind, message[kind])
+            self._outgoing.put_nowait(send)
+
+        elif message["type"] == "endSession":
+            session_id = message["sessionId"]
+            if self.unassign_session(session_id) is not None:
+                self._outgoing.put_nowait(functools.partial(self.signalling.end_session, session_id))
+
+        elif message["type"] == "workerStats":
+            worker.stats.loop_lag = message["loopLag"]
+            worker.stats.last_heartbeat = time.monotonic()
+
+        # the front process owns the peer status, the other requests of the workers are ignored
+
+    def _on_worker_died(self, worker: _Worker) -> None:
+        asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+        worker.stats.alive = False
+        self.logger.error(f"Worker {worker.stats.index} died, ending its {len(worker.session_ids)} sessions")
+
+        for session_id in list(worker.session_ids):
+            self.unassign_session(session_id)
+            self._outgoing.put_nowait(functools.partial(self.signalling.end_session, session_id))
+
+    async def _sender(self) -> None:
+        # messages to the server are sent one at a time, in order
+        while True:
+            send = await self._outgoing.get()
+            try:
+                await send()
+            except Exception:
+                self.logger.exception("Failed to send a worker message to the signalling server")
+
+    def get_worker_stats(self) -> List[WorkerStats]:
+        """Gets the load and health of each worker."""
+        return [replace(worker.stats) for worker in self.workers]
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            if worker.stats.alive:
+                loop.remove_reader(worker.conn.fileno())
+            # workers stop when their pipe is closed
+            worker.conn.close()
+        for worker in self.workers:
+            await loop.run_in_executor(None, worker.process.join, 5.0)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+        if self._sender_task is not None:
+            self._sender_task.cancel()
+            self._sender_task = None
+        await super().close()
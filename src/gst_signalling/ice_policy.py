@@ -0,0 +1,263 @@
+import fnmatch
+import ipaddress
+import re
+import socket
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+IpAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+_SIOCGIFADDR = 0x8915
+_ICE_UFRAG = re.compile(r"^a=ice-ufrag:(\S+)", re.MULTILINE)
+
+
+class IceCandidate(NamedTuple):
+    """Fields of an ICE candidate attribute (RFC 8445), as trickled in the signalling messages."""
+
+    foundation: str
+    component: int
+    protocol: str  # udp or tcp
+    priority: int
+    address: str  # IP address, or mDNS name
+    port: int
+    type: str  # host, srflx, prflx or relay
+    related_address: Optional[str] = None
+
+    @property
+    def ip(self) -> Optional[IpAddress]:
+        """IP address of the candidate, None for an mDNS name."""
+        try:
+            return ipaddress.ip_address(self.address)
+        except ValueError:
+            return None
+
+
+def parse_candidate(line: str) -> Optional[IceCandidate]:
+    """Parses an ICE candidate, with or without its "a=" / "candidate:" prefix.
+
+    Args:
+        line (str): The candidate, eg. "candidate:1 1 UDP 2015363327 192.168.1.2 47353 typ host".
+    Returns:
+        Optional[IceCandidate]: The candidate, None if it is not valid.
+    """
+    line = line.strip()
+    if line.startswith("a="):
+        line = line[2:]
+    if line.startswith("candidate:"):
+        line = line[len("candidate:") :]
+
+    fields = line.split()
+    if len(fields) < 8 or fields[6] != "typ":
+        return None
+    try:
+        component, priority, port = int(fields[1]), int(fields[3]), int(fields[5])
+    except ValueError:
+        return None
+
+    extensions = dict(zip(fields[8::2], fields[9::2]))
+    return IceCandidate(fields[0], component, fields[2].lower(), priority, fields[4], port, fields[7], extensions.get("raddr"))
+
+
+def ice_ufrag(sdp: str) -> Optional[str]:
+    """Gets the ICE username fragment of a session description, None if it has none."""
+    match = _ICE_UFRAG.search(sdp)
+    return match.group(1) if match else None
+
+
+def interface_addresses() -> Dict[str, List[IpAddress]]:
+    """Gets the IP addresses of the local network interfaces, by interface name (Linux only).
+
+    Returns:
+        Dict[str, List[IpAddress]]: The addresses, empty if they cannot be read.
+    """
+    addresses: Dict[str, List[IpAddress]] = {}
+    try:
+        import fcntl
+
+        names = [name for _, name in socket.if_nameindex()]
+    except (ImportError, OSError):
+        return addresses
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for name in names:
+            try:
+                request = struct.pack("256s", name.encode()[:15])
+                reply = fcntl.ioctl(sock.fileno(), _SIOCGIFADDR, request)
+            except OSError:
+                continue
+            addresses.setdefault(name, []).append(ipaddress.ip_address(reply[20:24]))
+
+    try:
+        with open("/proc/net/if_inet6") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 6:
+                    addresses.setdefault(fields[5], []).append(ipaddress.ip_address(bytes.fromhex(fields[0])))
+    except OSError:
+        pass
+
+    return addresses
+
+
+class IcePolicy(NamedTuple):
+    """Filters the ICE candidates exchanged with the remote peers.
+
+    Interface filters apply to the local candidates only, the other filters to the local and remote candidates.
+    Interface names accept shell wildcards (eg. "docker*"), subnets are CIDR blocks (eg. "172.17.0.0/16").
+    A None allow list allows everything, a candidate must match an allow list and none of the deny lists.
+    """
+
+    allow_interfaces: Optional[Sequence[str]] = None
+    deny_interfaces: Sequence[str] = ()
+    allow_subnets: Optional[Sequence[str]] = None
+    deny_subnets: Sequence[str] = ()
+    candidate_types: Optional[Sequence[str]] = None  # host, srflx, prflx, relay
+    protocols: Optional[Sequence[str]] = None  # udp, tcp
+    max_candidates: Optional[int] = None  # by session and direction
+
+
+# usual virtual interfaces of a robot: containers and VPN tunnels
+VIRTUAL_INTERFACES = ("docker*", "br-*", "veth*", "virbr*", "tun*", "tap*", "wg*", "zt*", "tailscale*")
+
+
+@dataclass
+class IcePolicyStats:
+    """Candidates accepted and filtered, by direction ("local" or "remote").
+
+    The filtered candidates are counted by reason: interface, subnet, type, protocol, cap or invalid.
+    """
+
+    accepted: Dict[str, int] = field(default_factory=lambda: {"local": 0, "remote": 0})
+    filtered: Dict[str, Dict[str, int]] = field(default_factory=lambda: {"local": {}, "remote": {}})
+
+
+class IceCandidateFilter:
+    """Applies an IcePolicy to the candidates of the sessions of a role."""
+
+    def __init__(self, policy: IcePolicy, interfaces: Optional[Dict[str, List[IpAddress]]] = None) -> None:
+        """Initializes the filter.
+
+        Args:
+            policy (IcePolicy): The policy.
+            interfaces (Dict[str, List[IpAddress]], optional): Addresses of the local interfaces, read from the
+                system if not given.
+        """
+        self.policy = policy
+        self.allow_subnets = None if policy.allow_subnets is None else [ipaddress.ip_network(s) for s in policy.allow_subnets]
+        self.deny_subnets = [ipaddress.ip_network(s) for s in policy.deny_subnets]
+
+        if interfaces is None and (policy.allow_interfaces is not None or policy.deny_interfaces):
+            interfaces = interface_addresses()
+        self.interfaces = {address: name for name, addresses in (interfaces or {}).items() for address in addresses}
+
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._credentials: Dict[str, Dict[str, str]] = {}
+        self._stats = IcePolicyStats()
+        self._lock = threading.Lock()
+
+    def accept(self, session_id: str, direction: str, line: str) -> bool:
+        """Checks a candidate of a session against the policy, and counts it.
+
+        Args:
+            session_id (str): Session ID.
+            direction (str): "local" for a gathered candidate, "remote" for a candidate of the remote peer.
+            line (str): The candidate, the empty end-of-candidates marker is always accepted.
+        Returns:
+            bool: True if the candidate must be sent / added.
+        """
+        if not line.strip():
+            return True
+
+        candidate = parse_candidate(line)
+        reason = "invalid" if candidate is None else self.check(candidate, direction)
+
+        with self._lock:
+            counts = self._counts.setdefault(session_id, {"local": 0, "remote": 0})
+            if reason is None and self.policy.max_candidates is not None and counts[direction] >= self.policy.max_candidates:
+                reason = "cap"
+            if reason is None:
+                counts[direction] += 1
+                self._stats.accepted[direction] += 1
+                return True
+
+            filtered = self._stats.filtered[direction]
+            filtered[reason] = filtered.get(reason, 0) + 1
+            return False
+
+    def check(self, candidate: IceCandidate, direction: str) -> Optional[str]:
+        """Gets the reason why a candidate is filtered, None if it is accepted (the cap is not checked)."""
+        policy = self.policy
+        if policy.candidate_types is not None and candidate.type not in policy.candidate_types:
+            return "type"
+        if policy.protocols is not None and candidate.protocol not in policy.protocols:
+            return "protocol"
+
+        ip = candidate.ip
+        if self.allow_subnets is not None and (ip is None or not any(ip in subnet for subnet in self.allow_subnets)):
+            return "subnet"
+        if ip is not None and any(ip in subnet for subnet in self.deny_subnets):
+            return "subnet"
+
+        if direction == "local" and not self._interface_allowed(candidate):
+            return "interface"
+        return None
+
+    def _interface_allowed(self, candidate: IceCandidate) -> bool:
+        policy = self.policy
+        if policy.allow_interfaces is None and not policy.deny_interfaces:
+            return True
+
+        # reflexive and relayed candidates are gathered from the interface of their related (base) address
+        address = candidate.address if candidate.type == "host" else candidate.related_address
+        try:
+            interface = self.interfaces.get(ipaddress.ip_address(address or ""))
+        except ValueError:
+            interface = None
+        if interface is None:
+            # unknown interface (eg. mDNS name), only kept if no allow list is given
+            return policy.allow_interfaces is None
+
+        if any(fnmatch.fnmatch(interface, pattern) for pattern in policy.deny_interfaces):
+            return False
+        return policy.allow_interfaces is None or any(fnmatch.fnmatch(interface, p) for p in policy.allow_interfaces)
+
+    def update_credentials(self, session_id: str, direction: str, sdp: str) -> bool:
+        """Tracks the ICE credentials of a session, and resets its candidate count when they change.
+
+        An ICE restart changes the credentials and gathers new candidates, the cap applies to each generation.
+
+        Args:
+            session_id (str): Session ID.
+            direction (str): "local" for the local description, "remote" for the description of the remote peer.
+            sdp (str): The session description, set before its candidates are gathered or received.
+        Returns:
+            bool: True if the credentials changed (ICE restart).
+        """
+        ufrag = ice_ufrag(sdp)
+        if ufrag is None:
+            return False
+
+        with self._lock:
+            credentials = self._credentials.setdefault(session_id, {})
+            previous = credentials.get(direction)
+            credentials[direction] = ufrag
+            if previous is None or previous == ufrag:
+                return False
+            counts = self._counts.get(session_id)
+            if counts is not None:
+                counts[direction] = 0
+            return True
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._counts.pop(session_id, None)
+            self._credentials.pop(session_id, None)
+
+    def get_stats(self) -> IcePolicyStats:
+        """Gets a snapshot of the accepted and filtered candidate counts."""
+        with self._lock:
+            return IcePolicyStats(
+                dict(self._stats.accepted), {direction: dict(c) for direction, c in self._stats.filtered.items()}
+            )
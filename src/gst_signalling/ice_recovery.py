@@ -0,0 +1,80 @@
+import time
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
+
+
+class IceRestartConfig(NamedTuple):
+    """Configuration of the recovery of the sessions whose ICE connection is lost.
+
+    A disconnected connection often recovers on its own, an ICE restart is only triggered if it is
+    still down after the grace period (failed connections are restarted immediately). Sessions that
+    are not recovered within the timeout after the restart are ended.
+    """
+
+    enabled: bool = True
+    grace_period: float = 0.5  # seconds
+    timeout: float = 5.0  # seconds
+
+
+@dataclass
+class RecoveryStats:
+    """ICE recovery counters of a session. Times are in seconds.
+
+    - losses: times the connection went disconnected or failed
+    - restarts: ICE restarts triggered
+    - recoveries: times the connection came back
+    - failures: recoveries that timed out (the session was ended)
+    """
+
+    losses: int = 0
+    restarts: int = 0
+    recoveries: int = 0
+    failures: int = 0
+    last_recovery_time: Optional[float] = None
+    max_recovery_time: float = 0.0
+
+
+class IceRecoveryTracker:
+    """Tracks the ICE connection losses of a session and the time it takes to recover from them."""
+
+    def __init__(self) -> None:
+        self.stats = RecoveryStats()
+        self.lost_since: Optional[float] = None
+
+    @property
+    def is_lost(self) -> bool:
+        return self.lost_since is not None
+
+    def lost(self, now: Optional[float] = None) -> bool:
+        """Records a loss of the connection.
+
+        Returns:
+            bool: True if the connection was up until now, False if it was already lost.
+        """
+        if self.lost_since is not None:
+            return False
+        self.lost_since = time.monotonic() if now is None else now
+        self.stats.losses += 1
+        return True
+
+    def restarted(self) -> None:
+        self.stats.restarts += 1
+
+    def recovered(self, now: Optional[float] = None) -> Optional[float]:
+        """Records that the connection is up again.
+
+        Returns:
+            Optional[float]: The time it took to recover, None if the connection was not lost.
+        """
+        if self.lost_since is None:
+            return None
+        recovery_time = (time.monotonic() if now is None else now) - self.lost_since
+        self.lost_since = None
+        self.stats.recoveries += 1
+        self.stats.last_recovery_time = recovery_time
+        self.stats.max_recovery_time = max(self.stats.max_recovery_time, recovery_time)
+        return recovery_time
+
+    def failed(self) -> None:
+        self.lost_since = None
+        self.stats.failures += 1
@@ -0,0 +1,119 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Generic, List, Optional, TypeVar
+
+from .watchdog import DelayStats
+
+Packet = TypeVar("Packet")
+
+
+@dataclass
+class JoinStats:
+    """How fast the sessions joining a running media source get a decodable frame.
+
+    - joins: sessions that connected
+    - keyframes_forced: key frames requested to the encoder
+    - keyframes_coalesced: requests merged into another one by the rate limit
+    - gop_replays: sessions started with the cached group of pictures instead of waiting for a key frame
+    - time_to_keyframe: delay between a session connecting and the first key frame sent to it (s)
+    """
+
+    joins: int = 0
+    keyframes_forced: int = 0
+    keyframes_coalesced: int = 0
+    gop_replays: int = 0
+    time_to_keyframe: DelayStats = field(default_factory=DelayStats)
+
+
+class KeyframeLimiter:
+    """Rate limits the key frames forced on an encoder.
+
+    A request is served right away if the last forced key frame is older than min_interval. Otherwise a
+    single key frame is scheduled at the end of the interval, and the requests in between are merged into it,
+    so that a burst of joins costs at most two key frames.
+    """
+
+    def __init__(self, min_interval: float = 0.5) -> None:
+        """Initializes the limiter.
+
+        Args:
+            min_interval (float): Minimum time between two forced key frames (s).
+        """
+        self.min_interval = min_interval
+        self._last: Optional[float] = None
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    def request(self, now: float) -> Optional[float]:
+        """Requests a key frame.
+
+        Args:
+            now (float): Current time (s).
+        Returns:
+            Optional[float]: 0 to force it now, the delay after which to force it, or None if it is merged
+                into a key frame already scheduled.
+        """
+        with self._lock:
+            if self._scheduled:
+                return None
+            if self._last is None or now - self._last >= self.min_interval:
+                self._last = now
+                return 0.0
+            self._scheduled = True
+            return self._last + self.min_interval - now
+
+    def fired(self, now: float) -> None:
+        """Notifies that the scheduled key frame was forced."""
+        with self._lock:
+            self._scheduled = False
+            self._last = now
+
+
+class GopCache(Generic[Packet]):
+    """Packets of the current group of pictures, from its key frame.
+
+    The packets added after a key frame start a new group. A group larger than max_bytes is not cached,
+    until the next key frame. Not thread safe, the callers hold their own lock.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initializes the cache.
+
+        Args:
+            max_bytes (int): Maximum size of the cached packets (bytes).
+        """
+        self.max_bytes = max_bytes
+        self._packets: Optional[List[Packet]] = None
+        self._bytes = 0
+        self._keyframe = False
+
+    def keyframe(self) -> None:
+        """Notifies that the next packets are the ones of a key frame."""
+        self._keyframe = True
+
+    def add(self, packet: Packet, size: int) -> None:
+        """Adds a packet of the current group of pictures.
+
+        Args:
+            packet (Packet): The packet.
+            size (int): Size of the packet (bytes).
+        """
+        if self._keyframe:
+            self._keyframe = False
+            self._packets = []
+            self._bytes = 0
+        if self._packets is None:
+            return
+        self._packets.append(packet)
+        self._bytes += size
+        if self._bytes > self.max_bytes:
+            self._packets = None
+
+    @property
+    def size(self) -> int:
+        """Size of the cached packets (bytes), 0 if the current group is not cached."""
+        return self._bytes if self._packets is not None else 0
+
+    def get(self) -> Optional[List[Packet]]:
+        """Gets the cached packets, starting with the key frame, None if the current group is not cached."""
+        return list(self._packets) if self._packets else None
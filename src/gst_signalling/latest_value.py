@@ -0,0 +1,127 @@
+import collections
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+class LatestValueEncoder:
+    """Tags each value with its key, a per key sequence number and the send time.
+
+    Messages are JSON strings: {"k": key, "e": epoch, "s": sequence, "t": send time, "v": value}.
+    The epoch identifies the sender so that a receiver resets its sequence numbers when the sender restarts.
+    """
+
+    def __init__(self) -> None:
+        self.epoch = uuid.uuid4().hex[:8]
+        self._sequences: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def encode(self, key: str, value: Any) -> str:
+        """Encodes the new value of a key.
+
+        Args:
+            key (str): Key of the value (eg. the name of the command).
+            value (Any): JSON serialisable value.
+        Returns:
+            str: The message to send.
+        """
+        with self._lock:
+            sequence = self._sequences.get(key, -1) + 1
+            self._sequences[key] = sequence
+
+        return json.dumps({"k": key, "e": self.epoch, "s": sequence, "t": time.time(), "v": value})
+
+
+@dataclass
+class KeyStats:
+    """Delivery statistics of a key. Latencies are in seconds."""
+
+    delivered: int = 0
+    stale: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: collections.deque(maxlen=1000))
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Gets a percentile of the recent delivery latencies.
+
+        Args:
+            q (float): Percentile, between 0 and 100.
+        Returns:
+            Optional[float]: The latency, None if nothing was delivered yet.
+        """
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class LatestValueDecoder:
+    """Drops stale messages and keeps the newest value of each key.
+
+    The delivery latency is computed from the sender timestamp, so it is only meaningful if both clocks
+    are synchronised or if the clock offset of the remote peer is set (remote time - local time),
+    for instance from the estimate of GstSignallingAbstractRole.get_clock_sync.
+    """
+
+    def __init__(self, on_value: Optional[Callable[[str, Any], None]] = None) -> None:
+        """Initializes the decoder.
+
+        Args:
+            on_value (Callable[[str, Any], None], optional): Called with the key and value of each fresh message.
+        """
+        self.on_value = on_value
+        self.clock_offset = 0.0
+
+        self._values: Dict[str, Any] = {}
+        self._last: Dict[str, Tuple[str, int]] = {}
+        self._stats: Dict[str, KeyStats] = {}
+        self._lock = threading.Lock()
+
+    def decode(self, message: str) -> bool:
+        """Decodes a message.
+
+        Args:
+            message (str): Message produced by a LatestValueEncoder.
+        Returns:
+            bool: True if the message was fresh and delivered, False if it was stale and dropped.
+        """
+        data = json.loads(message)
+        key = data["k"]
+
+        with self._lock:
+            stats = self._stats.setdefault(key, KeyStats())
+            last = self._last.get(key)
+            if last is not None and last[0] == data["e"] and last[1] >= data["s"]:
+                stats.stale += 1
+                return False
+
+            self._last[key] = (data["e"], data["s"])
+            self._values[key] = data["v"]
+            stats.delivered += 1
+            stats.latencies.append(time.time() + self.clock_offset - data["t"])
+
+        if self.on_value is not None:
+            self.on_value(key, data["v"])
+        return True
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Gets the newest value of a key.
+
+        Args:
+            key (str): Key of the value.
+            default (Any): Returned if no value was received for this key.
+        """
+        with self._lock:
+            return self._values.get(key, default)
+
+    def get_stats(self) -> Dict[str, KeyStats]:
+        """Gets the delivery statistics of each key.
+
+        Returns:
+            Dict[str, KeyStats]: Statistics indexed by key.
+        """
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,204 @@
+"""Aggregation of the GStreamer latency and rusage tracer records.
+
+The tracers are loaded by GStreamer when it is initialised, from the GST_TRACERS environment variable
+(see configure_tracers), and log one record per measure in the GST_TRACER debug category, eg.
+
+    element-latency, element-id=(string)0x5581, element=(string)vp8enc0, src=(string)src, time=(guint64)4211000, ts=...;
+
+The records are aggregated by element ID (the address of the element), as several elements of a pipeline may
+have the same name (eg. the rtpbin of each webrtcbin), and attributed to the sessions when the profile is read.
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Mapping, Optional, Tuple, TypeVar
+
+from .watchdog import DelayStats
+
+# per element processing time, source to sink latency, latency reported by the elements, and CPU usage
+DEFAULT_TRACERS = "latency(flags=pipeline+element+reported);rusage"
+
+_FIELD = re.compile(r'([\w-]+)=\((\w+)\)("(?:[^"\\]|\\.)*"|[^,;]*)')
+
+_T = TypeVar("_T")
+
+
+def configure_tracers(tracers: str = DEFAULT_TRACERS) -> None:
+    """Loads the tracers in GStreamer, must be called before the first role is created (before Gst.init).
+
+    Args:
+        tracers (str): Tracers and their parameters, added to the ones already set in GST_TRACERS.
+    """
+    current = os.environ.get("GST_TRACERS")
+    os.environ["GST_TRACERS"] = f"{current};{tracers}" if current else tracers
+
+
+def tracers_configured() -> bool:
+    """Checks that the latency tracer is set in GST_TRACERS."""
+    return "latency" in os.environ.get("GST_TRACERS", "")
+
+
+def parse_record(text: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """Parses a tracer record.
+
+    Args:
+        text (str): The record, as logged by the tracer (a serialised GstStructure).
+    Returns:
+        Optional[Tuple[str, Dict[str, str]]]: The record name and its fields as strings, None if it is not valid.
+    """
+    name, _, rest = text.strip().partition(",")
+    name = name.strip()
+    if not name or not re.fullmatch(r"[\w-]+", name):
+        return None
+
+    fields = {}
+    for key, _, value in _FIELD.findall(rest):
+        if value.startswith('"'):
+            value = value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+        fields[key] = value.strip()
+    return name, fields
+
+
+@dataclass
+class ElementProfile:
+    """Latency of an element (in seconds).
+
+    - latency: time buffers spend in the element, from its sink pad to its source pad
+    - reported_min / reported_max: latency the element reports in the latency queries
+    """
+
+    latency: DelayStats = field(default_factory=DelayStats)
+    reported_min: Optional[float] = None
+    reported_max: Optional[float] = None
+
+
+@dataclass
+class PipelineProfile:
+    """Where the time goes in the pipeline of a role.
+
+    - elements: elements shared by the sessions (eg. the encoders of the media sources), by element name
+    - sessions: elements of each session (its webrtcbin, jitterbuffers, queues...), by session and element name
+    - paths: latency from each source element to each sink element ("src -> sink")
+
+    Elements with the same name are told apart by their ID, eg. "queue0 (0x5581)".
+    - cpu_load: CPU load of the process, in % of a core (current, average)
+    - threads: CPU load of each streaming thread, in % of a core (current, average)
+    """
+
+    elements: Dict[str, ElementProfile] = field(default_factory=dict)
+    sessions: Dict[str, Dict[str, ElementProfile]] = field(default_factory=dict)
+    paths: Dict[str, DelayStats] = field(default_factory=dict)
+    cpu_load: Optional[Tuple[float, float]] = None
+    threads: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+
+def _copy_element(profile: ElementProfile) -> ElementProfile:
+    latency = DelayStats(profile.latency.count, profile.latency.last, profile.latency.max, profile.latency.total)
+    return ElementProfile(latency, profile.reported_min, profile.reported_max)
+
+
+def _load(fields: Dict[str, str]) -> Tuple[float, float]:
+    # rusage loads are in per mille of a core
+    return int(fields.get("current-cpuload", 0)) / 10.0, int(fields.get("average-cpuload", 0)) / 10.0
+
+
+def _element_id(value: str) -> int:
+    # pointer of the element, formatted with %p
+    return int(value, 16)
+
+
+def _insert(items: Dict[str, _T], name: str, element_id: int, item: _T) -> None:
+    items[f"{name} ({element_id:#x})" if name in items else name] = item
+
+
+class TraceAggregator:
+    """Aggregates the tracer records by element ID, records are added from the streaming threads."""
+
+    def __init__(self) -> None:
+        self._elements: Dict[int, ElementProfile] = {}
+        self._names: Dict[int, str] = {}
+        self._paths: Dict[Tuple[int, int], DelayStats] = {}
+        self._cpu_load: Optional[Tuple[float, float]] = None
+        self._threads: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self.records = 0
+        self.invalid = 0
+
+    def add(self, text: str) -> None:
+        """Adds a tracer record, records of unknown tracers are ignored."""
+        record = parse_record(text)
+        if record is None:
+            self.invalid += 1
+            return
+
+        name, fields = record
+        try:
+            with self._lock:
+                self._add(name, fields)
+                self.records += 1
+        except (KeyError, ValueError):
+            self.invalid += 1
+
+    def _add(self, name: str, fields: Dict[str, str]) -> None:
+        # lock must be held
+        if name == "element-latency":
+            self._element(fields["element-id"], fields["element"]).latency.add(int(fields["time"]) / 1e9)
+        elif name == "element-reported-latency":
+            element = self._element(fields["element-id"], fields["element"])
+            element.reported_min = int(fields["min"]) / 1e9
+            element.reported_max = int(fields["max"]) / 1e9
+        elif name == "latency":
+            src = _element_id(fields["src-element-id"])
+            sink = _element_id(fields["sink-element-id"])
+            self._names[src] = fields["src-element"]
+            self._names[sink] = fields["sink-element"]
+            self._paths.setdefault((src, sink), DelayStats()).add(int(fields["time"]) / 1e9)
+        elif name == "proc-rusage":
+            self._cpu_load = _load(fields)
+        elif name == "thread-rusage":
+            self._threads[fields["thread-id"]] = _load(fields)
+
+    def _element(self, element_id: str, name: str) -> ElementProfile:
+        key = _element_id(element_id)
+        self._names[key] = name
+        return self._elements.setdefault(key, ElementProfile())
+
+    def forget(self, elements: Iterable[int]) -> None:
+        """Drops the statistics of elements, eg. the ones of a closed session, whose IDs may be reused."""
+        with self._lock:
+            for element_id in elements:
+                self._elements.pop(element_id, None)
+                self._names.pop(element_id, None)
+                for path in [p for p in self._paths if element_id in p]:
+                    del self._paths[path]
+
+    def get_profile(self, sessions: Mapping[int, str], pipeline: Optional[Iterable[int]] = None) -> PipelineProfile:
+        """Gets a snapshot of the statistics, with the elements attributed to the sessions.
+
+        Args:
+            sessions (Mapping[int, str]): Session ID of the elements that belong to a session, by element ID.
+            pipeline (Iterable[int], optional): IDs of the elements of the pipeline, to leave out the elements
+                of other pipelines of the process. All the elements are kept if not given.
+        Returns:
+            PipelineProfile: The profile.
+        """
+        ids = None if pipeline is None else set(pipeline) | set(sessions)
+        profile = PipelineProfile()
+        with self._lock:
+            for element_id, element in self._elements.items():
+                if ids is not None and element_id not in ids:
+                    continue
+                session_id = sessions.get(element_id)
+                elements = profile.elements if session_id is None else profile.sessions.setdefault(session_id, {})
+                _insert(elements, self._names[element_id], element_id, _copy_element(element))
+
+            for (src, sink), stats in self._paths.items():
+                if ids is None or (src in ids and sink in ids):
+                    path = f"{self._names[src]} -> {self._names[sink]}"
+                    _insert(profile.paths, path, sink, DelayStats(stats.count, stats.last, stats.max, stats.total))
+
+            profile.cpu_load = self._cpu_load
+            profile.threads = dict(self._threads)
+        return profile
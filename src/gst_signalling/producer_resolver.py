@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from .gst_signalling import GstSignalling
+from .watchdog import DelayStats
+
+# called with the peer ID and the metadata (eg. name) of a producer
+ProducerMatcher = Callable[[str, Dict[str, str]], bool]
+
+
+class ReestablishConfig(NamedTuple):
+    """Retries of a consumer re-establishing its session with the producer.
+
+    An attempt fails if the producer cannot be looked up, or if the session is not set up within the setup
+    timeout (eg. the producer left again). Failed attempts are retried with an exponential backoff.
+    """
+
+    retry_delay: float = 1.0  # seconds, doubled after each failure
+    max_retry_delay: float = 30.0  # seconds
+    setup_timeout: float = 10.0  # seconds
+
+
+@dataclass
+class ReestablishStats:
+    """Sessions of a consumer re-established with a producer that came back (eg. with a new peer ID).
+
+    - outages: sessions lost while the producer was expected
+    - reestablished: sessions connected again
+    - outage: time from the loss of a session to the connection of the new one (s)
+    - ongoing: duration of the current outage (s), None if connected
+    - producer_peer_ids: peer IDs of the producer, in order
+    - failed: attempts to re-establish a session that failed, and were retried
+    """
+
+    outages: int = 0
+    reestablished: int = 0
+    outage: DelayStats = field(default_factory=DelayStats)
+    ongoing: Optional[float] = None
+    producer_peer_ids: List[str] = field(default_factory=list)
+    failed: int = 0
+
+
+def match_name(name: str) -> ProducerMatcher:
+    """Matches the producers with the given name."""
+    return lambda _, meta: meta.get("name") == name
+
+
+async def resolve_producer(
+    signalling: GstSignalling,
+    matcher: ProducerMatcher,
+    listener_name: str = "consumer",
+    timeout: Optional[float] = None,
+) -> str:
+    """Finds the peer ID of a producer on an existing signalling connection, waiting for it to appear if needed.
+
+    The producer list is requested first. If no producer matches, the peer registers as a listener to be
+    notified of the new producers, and stops listening once one matches.
+
+    Args:
+        signalling (GstSignalling): Connected signalling peer, with its peer ID received.
+        matcher (ProducerMatcher): Selects the producer from its peer ID and metadata.
+        listener_name (str): Name of the peer while it listens for new producers.
+        timeout (float, optional): Time to wait for the producer (s), forever if not given.
+    Returns:
+        str: Peer ID of the producer (the first one listed if several match).
+    Raises:
+        asyncio.TimeoutError: No producer matched before the timeout.
+    """
+    logger = logging.getLogger(__name__)
+    loop = asyncio.get_running_loop()
+    found: asyncio.Future[str] = loop.create_future()
+    listed = asyncio.Event()
+
+    def on_list(producers: Dict[str, Dict[str, str]]) -> None:
+        for peer_id, meta in producers.items():
+            if not found.done() and matcher(peer_id, meta):
+                found.set_result(peer_id)
+        listed.set()
+
+    def on_peer_status_changed(peer_id: str, roles: List[str], meta: Dict[str, str]) -> None:
+        if "producer" in roles and not found.done() and matcher(peer_id, meta):
+            found.set_result(peer_id)
+
+    listening = False
+
+    async def wait_for_producer() -> str:
+        nonlocal listening
+
+        await signalling.send_list()
+        await listed.wait()
+        if not found.done():
+            logger.info("Producer not listed yet, waiting for it to appear")
+            listening = True
+            await signalling.set_peer_status(roles=["listener"], name=listener_name)
+            # a producer that appeared before the listener status was set is in this new list
+            await signalling.send_list()
+        return await found
+
+    signalling.on("List", on_list)
+    signalling.on("PeerStatusChanged", on_peer_status_changed)
+    try:
+        return await asyncio.wait_for(wait_for_producer(), timeout)
+    finally:
+        signalling.remove_listener("List", on_list)
+        signalling.remove_listener("PeerStatusChanged", on_peer_status_changed)
+        if listening:
+            await signalling.set_peer_status(roles=[], name=listener_name)
@@ -0,0 +1,378 @@
+import asyncio
+import bisect
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+
+# upper bounds of the latency histogram buckets (s): 100us to about 100s, doubling
+LATENCY_BUCKETS = [0.0001 * 2**i for i in range(21)]
+
+Handler = Callable[[Any], Awaitable[Any]]
+StreamHandler = Callable[[Any], AsyncIterator[Any]]
+
+
+class RpcError(Exception):
+    """Error of a remote procedure call.
+
+    Codes: "not_found" (unknown method), "error" (the handler raised), "timeout" (deadline exceeded),
+    "cancelled", "overloaded" (too many calls queued on the server) and "closed".
+    """
+
+    def __init__(self, code: str, message: str = "") -> None:
+        super().__init__(f"{code}: {message}" if message else code)
+        self.code = code
+        self.message = message
+
+
+@dataclass
+class LatencyHistogram:
+    """Histogram of call latencies (in seconds), on the LATENCY_BUCKETS bounds."""
+
+    counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Gets the upper bound of the bucket holding a percentile of the latencies.
+
+        Args:
+            q (float): Percentile, between 0 and 100.
+        Returns:
+            Optional[float]: The latency, None if no call was measured yet.
+        """
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(LATENCY_BUCKETS[index], self.max) if index < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+
+@dataclass
+class RpcStats:
+    """Calls of an endpoint.
+
+    - calls, errors, timeouts, cancelled: calls made by this endpoint, and how they failed
+    - in_flight: calls made by this endpoint waiting for their reply
+    - served, rejected: requests received from the remote endpoint, and those refused as overloaded
+    - handling: requests of the remote endpoint currently running or queued
+    - latencies: latency of the successful calls, by method
+    """
+
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    cancelled: int = 0
+    in_flight: int = 0
+    served: int = 0
+    rejected: int = 0
+    handling: int = 0
+    latencies: Dict[str, LatencyHistogram] = field(default_factory=dict)
+
+
+class _PendingCall:
+    def __init__(self, method: str, stream: bool) -> None:
+        self.method = method
+        self.start = time.monotonic()
+        self.future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        self.chunks: Optional["asyncio.Queue[Tuple[bool, Any]]"] = asyncio.Queue() if stream else None
+
+
+class RpcEndpoint:
+    """Pipelined request/response calls over a bidirectional message channel.
+
+    Each request carries a correlation id, so any number of calls can be in flight at once and replies may
+    arrive in any order. Both sides can call and serve. Messages are JSON strings:
+
+    - {"t": "req", "id": id, "m": method, "p": params, "d": remaining deadline (s) or null}
+    - {"t": "res", "id": id, "r": result} or {"t": "err", "id": id, "c": code, "e": message}
+    - {"t": "chunk", "id": id, "r": item} then {"t": "end", "id": id} for streaming replies
+    - {"t": "cancel", "id": id}
+
+    The endpoint lives on an event loop: feed must be called from the loop thread.
+
+    endpoint = RpcEndpoint(send)
+    endpoint.register("move", move_handler)
+    position = await endpoint.call("get_position", {"joint": "head"}, timeout=0.5)
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], None],
+        max_concurrency: int = 16,
+        max_queued: int = 256,
+        default_timeout: Optional[float] = None,
+    ) -> None:
+        """Initializes the endpoint.
+
+        Args:
+            send (Callable[[str], None]): Sends a message to the remote endpoint.
+            max_concurrency (int): Number of requests of the remote endpoint handled at once.
+            max_queued (int): Number of requests waiting for a handler slot before new ones are rejected.
+            default_timeout (float, optional): Deadline of the calls made without timeout (s), None for no deadline.
+        """
+        self.logger = logging.getLogger(__name__)
+
+        self._send = send
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self.default_timeout = default_timeout
+
+        self._handlers: Dict[str, Tuple[Union[Handler, StreamHandler], bool]] = {}
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._next_id = 0
+        self._pending: Dict[int, _PendingCall] = {}
+        self._serving: Dict[int, "asyncio.Task[None]"] = {}
+        self._closed = False
+
+        self._stats = RpcStats()
+
+    def register(self, method: str, handler: Union[Handler, StreamHandler], stream: bool = False) -> None:
+        """Registers the handler of a method called by the remote endpoint.
+
+        Args:
+            method (str): Name of the method.
+            handler (Callable): Coroutine function called with the params, or async generator function
+                yielding the items of a streaming reply.
+            stream (bool): Whether the handler is an async generator.
+        """
+        self._handlers[method] = (handler, stream)
+
+    async def call(self, method: str, params: Any = None, timeout: Optional[float] = None) -> Any:
+        """Calls a method of the remote endpoint.
+
+        Args:
+            method (str): Name of the method.
+            params (Any): JSON serialisable params.
+            timeout (float, optional): Deadline of the call (s), the default timeout if not given.
+        Returns:
+            Any: The result of the handler.
+        Raises:
+            RpcError: The call failed remotely, was refused or the endpoint was closed.
+            asyncio.TimeoutError: The deadline was exceeded.
+        """
+        call_id, pending = self._start_call(method, params, timeout, stream=False)
+        try:
+            result = await asyncio.wait_for(pending.future, self._timeout(timeout))
+        except asyncio.TimeoutError:
+            self._abort_call(call_id, timeout=True)
+            raise
+        except asyncio.CancelledError:
+            self._abort_call(call_id, timeout=False)
+            raise
+        except RpcError:
+            self._stats.errors += 1
+            raise
+        finally:
+            self._finish_call(call_id)
+
+        self._record_latency(pending)
+        return result
+
+    async def stream(self, method: str, params: Any = None, timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """Calls a method of the remote endpoint that replies with a stream of items.
+
+        Args:
+            method (str): Name of the method.
+            params (Any): JSON serialisable params.
+            timeout (float, optional): Deadline of the whole stream (s), the default timeout if not given.
+        Yields:
+            Any: The items, as they arrive.
+        """
+        call_id, pending = self._start_call(method, params, timeout, stream=True)
+        assert pending.chunks is not None
+        deadline = self._timeout(timeout)
+        end = None if deadline is None else time.monotonic() + deadline
+        completed = False
+        try:
+            while True:
+                remaining = None if end is None else max(0.0, end - time.monotonic())
+                done, item = await asyncio.wait_for(pending.chunks.get(), remaining)
+                if done:
+                    break
+                yield item
+            completed = True
+            if pending.future.done():
+                pending.future.result()
+        except asyncio.TimeoutError:
+            completed = True
+            self._abort_call(call_id, timeout=True)
+            raise
+        except RpcError:
+            self._stats.errors += 1
+            raise
+        finally:
+            if not completed:
+                # the caller stopped iterating or was cancelled
+                self._abort_call(call_id, timeout=False)
+            self._finish_call(call_id)
+
+        self._record_latency(pending)
+
+    def _timeout(self, timeout: Optional[float]) -> Optional[float]:
+        return timeout if timeout is not None else self.default_timeout
+
+    def _start_call(self, method: str, params: Any, timeout: Optional[float], stream: bool) -> Tuple[int, _PendingCall]:
+        if self._closed:
+            raise RpcError("closed", "the endpoint is closed")
+
+        self._next_id += 1
+        call_id = self._next_id
+        pending = _PendingCall(method, stream)
+        self._pending[call_id] = pending
+        self._stats.calls += 1
+        self._stats.in_flight += 1
+
+        self._send(json.dumps({"t": "req", "id": call_id, "m": method, "p": params, "d": self._timeout(timeout)}))
+        return call_id, pending
+
+    def _abort_call(self, call_id: int, timeout: bool) -> None:
+        if timeout:
+            self._stats.timeouts += 1
+        else:
+            self._stats.cancelled += 1
+        if call_id in self._pending and not self._closed:
+            self._send(json.dumps({"t": "cancel", "id": call_id}))
+
+    def _finish_call(self, call_id: int) -> None:
+        pending = self._pending.pop(call_id, None)
+        if pending is not None:
+            self._stats.in_flight -= 1
+            pending.future.cancel()
+
+    def _record_latency(self, pending: _PendingCall) -> None:
+        histogram = self._stats.latencies.setdefault(pending.method, LatencyHistogram())
+        histogram.add(time.monotonic() - pending.start)
+
+    def feed(self, message: str) -> None:
+        """Handles a message received from the remote endpoint."""
+        try:
+            data = json.loads(message)
+            kind, call_id = data["t"], data["id"]
+        except (ValueError, KeyError, TypeError):
+            self.logger.warning(f"Invalid RPC message: {message}")
+            return
+
+        if kind == "req":
+            self._on_request(call_id, data)
+        elif kind == "cancel":
+            task = self._serving.get(call_id)
+            if task is not None:
+                task.cancel()
+        else:
+            self._on_reply(kind, call_id, data)
+
+    def _on_reply(self, kind: str, call_id: int, data: Dict[str, Any]) -> None:
+        pending = self._pending.get(call_id)
+        if pending is None:
+            # late reply of a call that timed out or was cancelled
+            return
+
+        if kind == "res" and not pending.future.done():
+            pending.future.set_result(data.get("r"))
+        elif kind == "err" and not pending.future.done():
+            pending.future.set_exception(RpcError(data.get("c", "error"), data.get("e", "")))
+            if pending.chunks is not None:
+                pending.chunks.put_nowait((True, None))
+        elif kind == "chunk" and pending.chunks is not None:
+            pending.chunks.put_nowait((False, data.get("r")))
+        elif kind == "end" and pending.chunks is not None:
+            pending.chunks.put_nowait((True, None))
+
+    def _on_request(self, call_id: int, data: Dict[str, Any]) -> None:
+        if self._stats.handling >= self.max_concurrency + self.max_queued:
+            self._stats.rejected += 1
+            self._reply_error(call_id, "overloaded", "too many calls in progress")
+            return
+
+        self._stats.handling += 1
+        task = asyncio.get_running_loop().create_task(self._serve(call_id, data))
+        self._serving[call_id] = task
+
+    async def _serve(self, call_id: int, data: Dict[str, Any]) -> None:
+        method = data.get("m", "")
+        deadline: Optional[float] = data.get("d")
+        try:
+            handler, stream = self._handlers[method]
+        except KeyError:
+            self._finish_request(call_id)
+            self._reply_error(call_id, "not_found", f"unknown method {method}")
+            return
+
+        try:
+            async with self._slots:
+                await asyncio.wait_for(self._run_handler(call_id, handler, stream, data.get("p")), deadline)
+            self._stats.served += 1
+        except asyncio.TimeoutError:
+            self._reply_error(call_id, "timeout", f"{method} exceeded its deadline")
+        except asyncio.CancelledError:
+            self._reply_error(call_id, "cancelled", f"{method} was cancelled")
+        except Exception as e:
+            self.logger.exception(f"Handler of {method} failed")
+            self._reply_error(call_id, "error", repr(e))
+        finally:
+            self._finish_request(call_id)
+
+    async def _run_handler(self, call_id: int, handler: Union[Handler, StreamHandler], stream: bool, params: Any) -> None:
+        if not stream:
+            result = await cast(Handler, handler)(params)
+            self._send(json.dumps({"t": "res", "id": call_id, "r": result}))
+            return
+
+        async for item in cast(StreamHandler, handler)(params):
+            self._send(json.dumps({"t": "chunk", "id": call_id, "r": item}))
+        self._send(json.dumps({"t": "end", "id": call_id}))
+
+    def _finish_request(self, call_id: int) -> None:
+        if self._serving.pop(call_id, None) is not None:
+            self._stats.handling -= 1
+
+    def _reply_error(self, call_id: int, code: str, message: str) -> None:
+        if not self._closed:
+            self._send(json.dumps({"t": "err", "id": call_id, "c": code, "e": message}))
+
+    def close(self) -> None:
+        """Fails the calls in flight and cancels the requests being handled."""
+        self._closed = True
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_exception(RpcError("closed", "the endpoint is closed"))
+                if pending.chunks is not None:
+                    pending.chunks.put_nowait((True, None))
+        for task in self._serving.values():
+            task.cancel()
+
+    def get_stats(self) -> RpcStats:
+        """Gets a snapshot of the statistics."""
+        stats = RpcStats(**{k: v for k, v in vars(self._stats).items() if k != "latencies"})
+        stats.latencies = {
+            method: LatencyHistogram(list(h.counts), h.count, h.total, h.max) for method, h in self._stats.latencies.items()
+        }
+        return stats
@@ -0,0 +1,140 @@
+import asyncio
+import collections
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+def _name(handler: Handler) -> str:
+    return getattr(handler, "__qualname__", repr(handler))
+
+
+@dataclass
+class SessionBacklog:
+    """Dispatch statistics of a session. Times are in seconds."""
+
+    queued: int = 0
+    max_queued: int = 0
+    processed: int = 0
+    dropped: int = 0
+    last_wait_time: Optional[float] = None
+    max_wait_time: float = 0.0
+
+
+class SessionDispatcher:
+    """Runs the handlers of the signalling events in order for each session, and concurrently across sessions.
+
+    Each session has its own bounded queue, consumed by a task that only exists while the queue is not empty.
+    Events dispatched to a full queue are dropped (and counted). Events arriving after a session was forgotten
+    (eg. trailing ICE candidates) are ignored, so that they do not bring back the state of an ended session.
+    """
+
+    def __init__(self, max_queue_size: int = 64, max_forgotten: int = 1024) -> None:
+        """Initializes the dispatcher.
+
+        Args:
+            max_queue_size (int): Maximum number of pending events per session.
+            max_forgotten (int): Number of ended sessions whose late events are ignored, the oldest are remembered first.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_queue_size = max_queue_size
+        self.max_forgotten = max_forgotten
+
+        self._queues: Dict[str, asyncio.Queue[Tuple[float, Handler, Tuple[Any, ...]]]] = {}
+        self._workers: Dict[str, asyncio.Task[None]] = {}
+        self._backlogs: Dict[str, SessionBacklog] = {}
+        self._forgotten: collections.OrderedDict[str, None] = collections.OrderedDict()
+        # called with the name and the duration (s) of each handler once it has run
+        self.on_handler_done: Optional[Callable[[str, float], None]] = None
+
+    def dispatch(self, session_id: str, handler: Handler, *args: Any) -> bool:
+        """Queues a handler to run after the previous ones of the same session.
+
+        Must be called from the event loop thread.
+
+        Args:
+            session_id (str): Session ID.
+            handler (Callable[..., Awaitable[Any]]): Coroutine function to run.
+            *args: Arguments of the handler.
+        Returns:
+            bool: False if the event was dropped, because the queue of the session was full or the session was forgotten.
+        """
+        if session_id in self._forgotten:
+            self.logger.debug(f"Session {session_id} ended, ignoring {_name(handler)}")
+            return False
+
+        queue = self._queues.get(session_id)
+        if queue is None:
+            queue = asyncio.Queue(self.max_queue_size)
+            self._queues[session_id] = queue
+        backlog = self._backlogs.setdefault(session_id, SessionBacklog())
+
+        try:
+            queue.put_nowait((time.monotonic(), handler, args))
+        except asyncio.QueueFull:
+            backlog.dropped += 1
+            self.logger.error(f"Dispatch queue of session {session_id} full, dropping {_name(handler)}")
+            return False
+
+        backlog.queued = queue.qsize()
+        backlog.max_queued = max(backlog.max_queued, backlog.queued)
+
+        if session_id not in self._workers:
+            self._workers[session_id] = asyncio.create_task(self._run(session_id, queue, backlog))
+        return True
+
+    async def _run(
+        self,
+        session_id: str,
+        queue: asyncio.Queue[Tuple[float, Handler, Tuple[Any, ...]]],
+        backlog: SessionBacklog,
+    ) -> None:
+        try:
+            while not queue.empty():
+                queued_time, handler, args = queue.get_nowait()
+                backlog.queued = queue.qsize()
+                backlog.last_wait_time = time.monotonic() - queued_time
+                backlog.max_wait_time = max(backlog.max_wait_time, backlog.last_wait_time)
+
+                start = time.monotonic()
+                try:
+                    await handler(*args)
+                except Exception:
+                    self.logger.exception(f"Handler {_name(handler)} of session {session_id} failed")
+                if self.on_handler_done is not None:
+                    self.on_handler_done(_name(handler), time.monotonic() - start)
+                backlog.processed += 1
+        finally:
+            del self._workers[session_id]
+            if queue.empty():
+                self._queues.pop(session_id, None)
+
+    def forget(self, session_id: str) -> None:
+        """Drops the statistics of an ended session, and ignores its next events.
+
+        The events already queued are still handled.
+        """
+        self._backlogs.pop(session_id, None)
+        self._forgotten[session_id] = None
+        self._forgotten.move_to_end(session_id)
+        while len(self._forgotten) > self.max_forgotten:
+            self._forgotten.popitem(last=False)
+
+    def get_backlogs(self) -> Dict[str, SessionBacklog]:
+        """Gets the dispatch statistics of each session.
+
+        Returns:
+            Dict[str, SessionBacklog]: Statistics indexed by session ID.
+        """
+        return dict(self._backlogs)
+
+    async def close(self) -> None:
+        """Cancels the pending handlers."""
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._queues.clear()
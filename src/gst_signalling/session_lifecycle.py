@@ -0,0 +1,127 @@
+import os
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class SessionState(str, Enum):
+    """State of a session, as seen from its ICE connection."""
+
+    NEGOTIATING = "negotiating"  # set up, never connected yet
+    CONNECTED = "connected"
+    DISCONNECTED = "disconnected"  # was connected, connection lost or failed
+
+
+class LifecycleConfig(NamedTuple):
+    """Timeouts after which a session is considered half-open and reaped (in seconds, None to disable)."""
+
+    negotiation_timeout: Optional[float] = 30.0  # maximum time to get connected
+    idle_timeout: Optional[float] = 60.0  # maximum time spent disconnected
+    reap_interval: float = 5.0
+
+
+@dataclass
+class SessionRecord:
+    state: SessionState
+    created: float
+    state_since: float
+
+
+@dataclass
+class SessionStats:
+    """Resources held by a session.
+
+    - elements: GStreamer elements inside the webrtcbin of the session, and linked to it (eg. queues, taps)
+    - data_channels: open data channels
+    - buffered_bytes: bytes queued on the data channels, not yet sent
+    """
+
+    state: SessionState
+    age: float
+    state_age: float
+    elements: int = 0
+    data_channels: int = 0
+    buffered_bytes: int = 0
+
+
+@dataclass
+class LifecycleStats:
+    """Session counters of a role.
+
+    - reaped: sessions reaped, by reason (negotiation_timeout or idle_timeout)
+    - rss_bytes: resident memory of the process
+    """
+
+    sessions: int = 0
+    by_state: Dict[str, int] = field(default_factory=dict)
+    created: int = 0
+    closed: int = 0
+    reaped: Dict[str, int] = field(default_factory=dict)
+    rss_bytes: Optional[int] = None
+
+
+def process_rss() -> Optional[int]:
+    """Resident memory of the process in bytes (Linux only), None if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class SessionLifecycle:
+    """Tracks the state of the sessions of a role and finds the ones that timed out."""
+
+    def __init__(self, config: LifecycleConfig = LifecycleConfig()) -> None:
+        self.config = config
+        self.records: Dict[str, SessionRecord] = {}
+        self.created = 0
+        self.closed = 0
+        self.reaped: Dict[str, int] = {}
+
+    def add(self, session_id: str, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.records[session_id] = SessionRecord(SessionState.NEGOTIATING, now, now)
+        self.created += 1
+
+    def set_state(self, session_id: str, state: SessionState, now: Optional[float] = None) -> None:
+        record = self.records.get(session_id)
+        if record is None or record.state == state:
+            return
+        record.state = state
+        record.state_since = time.monotonic() if now is None else now
+
+    def remove(self, session_id: str) -> None:
+        if self.records.pop(session_id, None) is not None:
+            self.closed += 1
+
+    def expired(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """Finds the sessions that exceeded a timeout.
+
+        Returns:
+            List[Tuple[str, str]]: Session IDs and the timeout they exceeded.
+        """
+        now = time.monotonic() if now is None else now
+        timeouts = {
+            SessionState.NEGOTIATING: ("negotiation_timeout", self.config.negotiation_timeout),
+            SessionState.DISCONNECTED: ("idle_timeout", self.config.idle_timeout),
+        }
+
+        expired = []
+        for session_id, record in self.records.items():
+            if record.state not in timeouts:
+                continue
+            reason, timeout = timeouts[record.state]
+            if timeout is not None and now - record.state_since > timeout:
+                expired.append((session_id, reason))
+        return expired
+
+    def record_reaped(self, reason: str) -> None:
+        self.reaped[reason] = self.reaped.get(reason, 0) + 1
+
+    def get_stats(self) -> LifecycleStats:
+        by_state: Dict[str, int] = {}
+        for record in self.records.values():
+            by_state[record.state.value] = by_state.get(record.state.value, 0) + 1
+        return LifecycleStats(len(self.records), by_state, self.created, self.closed, dict(self.reaped), process_rss())
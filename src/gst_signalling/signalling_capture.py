@@ -0,0 +1,160 @@
+import asyncio
+import gzip
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import (
+    IO,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+CAPTURE_FORMAT = "gst-signalling-capture"
+CAPTURE_VERSION = 1
+
+
+class CapturedMessage(NamedTuple):
+    """A signalling message of a capture."""
+
+    time: float  # seconds since the start of the capture
+    direction: str  # "in" (server -> peer) or "out" (peer -> server)
+    message: Dict[str, Any]
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")  # type: ignore[return-value]
+    return open(path, mode, encoding="utf-8")
+
+
+class SignallingCapture:
+    """Records the signalling messages of a peer to a JSON lines file, gzip compressed if the path ends with .gz.
+
+    The first line is a header ({"format": ..., "version": ..., "start": wall clock time}), then each message is
+    a line {"t": seconds since the start, "d": "in" or "out", "m": message}.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Opens the capture file.
+
+        Args:
+            path (str): Path of the capture file, overwritten if it exists.
+        """
+        self.path = path
+        self.messages = 0
+
+        self._file = _open(path, "w")
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._write({"format": CAPTURE_FORMAT, "version": CAPTURE_VERSION, "start": time.time()})
+
+    def record(self, direction: str, message: Dict[str, Any]) -> None:
+        """Records a message.
+
+        Args:
+            direction (str): "in" for a message received from the server, "out" for a message sent to it.
+            message (Dict[str, Any]): The message, as exchanged with the server.
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write({"t": round(time.monotonic() - self._start, 6), "d": direction, "m": message})
+            self.messages += 1
+
+    def _write(self, line: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "SignallingCapture":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+
+def read_capture(path: str) -> List[CapturedMessage]:
+    """Reads the messages of a capture file.
+
+    Args:
+        path (str): Path of the capture file.
+    Returns:
+        List[CapturedMessage]: The messages, in the order they were recorded.
+    Raises:
+        ValueError: The file is not a signalling capture.
+    """
+    with _open(path, "r") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != CAPTURE_FORMAT:
+            raise ValueError(f"{path} is not a signalling capture.")
+        if header.get("version") != CAPTURE_VERSION:
+            raise ValueError(f"Unsupported capture version {header.get('version')}.")
+
+        return [CapturedMessage(line["t"], line["d"], line["m"]) for line in map(json.loads, f) if line]
+
+
+@dataclass
+class ReplayStats:
+    """Outcome of a replay.
+
+    - messages: messages delivered
+    - duration: wall clock duration of the replay (s)
+    - max_lag: largest delay of a message behind its scaled capture time (s)
+    - handler_time: total time spent delivering the messages (s)
+    """
+
+    messages: int = 0
+    duration: float = 0.0
+    max_lag: float = 0.0
+    handler_time: float = 0.0
+
+
+async def replay(
+    messages: Iterable[CapturedMessage],
+    deliver: Callable[[Dict[str, Any]], Awaitable[None]],
+    speed: float = 1.0,
+    direction: Optional[str] = "in",
+) -> ReplayStats:
+    """Delivers the messages of a capture with their original timing, scaled by speed.
+
+    Args:
+        messages (Iterable[CapturedMessage]): Messages of the capture.
+        deliver (Callable): Coroutine function called with each message.
+        speed (float): Time acceleration (2.0 replays twice as fast), 0 to deliver as fast as possible.
+        direction (str, optional): Direction of the replayed messages, None for both.
+    Returns:
+        ReplayStats: Statistics of the replay.
+    """
+    stats = ReplayStats()
+    start = time.monotonic()
+    first: Optional[float] = None
+
+    for captured in messages:
+        if direction is not None and captured.direction != direction:
+            continue
+        if first is None:
+            first = captured.time
+
+        if speed > 0:
+            target = start + (captured.time - first) / speed
+            delay = target - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            stats.max_lag = max(stats.max_lag, time.monotonic() - target)
+
+        t_deliver = time.monotonic()
+        await deliver(captured.message)
+        stats.handler_time += time.monotonic() - t_deliver
+        stats.messages += 1
+
+    stats.duration = time.monotonic() - start
+    return stats
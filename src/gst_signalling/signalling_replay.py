@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from websockets.exceptions import ConnectionClosed
+from websockets.legacy.server import WebSocketServer, WebSocketServerProtocol, serve
+
+from .gst_signalling import GstSignalling
+from .signalling_capture import CapturedMessage, ReplayStats, read_capture, replay
+
+
+def _load(capture: Union[str, Sequence[CapturedMessage]]) -> List[CapturedMessage]:
+    return read_capture(capture) if isinstance(capture, str) else list(capture)
+
+
+class ReplaySignalling(GstSignalling):
+    """Signalling peer replaying the messages a role received in a capture, instead of connecting to a server.
+
+    The messages the role sends are kept in sent, to be compared with the outgoing messages of the capture.
+    A role is run against a capture by overriding its create_signalling:
+
+    class ReplayedProducer(GstSignallingProducer):
+        def create_signalling(self, host: str, port: int) -> GstSignalling:
+            return ReplaySignalling("session.jsonl.gz", speed=10.0)
+    """
+
+    def __init__(self, capture: Union[str, Sequence[CapturedMessage]], speed: float = 1.0) -> None:
+        """Initializes the signalling peer.
+
+        Args:
+            capture (str or Sequence[CapturedMessage]): Path of the capture file, or its messages.
+            speed (float): Time acceleration of the replay, 0 to replay as fast as possible.
+        """
+        super().__init__(host="", port=0)
+        self.messages = _load(capture)
+        self.speed = speed
+
+        self.sent: List[Dict[str, Any]] = []
+        self.stats: Optional[ReplayStats] = None
+        self.done = asyncio.Event()
+
+    async def connect(self) -> None:
+        """Starts the replay."""
+        self.handler_task = asyncio.create_task(self._handler())
+
+    async def _handler(self) -> None:
+        try:
+            self.stats = await replay(self.messages, self._handle_messages, self.speed)
+            self.logger.info(f"Replayed {self.stats.messages} messages in {self.stats.duration:.3f}s")
+        except asyncio.CancelledError:
+            self.logger.info("Replay cancelled.")
+        finally:
+            self.done.set()
+
+    async def close(self) -> None:
+        if self.handler_task is not None:
+            self.handler_task.cancel()
+            await self.handler_task
+            self.handler_task = None
+        self.stop_capture()
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        if self.capture is not None:
+            self.capture.record("out", message)
+        self.logger.debug(f"Sending message: {message}")
+        self.sent.append(message)
+
+
+class ReplayServer:
+    """Local stand-in for the signalling server, replaying the messages of a capture to each connecting peer.
+
+    Every client receives the incoming messages of the capture with their original timing (scaled by speed),
+    whatever it sends. Connecting many clients at once reproduces a reconnect storm against the peers.
+
+    server = ReplayServer("robot.jsonl.gz", port=8443, speed=4.0)
+    await server.start()
+    """
+
+    def __init__(
+        self,
+        capture: Union[str, Sequence[CapturedMessage]],
+        host: str = "127.0.0.1",
+        port: int = 8443,
+        speed: float = 1.0,
+    ) -> None:
+        """Initializes the server.
+
+        Args:
+            capture (str or Sequence[CapturedMessage]): Path of the capture file, or its messages.
+            host (str): Address to listen on.
+            port (int): Port to listen on, 0 for any free port.
+            speed (float): Time acceleration of the replay, 0 to replay as fast as possible.
+        """
+        self.logger = logging.getLogger(__name__)
+
+        self.messages = _load(capture)
+        self.host = host
+        self.port = port
+        self.speed = speed
+
+        self.received: List[Dict[str, Any]] = []
+        self.replays: List[ReplayStats] = []
+        self._server: Optional[WebSocketServer] = None
+
+    async def start(self) -> None:
+        """Starts listening, the actual port is set if 0 was given."""
+        self._server = await serve(self._on_client, self.host, self.port, ping_interval=None)
+        self.port = next(iter(self._server.sockets)).getsockname()[1]
+        self.logger.info(f"Replaying {len(self.messages)} messages on ws://{self.host}:{self.port}")
+
+    async def _on_client(self, ws: WebSocketServerProtocol) -> None:
+        reader = asyncio.create_task(self._receive(ws))
+
+        async def deliver(message: Dict[str, Any]) -> None:
+            await ws.send(json.dumps(message))
+
+        try:
+            self.replays.append(await replay(self.messages, deliver, self.speed))
+            # keep the connection until the peer closes it
+            await reader
+        except ConnectionClosed:
+            self.logger.info("Peer disconnected during the replay.")
+        finally:
+            reader.cancel()
+
+    async def _receive(self, ws: WebSocketServerProtocol) -> None:
+        try:
+            async for data in ws:
+                self.received.append(json.loads(data))
+        except ConnectionClosed:
+            pass
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional
+
+
+class VideoLayer(NamedTuple):
+    """Encoding of a video layer: resolution and target bitrate (kbit/s)."""
+
+    name: str
+    width: int
+    height: int
+    bitrate: int
+
+
+# from the highest to the lowest quality
+DEFAULT_LADDER: List[VideoLayer] = [
+    VideoLayer("high", 1280, 720, 2500),
+    VideoLayer("medium", 640, 360, 800),
+    VideoLayer("low", 320, 180, 200),
+]
+
+
+@dataclass
+class LayerStats:
+    """Distribution and encoder cost of a layer.
+
+    - sessions: sessions currently receiving the layer
+    - switches: times a session switched to the layer
+    - frames, bytes: encoded frames and bytes (the encoder is paused while no session receives the layer)
+    - mean_encode_time: mean time spent in the encoder per frame (s)
+    """
+
+    sessions: int = 0
+    switches: int = 0
+    frames: int = 0
+    bytes: int = 0
+    encode_time: float = 0.0
+
+    @property
+    def mean_encode_time(self) -> float:
+        return self.encode_time / self.frames if self.frames else 0.0
+
+
+class LayerPolicy:
+    """Chooses the layer of a session from its receiver reports.
+
+    Layers are indexed from the highest (0) to the lowest quality. A session goes one layer down
+    as soon as its packet loss or round trip time is too high, and one layer up after a number
+    of consecutive good reports.
+    """
+
+    def __init__(
+        self,
+        layers: int,
+        max_loss: float = 0.05,
+        good_loss: float = 0.01,
+        max_rtt: float = 0.3,
+        up_after: int = 5,
+    ) -> None:
+        """Initializes the policy.
+
+        Args:
+            layers (int): Number of layers.
+            max_loss (float): Fraction of lost packets above which the layer goes down.
+            good_loss (float): Fraction of lost packets below which a report is good.
+            max_rtt (float): Round trip time (s) above which the layer goes down.
+            up_after (int): Consecutive good reports before the layer goes up.
+        """
+        self.layers = layers
+        self.max_loss = max_loss
+        self.good_loss = good_loss
+        self.max_rtt = max_rtt
+        self.up_after = up_after
+        self._good_reports: Dict[str, int] = {}
+
+    def update(self, session_id: str, current: int, fraction_lost: float, rtt: Optional[float] = None) -> int:
+        """Feeds a receiver report of a session.
+
+        Args:
+            session_id (str): Session ID.
+            current (int): Current layer of the session.
+            fraction_lost (float): Fraction of packets lost since the previous report.
+            rtt (float, optional): Round trip time (s).
+        Returns:
+            int: The layer the session should receive.
+        """
+        congested = fraction_lost > self.max_loss or (rtt is not None and rtt > self.max_rtt)
+        if congested:
+            self._good_reports[session_id] = 0
+            return min(current + 1, self.layers - 1)
+
+        good = fraction_lost < self.good_loss
+        count = self._good_reports.get(session_id, 0) + 1 if good else 0
+        if count >= self.up_after and current > 0:
+            self._good_reports[session_id] = 0
+            return current - 1
+        self._good_reports[session_id] = count
+        return current
+
+    def forget(self, session_id: str) -> None:
+        self._good_reports.pop(session_id, None)
@@ -0,0 +1,82 @@
+from typing import Collection, List, NamedTuple, Optional
+
+MEDIA_KINDS = ("audio", "video")
+DIRECTIONS = ("sendrecv", "sendonly", "recvonly", "inactive")
+
+
+class MediaLine(NamedTuple):
+    """Media section (m-line) of an SDP."""
+
+    mline_index: int
+    kind: str  # audio, video or application
+    port: int
+    mid: Optional[str] = None
+    label: Optional[str] = None  # a=label, declared by the producer for each stream
+    direction: str = "sendrecv"
+
+    @property
+    def active(self) -> bool:
+        return self.port != 0 and self.direction != "inactive"
+
+
+def parse_media_lines(sdp: str) -> List[MediaLine]:
+    """Lists the media sections of an SDP, in order."""
+    lines: List[MediaLine] = []
+    for line in sdp.splitlines():
+        if line.startswith("m="):
+            kind, port = line[2:].split()[:2]
+            lines.append(MediaLine(len(lines), kind, int(port)))
+        elif lines and line.startswith("a="):
+            name, _, value = line[2:].partition(":")
+            if name == "mid":
+                lines[-1] = lines[-1]._replace(mid=value)
+            elif name == "label":
+                lines[-1] = lines[-1]._replace(label=value)
+            elif name in DIRECTIONS:
+                lines[-1] = lines[-1]._replace(direction=name)
+    return lines
+
+
+def add_media_labels(sdp: str, labels: List[Optional[str]]) -> str:
+    """Declares stream labels (a=label) on the audio and video sections of an SDP, in order.
+
+    Args:
+        sdp (str): The SDP.
+        labels (List[Optional[str]]): Label of each audio / video section, None to leave it without label.
+    Returns:
+        str: The SDP with the labels.
+    """
+    out: List[str] = []
+    media_index = 0
+    for line in sdp.splitlines():
+        out.append(line)
+        if line.startswith("m=") and line[2:].split()[0] in MEDIA_KINDS:
+            if media_index < len(labels) and labels[media_index] is not None:
+                out.append(f"a=label:{labels[media_index]}")
+            media_index += 1
+    return "\r\n".join(out) + "\r\n"
+
+
+class StreamSubscription(NamedTuple):
+    """Streams a consumer receives, the other audio / video streams are answered inactive.
+
+    A stream is received if it matches every filter that is set (None for no filter on this criterion).
+    Data channels are always received.
+
+    StreamSubscription(kinds={"video"}, labels={"left-camera"})
+    """
+
+    kinds: Optional[Collection[str]] = None
+    mids: Optional[Collection[str]] = None
+    labels: Optional[Collection[str]] = None
+
+    def accepts(self, line: MediaLine) -> bool:
+        if line.kind not in MEDIA_KINDS:
+            return True
+        if self.kinds is not None and line.kind not in self.kinds:
+            return False
+        if self.mids is not None and line.mid not in self.mids:
+            return False
+        if self.labels is not None and line.label not in self.labels:
+            return False
+        return True
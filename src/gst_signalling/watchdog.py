@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Coroutine, Dict, List, Optional
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+@dataclass
+class DelayStats:
+    """Statistics of a measured delay or duration (in seconds)."""
+
+    count: int = 0
+    last: float = 0.0
+    max: float = 0.0
+    total: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.last = value
+        self.max = max(self.max, value)
+        self.total += value
+
+
+@dataclass
+class BlockingSite:
+    """A place where the event loop was found blocked for longer than the budget."""
+
+    samples: int = 0
+    stack: List[str] = field(default_factory=list)
+
+
+@dataclass
+class WatchdogStats:
+    """Event loop health.
+
+    - loop_lag: delay of the periodic watchdog tick
+    - callback_delays: delay between a GStreamer callback and its coroutine starting on the loop, by callback
+    - slow_handlers: duration of the handlers that exceeded the budget, by handler
+    - blocking_sites: where the loop thread was sampled while blocked, by function
+    """
+
+    loop_lag: DelayStats = field(default_factory=DelayStats)
+    callback_delays: Dict[str, DelayStats] = field(default_factory=dict)
+    slow_handlers: Dict[str, DelayStats] = field(default_factory=dict)
+    blocking_sites: Dict[str, BlockingSite] = field(default_factory=dict)
+
+
+class LoopWatchdog:
+    """Measures the event loop lag and finds what blocks it.
+
+    A task ticks every interval and measures how late it wakes up. A sampling thread checks that the
+    ticks keep coming: when the loop has been stuck for longer than the budget, it samples the stack
+    of the loop thread to name the culprit.
+    """
+
+    def __init__(self, interval: float = 0.1, budget: float = 0.05, sample_interval: float = 0.01) -> None:
+        """Initializes the watchdog.
+
+        Args:
+            interval (float): Period of the loop tick (s).
+            budget (float): Lag, callback delay or handler duration considered too long (s).
+            sample_interval (float): Period of the blocked loop detection (s).
+        """
+        self.logger = logging.getLogger(__name__)
+
+        self.interval = interval
+        self.budget = budget
+        self.sample_interval = sample_interval
+
+        self._stats = WatchdogStats()
+        self._lock = threading.Lock()
+
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = time.monotonic()
+        self._tick_task: Optional[asyncio.Task[None]] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self) -> None:
+        """Starts the watchdog, must be called from the event loop thread."""
+        if self._running:
+            return
+
+        self._running = True
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._tick_task = asyncio.get_running_loop().create_task(self._tick())
+        self._sampler = threading.Thread(target=self._sample, name="loop-watchdog", daemon=True)
+        self._sampler.start()
+
+    async def stop(self) -> None:
+        """Stops the watchdog."""
+        self._running = False
+        if self._tick_task is not None:
+            self._tick_task.cancel()
+            try:
+                await self._tick_task
+            except asyncio.CancelledError:
+                pass
+            self._tick_task = None
+
+    async def _tick(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+
+            lag = max(0.0, now - expected)
+            with self._lock:
+                self._stats.loop_lag.add(lag)
+            if lag > self.budget:
+                self.logger.warning(f"Event loop lagged {lag * 1000:.1f} ms")
+
+    def _sample(self) -> None:
+        reported_tick = 0.0
+        while self._running:
+            time.sleep(self.sample_interval)
+            last_tick = self._last_tick
+            if time.monotonic() - last_tick < self.interval + self.budget:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id or 0)
+            if frame is None:
+                continue
+
+            stack = traceback.format_stack(frame)
+            site = self._culprit(traceback.extract_stack(frame))
+            with self._lock:
+                blocking_site = self._stats.blocking_sites.setdefault(site, BlockingSite())
+                blocking_site.samples += 1
+                blocking_site.stack = stack
+
+            if last_tick != reported_tick:
+                reported_tick = last_tick
+                self.logger.warning(f"Event loop blocked in {site}")
+
+    @staticmethod
+    def _culprit(stack: traceback.StackSummary) -> str:
+        # innermost frame that is not part of asyncio
+        for frame in reversed(stack):
+            if not frame.filename.startswith(_ASYNCIO_DIR):
+                return f"{frame.name} ({frame.filename}:{frame.lineno})"
+        return "asyncio"
+
+    def run_threadsafe(self, coro: Coroutine[Any, Any, Any], loop: asyncio.AbstractEventLoop, name: str) -> None:
+        """Schedules a coroutine on the loop from a GStreamer thread and measures how long it waits to start.
+
+        Args:
+            coro (Coroutine): The coroutine.
+            loop (asyncio.AbstractEventLoop): The event loop.
+            name (str): Name of the callback, used in the statistics.
+        """
+        fired = time.monotonic()
+
+        async def measured() -> None:
+            self.record_callback_delay(name, time.monotonic() - fired)
+            await coro
+
+        asyncio.run_coroutine_threadsafe(measured(), loop)
+
+    def record_callback_delay(self, name: str, delay: float) -> None:
+        with self._lock:
+            self._stats.callback_delays.setdefault(name, DelayStats()).add(delay)
+        if delay > self.budget:
+            self.logger.warning(f"Callback {name} waited {delay * 1000:.1f} ms for the event loop")
+
+    def record_handler_time(self, name: str, duration: float) -> None:
+        """Records the duration of a handler, kept only if it exceeds the budget."""
+        if duration <= self.budget:
+            return
+        with self._lock:
+            self._stats.slow_handlers.setdefault(name, DelayStats()).add(duration)
+        self.logger.warning(f"Handler {name} took {duration * 1000:.1f} ms")
+
+    def get_stats(self) -> WatchdogStats:
+        """Gets a snapshot of the statistics."""
+        with self._lock:
+            return WatchdogStats(
+                loop_lag=DelayStats(**vars(self._stats.loop_lag)),
+                callback_delays={k: DelayStats(**vars(v)) for k, v in self._stats.callback_delays.items()},
+                slow_handlers={k: DelayStats(**vars(v)) for k, v in self._stats.slow_handlers.items()},
+                blocking_sites={k: BlockingSite(v.samples, list(v.stack)) for k, v in self._stats.blocking_sites.items()},
+            )
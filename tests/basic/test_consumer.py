@@ -15,3 +15,83 @@ async def test_consumer(signalling_host: str, signalling_port: int, producer_com
     await consumer.connect()
     assert len(consumer.peer_id) == 36
     await consumer.close()
+
+
+async def test_consumer_by_name(signalling_host: str, signalling_port: int, producer_common: GstSignallingProducer) -> None:
+    consumer = GstSignallingConsumer(
+        host=signalling_host,
+        port=signalling_port,
+        producer_name="producer_common",
+        resolve_timeout=5.0,
+    )
+
+    await consumer.connect()
+    assert consumer.producer_peer_id == producer_common.peer_id
+    assert consumer.resolve_time is not None
+    await consumer.close()
+
+
+async def test_consumer_reestablish(signalling_host: str, signalling_port: int) -> None:
+    producer = GstSignallingProducer(host=signalling_host, port=signalling_port, name="producer_restarted")
+    await producer.connect()
+    first_peer_id = producer.peer_id
+
+    consumer = GstSignallingConsumer(
+        host=signalling_host,
+        port=signalling_port,
+        producer_name="producer_restarted",
+        reestablish=True,
+    )
+    started = asyncio.Event()
+    reestablished = asyncio.Event()
+    consumer.on("new_session", lambda _: started.set())
+    consumer.on("session_reestablished", lambda _: reestablished.set())
+    await consumer.connect()
+    await asyncio.wait_for(started.wait(), 5.0)
+
+    # the producer restarts with a new peer ID
+    await producer.close()
+    producer = GstSignallingProducer(host=signalling_host, port=signalling_port, name="producer_restarted")
+    await producer.connect()
+
+    await asyncio.wait_for(reestablished.wait(), 5.0)
+    assert consumer.producer_peer_id == producer.peer_id
+    stats = consumer.get_reestablish_stats()
+    assert stats.outages == 1
+    assert stats.producer_peer_ids == [first_peer_id, producer.peer_id]
+
+    await consumer.close()
+    await producer.close()
+
+
+async def test_consumer_end_session_is_not_reestablished(signalling_host: str, signalling_port: int) -> None:
+    producer = GstSignallingProducer(host=signalling_host, port=signalling_port, name="producer_ended")
+    await producer.connect()
+
+    consumer = GstSignallingConsumer(
+        host=signalling_host,
+        port=signalling_port,
+        producer_name="producer_ended",
+        reestablish=True,
+    )
+    started = asyncio.Event()
+    consumer.on("new_session", lambda _: started.set())
+    await consumer.connect()
+    await asyncio.wait_for(started.wait(), 5.0)
+
+    # ended by the application, not lost
+    (session_id,) = consumer.sessions
+    await consumer.end_session(session_id)
+    await asyncio.sleep(1.0)
+
+    assert consumer.sessions == {}
+    stats = consumer.get_reestablish_stats()
+    assert (stats.outages, stats.ongoing) == (0, None)
+
+    await consumer.close()
+    await producer.close()
+
+
+def test_reestablish_requires_producer_identity() -> None:
+    with pytest.raises(ValueError):
+        GstSignallingConsumer(host="127.0.0.1", port=8443, producer_peer_id="peer", reestablish=True)
@@ -1,6 +1,9 @@
+import asyncio
+
 import pytest
 
-from gst_signalling import GstSignallingProducer
+from gst_signalling import GstSignallingConsumer, GstSignallingProducer
+from gst_signalling.simulcast import LayerPolicy
 
 
 async def test_simple_producer(signalling_host: str, signalling_port: int) -> None:
@@ -13,3 +16,25 @@ async def test_simple_producer(signalling_host: str, signalling_port: int) -> No
     await producer.connect()
     assert len(producer.peer_id) == 36
     await producer.close()
+
+
+async def test_producer_close_stops_the_auto_layers(signalling_host: str, signalling_port: int) -> None:
+    producer = GstSignallingProducer(host=signalling_host, port=signalling_port, name="producer_auto_layers")
+    producer.enable_auto_layers(LayerPolicy(2), interval=0.1)
+    await producer.connect()
+
+    consumer = GstSignallingConsumer(host=signalling_host, port=signalling_port, producer_name="producer_auto_layers")
+    started = asyncio.Event()
+    producer.on("new_session", lambda _: started.set())
+    await consumer.connect()
+    await asyncio.wait_for(started.wait(), 5.0)
+
+    def auto_layer_tasks() -> int:
+        return sum(1 for task in asyncio.all_tasks() if task.get_coro().__name__ == "_auto_layers")  # type: ignore[union-attr]
+
+    assert auto_layer_tasks() == 1
+    await producer.close()
+    await asyncio.sleep(0)
+    assert auto_layer_tasks() == 0
+
+    await consumer.close()
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from gst_signalling import array_codec
+
+
+def test_roundtrip_batch() -> None:
+    joints = np.arange(7, dtype=np.float64)
+    imu = np.random.rand(3, 3).astype(np.float32)
+    depth = np.random.randint(0, 2**16, size=(48, 64), dtype=np.uint16)
+    fortran = np.asfortranarray(np.random.rand(4, 5))
+    sliced = np.arange(100, dtype=">i4").reshape(10, 10)[::2, ::3]
+    scalar = np.array(3.5)
+    empty = np.zeros((0, 3), dtype=np.int8)
+
+    arrays = [joints, imu, depth, fortran, sliced, scalar, empty]
+    message = array_codec.encode(arrays)
+    decoded = array_codec.decode(bytes(message))
+
+    assert len(decoded) == len(arrays)
+    for original, array in zip(arrays, decoded):
+        assert array.dtype == original.dtype
+        assert array.shape == original.shape
+        np.testing.assert_array_equal(array, original)
+
+    assert not decoded[0].flags.writeable
+    assert decoded[3].flags.f_contiguous
+
+
+def test_decoded_arrays_are_views() -> None:
+    message = array_codec.encode([np.arange(16, dtype=np.uint8)])
+    (array,) = array_codec.decode(message)
+    assert np.shares_memory(array, np.frombuffer(message, dtype=np.uint8))
+
+    buffer = bytearray(message)
+    (array,) = array_codec.decode(buffer)
+    buffer[-1] = 42
+    assert array[-1] == 42
+
+
+def test_invalid_message() -> None:
+    with pytest.raises(ValueError):
+        array_codec.decode(b"not an array message")
+
+    with pytest.raises(ValueError):
+        array_codec.encode([np.array([object()])])
@@ -0,0 +1,184 @@
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+
+from gi.repository import GstWebRTC
+
+from gst_signalling.gst_broadcast import DropPolicy, GstBroadcaster
+
+
+class FakeChannel:
+    """Data channel whose buffered amount is set by the test."""
+
+    def __init__(self, buffered_amount: int = 0) -> None:
+        self.props = SimpleNamespace(
+            ready_state=GstWebRTC.WebRTCDataChannelState.OPEN,
+            buffered_amount=buffered_amount,
+            buffered_amount_low_threshold=0,
+        )
+        self.sent: List[Any] = []
+        self.closed = False
+        self.handlers: Dict[int, Tuple[str, Callable[..., None]]] = {}
+
+    def send_string(self, data: str) -> None:
+        self.sent.append(data)
+
+    def send_data(self, data: Any) -> None:
+        self.sent.append(data)
+
+    def close(self) -> None:
+        self.closed = True
+
+    def connect(self, signal: str, handler: Callable[..., None]) -> int:
+        handler_id = len(self.handlers) + 1
+        self.handlers[handler_id] = (signal, handler)
+        return handler_id
+
+    def disconnect(self, handler_id: int) -> None:
+        del self.handlers[handler_id]
+
+    def emit(self, signal: str) -> None:
+        for name, handler in list(self.handlers.values()):
+            if name == signal:
+                handler(self)
+
+
+def test_message_is_serialised_once_for_all_consumers() -> None:
+    broadcaster = GstBroadcaster("state")
+    channels = [FakeChannel(), FakeChannel(), FakeChannel()]
+    for i, channel in enumerate(channels):
+        broadcaster.add_channel(f"session-{i}", channel)
+    channels[2].props.ready_state = GstWebRTC.WebRTCDataChannelState.CLOSED
+
+    assert broadcaster.publish_json({"position": [1, 2]}) == 2
+    assert broadcaster.publish(b"\x00\x01") == 2
+
+    first, second, closed = channels
+    assert first.sent[0] == '{"position": [1, 2]}'
+    # the same string and the same buffer are handed to every channel
+    assert first.sent[0] is second.sent[0]
+    assert first.sent[1] is second.sent[1]
+    assert first.sent[1].get_data() == b"\x00\x01"
+    assert closed.sent == []
+
+    broadcaster.remove_channel("session-1")
+    assert broadcaster.publish("last") == 1
+    assert len(second.sent) == 2
+    assert broadcaster.get_stats()["session-0"].sent == 3
+
+
+def test_drop_newest() -> None:
+    broadcaster = GstBroadcaster("state", DropPolicy.DROP_NEWEST, max_buffered_amount=100)
+    slow, fast = FakeChannel(buffered_amount=101), FakeChannel()
+    broadcaster.add_channel("slow", slow)
+    broadcaster.add_channel("fast", fast)
+
+    assert broadcaster.publish("1") == 1
+    assert broadcaster.publish("2") == 1
+    slow.props.buffered_amount = 0
+    assert broadcaster.publish("3") == 2
+
+    assert slow.sent == ["3"]
+    assert fast.sent == ["1", "2", "3"]
+    stats = broadcaster.get_stats()
+    assert (stats["slow"].sent, stats["slow"].dropped) == (1, 2)
+    assert stats["fast"].dropped == 0
+
+
+def test_drop_oldest_keeps_the_newest_messages() -> None:
+    broadcaster = GstBroadcaster("state", DropPolicy.DROP_OLDEST, max_buffered_amount=100, max_pending=2)
+    slow = FakeChannel(buffered_amount=200)
+    broadcaster.add_channel("slow", slow)
+    assert slow.props.buffered_amount_low_threshold == 50
+
+    for message in ["1", "2", "3"]:
+        assert broadcaster.publish(message) == 1
+    stats = broadcaster.get_stats()["slow"]
+    assert slow.sent == []
+    assert (stats.pending, stats.dropped, stats.max_buffered_amount) == (2, 1, 200)
+
+    # the pending messages are flushed in order when the channel drains
+    slow.props.buffered_amount = 0
+    slow.emit("on-buffered-amount-low")
+    assert slow.sent == ["2", "3"]
+    assert broadcaster.get_stats()["slow"].pending == 0
+
+    # and are sent before the new ones
+    slow.props.buffered_amount = 200
+    broadcaster.publish("4")
+    slow.props.buffered_amount = 0
+    broadcaster.publish("5")
+    assert slow.sent == ["2", "3", "4", "5"]
+
+
+def test_disconnect_slow_consumer() -> None:
+    disconnected: List[str] = []
+    broadcaster = GstBroadcaster("state", DropPolicy.DISCONNECT, max_buffered_amount=100, on_disconnect=disconnected.append)
+    slow, fast = FakeChannel(buffered_amount=101), FakeChannel()
+    broadcaster.add_channel("slow", slow)
+    broadcaster.add_channel("fast", fast)
+
+    assert broadcaster.publish("1") == 1
+    assert disconnected == ["slow"]
+    assert slow.closed and slow.sent == []
+    assert list(broadcaster.get_stats()) == ["fast"]
+
+    assert broadcaster.publish("2") == 1
+    assert disconnected == ["slow"]
+    assert fast.sent == ["1", "2"]
+
+
+def test_idle_time_is_the_time_since_the_last_send() -> None:
+    broadcaster = GstBroadcaster("state", DropPolicy.DISCONNECT, max_buffered_amount=100)
+    channel = FakeChannel()
+    broadcaster.add_channel("idle", channel)
+
+    stats = broadcaster.get_stats()["idle"]
+    assert stats.idle_time == 0.0
+    broadcaster.publish("1")
+    assert stats.last_sent_time is not None
+    assert 0.0 <= stats.idle_time < 1.0
+
+    # the idle time grows while nothing is published, it does not mean the consumer is slow:
+    # only the buffered amount disconnects it
+    stats.last_sent_time = time.monotonic() - 10.0
+    assert stats.idle_time >= 10.0
+    assert stats.lag == 0.0
+    assert broadcaster.publish("2") == 1
+    assert not channel.closed
+    assert stats.idle_time < 1.0
+
+
+def test_lag_is_the_age_of_the_oldest_pending_message() -> None:
+    broadcaster = GstBroadcaster("state", DropPolicy.DROP_OLDEST, max_buffered_amount=100, max_pending=2)
+    slow = FakeChannel(buffered_amount=200)
+    broadcaster.add_channel("slow", slow)
+
+    broadcaster.publish("1")
+    stats = broadcaster.get_stats()["slow"]
+    assert stats.oldest_pending_time is not None
+    stats.oldest_pending_time -= 5.0
+    assert stats.lag >= 5.0
+
+    # the oldest message is dropped, the lag is the age of the next one
+    broadcaster.publish("2")
+    broadcaster.publish("3")
+    assert stats.lag < 1.0
+
+    slow.props.buffered_amount = 0
+    slow.emit("on-buffered-amount-low")
+    assert slow.sent == ["2", "3"]
+    assert (stats.lag, stats.oldest_pending_time) == (0.0, None)
+
+
+def test_removed_consumer_is_not_flushed() -> None:
+    broadcaster = GstBroadcaster("state", DropPolicy.DROP_OLDEST, max_buffered_amount=100)
+    slow = FakeChannel(buffered_amount=200)
+    broadcaster.add_channel("slow", slow)
+    broadcaster.publish("1")
+
+    broadcaster.remove_channel("slow")
+    assert slow.handlers == {}
+    slow.props.buffered_amount = 0
+    slow.emit("on-buffered-amount-low")
+    assert slow.sent == []
@@ -0,0 +1,25 @@
+import pytest
+
+from gst_signalling.clock_sync import ClockOffsetEstimator
+
+
+def test_offset_from_min_rtt_sample() -> None:
+    estimator = ClockOffsetEstimator(window=4)
+
+    # remote clock is 10s ahead, symmetric 5ms one way latency
+    estimator.add_sample(0.0, 10.005, 10.006, 0.011)
+    # queued reply: asymmetric path, biased offset but larger rtt
+    estimator.add_sample(1.0, 11.005, 11.006, 1.111)
+
+    stats = estimator.get_stats()
+    assert stats.samples == 2
+    assert stats.offset == pytest.approx(10.0)
+    assert stats.min_rtt == pytest.approx(0.010)
+    assert stats.rtt is not None and stats.rtt > stats.min_rtt
+    assert stats.one_way_latency == pytest.approx(stats.rtt / 2)
+
+
+def test_empty_estimator() -> None:
+    stats = ClockOffsetEstimator().get_stats()
+    assert stats.offset is None
+    assert stats.one_way_latency is None
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+from examples.recorder.disk_writer import DiskWriter
+
+requires_fifo = pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="named pipes are needed to stall the disk")
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def stalled_file(tmp_path: Path) -> str:
+    """Named pipe: its writer thread is stuck opening it until the test opens it for reading."""
+    path = str(tmp_path / "stalled.gdp")
+    os.mkfifo(path)
+    return path
+
+
+def test_chunks_are_written_in_order(tmp_path: Path) -> None:
+    writer = DiskWriter(max_workers=2)
+    paths = [str(tmp_path / f"video_{i}.gdp") for i in range(3)]
+    for chunk in range(100):
+        for path in paths:
+            assert writer.write(path, f"{chunk},".encode())
+
+    for path in paths:
+        assert writer.close_file(path)
+    expected = "".join(f"{chunk}," for chunk in range(100))
+    for path in paths:
+        assert Path(path).read_text() == expected
+
+    stats = writer.get_stats()
+    assert stats.written_bytes == 3 * len(expected)
+    assert (stats.pending_bytes, stats.blocked, stats.failed_files) == (0, 0, {})
+    writer.close()
+
+
+def test_failed_file_drops_its_chunks(tmp_path: Path) -> None:
+    writer = DiskWriter()
+    missing = str(tmp_path / "missing" / "video_0.gdp")
+    valid = str(tmp_path / "audio_0.gdp")
+
+    assert writer.write(missing, b"data")
+    assert writer.write(valid, b"data")
+    assert wait_for(lambda: writer.failed(missing) is not None)
+    assert not writer.write(missing, b"more data")
+    # the other files are not affected
+    assert writer.write(valid, b"more data")
+
+    writer.close()
+    assert Path(valid).read_bytes() == b"datamore data"
+    stats = writer.get_stats()
+    assert list(stats.failed_files) == [missing]
+    assert (stats.written_bytes, stats.pending_bytes) == (13, 0)
+
+
+@requires_fifo
+def test_writes_block_above_the_pending_bytes(tmp_path: Path) -> None:
+    writer = DiskWriter(max_workers=1, max_pending_bytes=10)
+    stalled = stalled_file(tmp_path)
+    other = str(tmp_path / "video_0.gdp")
+
+    assert writer.write(stalled, b"x" * 20)
+    results: List[bool] = []
+    blocked = threading.Thread(target=lambda: results.append(writer.write(other, b"y")))
+    blocked.start()
+    assert wait_for(lambda: writer.get_stats().blocked == 1)
+    assert blocked.is_alive() and results == []
+
+    # the disk catches up
+    with open(stalled, "rb") as reader:
+        blocked.join(2.0)
+        assert results == [True]
+        assert writer.close_file(stalled)
+        assert reader.read() == b"x" * 20
+
+    writer.close()
+    assert Path(other).read_bytes() == b"y"
+    assert writer.get_stats().pending_bytes == 0
+
+
+@requires_fifo
+def test_close_file_times_out_while_the_chunks_are_pending(tmp_path: Path) -> None:
+    writer = DiskWriter(max_workers=1)
+    stalled = stalled_file(tmp_path)
+
+    assert writer.write(stalled, b"data")
+    assert not writer.close_file(stalled, timeout=0.1)
+    # the file is left open, its chunks are still written
+    assert writer.get_stats().pending_bytes == 4
+
+    with open(stalled, "rb") as reader:
+        assert writer.close_file(stalled, timeout=2.0)
+        assert reader.read() == b"data"
+    assert writer.close_file(stalled)
+    writer.close()
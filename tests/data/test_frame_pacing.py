@@ -0,0 +1,38 @@
+from gst_signalling.frame_pacing import FramePacer, MediaSourceStats
+
+FRAME = 33_333_333  # ns, 30 fps
+
+
+def test_frames_are_timestamped_with_their_slot() -> None:
+    stats = MediaSourceStats()
+    pacer = FramePacer(FRAME, stats)
+
+    # the jitter of the pushes does not show in the timestamps
+    assert pacer.pace(10) == 0
+    assert pacer.pace(FRAME + 5_000_000) == FRAME
+    assert pacer.pace(2 * FRAME + 30_000_000) == 2 * FRAME
+    assert (stats.dropped, stats.late) == (0, 0)
+
+
+def test_frames_pushed_faster_than_the_framerate_are_dropped() -> None:
+    stats = MediaSourceStats()
+    pacer = FramePacer(FRAME, stats)
+
+    assert pacer.pace(FRAME) == FRAME
+    assert pacer.pace(FRAME + 1) is None
+    assert pacer.pace(2 * FRAME - 1) is None
+    # a clock going backwards does not reuse a slot either
+    assert pacer.pace(0) is None
+    assert pacer.pace(2 * FRAME) == 2 * FRAME
+    assert (stats.dropped, stats.late) == (3, 0)
+
+
+def test_skipped_slots_count_the_frame_late() -> None:
+    stats = MediaSourceStats()
+    pacer = FramePacer(FRAME, stats)
+
+    assert pacer.pace(0) == 0
+    assert pacer.pace(3 * FRAME) == 3 * FRAME
+    assert pacer.pace(4 * FRAME) == 4 * FRAME
+    assert pacer.pace(10 * FRAME) == 10 * FRAME
+    assert (stats.dropped, stats.late) == (0, 2)
@@ -0,0 +1,158 @@
+import multiprocessing
+import uuid
+from typing import Iterator, Optional
+
+import numpy as np
+import pytest
+
+from gst_signalling.frame_ring import SLOT_HEADER_SIZE, FrameRingReader, FrameRingWriter
+
+
+@pytest.fixture
+def ring_name() -> Iterator[str]:
+    yield f"gst-test-{uuid.uuid4().hex[:8]}"
+
+
+def frame(value: int, height: int = 24, width: int = 32) -> np.ndarray:
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def test_write_and_read(ring_name: str) -> None:
+    writer = FrameRingWriter(ring_name, frame_size=24 * 32 * 3, slots=4)
+    reader = FrameRingReader(ring_name)
+
+    assert reader.latest() is None
+    assert writer.write(frame(7), pts=1000, format="RGB", received_time=12.5, decode_time=0.004, meta={"index": 0})
+
+    ring_frame = reader.latest()
+    assert ring_frame is not None
+    with ring_frame:
+        assert ring_frame.data.shape == (24, 32, 3)
+        assert (ring_frame.data == 7).all()
+        assert not ring_frame.data.flags.writeable
+        assert ring_frame.pts == 1000
+        assert ring_frame.format == "RGB"
+        assert ring_frame.received_time == 12.5
+        assert ring_frame.decode_time == pytest.approx(0.004)
+        assert ring_frame.meta == {"index": 0}
+        assert ring_frame.is_valid()
+    assert reader.latest() is None
+
+    reader.close()
+    writer.close()
+
+
+def test_slower_reader_drops_frames(ring_name: str) -> None:
+    writer = FrameRingWriter(ring_name, frame_size=24 * 32 * 3, slots=4)
+    reader = FrameRingReader(ring_name)
+
+    writer.write(frame(1))
+    first = reader.latest()
+    assert first is not None
+    for value in range(2, 7):
+        writer.write(frame(value))
+
+    # the slot of the first frame was overwritten
+    assert not first.is_valid()
+    assert first.copy() is None
+    first.release()
+
+    latest = reader.latest()
+    assert latest is not None
+    assert (latest.data == 6).all()
+    latest.release()
+    assert reader.stats.frames == 2
+    assert reader.stats.dropped == 4
+
+    reader.close()
+    writer.close()
+
+
+def test_torn_read_is_retried(ring_name: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    writer = FrameRingWriter(ring_name, frame_size=24 * 32 * 3, slots=4)
+    reader = FrameRingReader(ring_name)
+    writer.write(frame(1), meta={"index": 1})
+    slot_sequence = FrameRingReader._slot_sequence
+    lapped = []
+
+    def lapping_writer(self: FrameRingReader, offset: int) -> int:
+        sequence = slot_sequence(self, offset)
+        if not lapped:
+            # right after the first check, the writer writes a new frame and starts overwriting the first slot
+            lapped.append(offset)
+            writer.write(frame(2), meta={"index": 2})
+            writer._buf[offset : offset + 8] = bytes(8)
+            writer._buf[offset + SLOT_HEADER_SIZE] = 0xFF
+        return sequence
+
+    monkeypatch.setattr(FrameRingReader, "_slot_sequence", lapping_writer)
+
+    # the half overwritten metadata is not decoded, the latest frame is read again
+    ring_frame = reader.latest()
+    assert ring_frame is not None
+    assert ring_frame.meta == {"index": 2}
+    ring_frame.release()
+    assert reader.stats.torn == 1
+
+    reader.close()
+    writer.close()
+
+
+def test_oversized_frames_are_not_written(ring_name: str) -> None:
+    writer = FrameRingWriter(ring_name, frame_size=24 * 32 * 3, meta_size=16)
+
+    assert not writer.write(frame(1, height=48))
+    assert not writer.write(frame(1), meta={"too": "long for the slot"})
+    # smaller frames and 2D frames fit
+    assert writer.write(np.zeros((10, 10), dtype=np.uint8))
+    assert writer.stats.oversized == 2
+    assert writer.stats.frames == 1
+
+    reader = FrameRingReader(ring_name)
+    ring_frame = reader.latest()
+    assert ring_frame is not None and ring_frame.data.shape == (10, 10, 1)
+    ring_frame.release()
+    reader.close()
+    writer.close()
+
+
+def test_closed_ring(ring_name: str) -> None:
+    writer = FrameRingWriter(ring_name, frame_size=16)
+    reader = FrameRingReader(ring_name)
+    assert reader.next_frame(timeout=0.01) is None
+
+    writer.close()
+    assert reader.closed
+    assert list(reader) == []
+    reader.close()
+
+    with pytest.raises(FileNotFoundError):
+        FrameRingReader(ring_name)
+
+
+def read_frame(name: str, queue: "multiprocessing.Queue[Optional[int]]") -> None:
+    reader = FrameRingReader(name)
+    ring_frame = reader.next_frame(timeout=5.0)
+    queue.put(None if ring_frame is None else int(ring_frame.data.sum()))
+    if ring_frame is not None:
+        ring_frame.release()
+    reader.close()
+
+
+def test_readers_in_other_processes(ring_name: str) -> None:
+    writer = FrameRingWriter(ring_name, frame_size=24 * 32 * 3)
+    queue: "multiprocessing.Queue[Optional[int]]" = multiprocessing.Queue()
+    readers = [multiprocessing.Process(target=read_frame, args=(ring_name, queue)) for _ in range(3)]
+    for process in readers:
+        process.start()
+
+    writer.write(frame(2))
+    results = [queue.get(timeout=10.0) for _ in readers]
+    for process in readers:
+        process.join()
+
+    assert results == [24 * 32 * 3 * 2] * 3
+    # the readers exiting must not remove the ring
+    reader = FrameRingReader(ring_name)
+    reader.close()
+    writer.close()
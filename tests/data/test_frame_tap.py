@@ -0,0 +1,143 @@
+import asyncio
+from typing import List, Optional
+
+import gi
+import numpy as np
+import pytest
+
+gi.require_version("Gst", "1.0")
+gi.require_version("GstVideo", "1.0")
+from gi.repository import Gst, GstVideo  # noqa : E402
+
+from gst_signalling.gst_frame_tap import GstFrameTap, VideoFrame  # noqa : E402
+
+Gst.init(None)
+
+WIDTH, HEIGHT = 5, 2  # rows of 15 bytes, padded by the raw video layout
+
+
+def make_buffer(stride: int, offset: int = 0) -> Gst.Buffer:
+    """RGB buffer whose pixel (x, y) is (x, y, 7), the padding is filled with 255."""
+    data = bytearray([255] * (offset + stride * HEIGHT))
+    for y in range(HEIGHT):
+        for x in range(WIDTH):
+            start = offset + y * stride + x * 3
+            data[start : start + 3] = bytes([x, y, 7])
+    return Gst.Buffer.new_wrapped(bytes(data))
+
+
+def expected_frame() -> np.ndarray:
+    frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    frame[:, :, 0] = np.arange(WIDTH)
+    frame[:, :, 1] = np.arange(HEIGHT)[:, None]
+    frame[:, :, 2] = 7
+    return frame
+
+
+def test_rows_are_laid_out_as_the_caps() -> None:
+    caps = Gst.Caps.from_string(f"video/x-raw,format=RGB,width={WIDTH},height={HEIGHT}")
+    with VideoFrame(make_buffer(stride=16), caps, "RGB", None) as frame:
+        assert (frame.width, frame.height) == (WIDTH, HEIGHT)
+        np.testing.assert_array_equal(frame.data, expected_frame())
+
+
+def test_video_meta_takes_precedence_over_the_caps() -> None:
+    # eg. a hardware decoder aligning its rows on 32 bytes, after a header
+    buffer = make_buffer(stride=32, offset=8)
+    GstVideo.buffer_add_video_meta_full(
+        buffer, GstVideo.VideoFrameFlags.NONE, GstVideo.VideoFormat.RGB, WIDTH, HEIGHT, 1, [8, 0, 0, 0], [32, 0, 0, 0]
+    )
+    caps = Gst.Caps.from_string(f"video/x-raw,format=RGB,width={WIDTH},height={HEIGHT}")
+
+    frame = VideoFrame(buffer, caps, "RGB", 0.01)
+    np.testing.assert_array_equal(frame.data, expected_frame())
+    assert frame.decode_time == 0.01
+    frame.release()
+    assert not hasattr(frame, "data")
+
+
+def make_webrtc(pipeline: Gst.Pipeline, buffers: int) -> Gst.Bin:
+    """Bin standing in for a webrtcbin, adding a video pad of raw RGB frames."""
+    webrtc = Gst.parse_bin_from_description(
+        f"videotestsrc num-buffers={buffers} pattern=white ! "
+        f"capsfilter name=caps caps=video/x-raw,format=RGB,width=64,height=48,framerate=30/1,media=video",
+        False,
+    )
+    pipeline.add(webrtc)
+    return webrtc
+
+
+def add_video_pad(webrtc: Gst.Bin) -> None:
+    caps = webrtc.get_by_name("caps")
+    assert caps is not None
+    webrtc.add_pad(Gst.GhostPad.new("src", caps.get_static_pad("src")))
+
+
+async def read_frames(tap: GstFrameTap, count: int) -> List[VideoFrame]:
+    frames: List[VideoFrame] = []
+    while len(frames) < count:
+        frame: Optional[VideoFrame] = await asyncio.wait_for(tap.next_frame(), 5.0)
+        assert frame is not None
+        frames.append(frame)
+    return frames
+
+
+def test_tap_decodes_the_video_pad_of_the_webrtcbin() -> None:
+    async def run() -> None:
+        pipeline = Gst.Pipeline.new()
+        webrtc = make_webrtc(pipeline, buffers=3)
+        tap = GstFrameTap(pipeline, webrtc, asyncio.get_running_loop())
+        add_video_pad(webrtc)
+        assert tap.element_count == 5
+
+        pipeline.set_state(Gst.State.PLAYING)
+        try:
+            frame = (await read_frames(tap, 1))[0]
+            with frame:
+                assert frame.data.shape == (48, 64, 3)
+                assert (frame.data == 255).all()
+            stats = tap.stats
+            assert stats.received >= 1 and stats.delivered == 1
+        finally:
+            tap.close()
+            pipeline.set_state(Gst.State.NULL)
+        assert tap.element_count == 0
+        assert await tap.next_frame() is None
+
+    asyncio.run(run())
+
+
+def test_tap_keeps_only_the_latest_frame() -> None:
+    async def run() -> None:
+        pipeline = Gst.Pipeline.new()
+        webrtc = make_webrtc(pipeline, buffers=5)
+        tap = GstFrameTap(pipeline, webrtc, asyncio.get_running_loop())
+        add_video_pad(webrtc)
+
+        pipeline.set_state(Gst.State.PLAYING)
+        try:
+            bus = pipeline.get_bus()
+            msg = await asyncio.to_thread(bus.timed_pop_filtered, 5 * Gst.SECOND, Gst.MessageType.EOS)
+            assert msg is not None
+
+            # the frames that were not read are dropped, only the last one is in the mailbox
+            frame = tap.latest()
+            assert frame is not None
+            frame.release()
+            assert tap.latest() is None
+            assert tap.stats.received == 5
+            assert (tap.stats.delivered, tap.stats.dropped) == (1, 4)
+        finally:
+            tap.close()
+            pipeline.set_state(Gst.State.NULL)
+
+    asyncio.run(run())
+
+
+def test_unsupported_format() -> None:
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(ValueError):
+            GstFrameTap(Gst.Pipeline.new(), Gst.Bin.new(), loop, format="I420")
+    finally:
+        loop.close()
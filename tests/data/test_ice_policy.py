@@ -0,0 +1,114 @@
+import ipaddress
+
+from gst_signalling.ice_policy import (
+    VIRTUAL_INTERFACES,
+    IceCandidateFilter,
+    IcePolicy,
+    parse_candidate,
+)
+
+INTERFACES = {
+    "wlan0": [ipaddress.ip_address("192.168.1.20")],
+    "docker0": [ipaddress.ip_address("172.17.0.1")],
+}
+
+HOST_WLAN = "candidate:1 1 UDP 2015363327 192.168.1.20 47353 typ host"
+HOST_DOCKER = "candidate:2 1 UDP 2015363326 172.17.0.1 47354 typ host"
+SRFLX_WLAN = "candidate:3 1 UDP 1679819007 203.0.113.7 61000 typ srflx raddr 192.168.1.20 rport 47353"
+SRFLX_DOCKER = "candidate:4 1 UDP 1679819006 203.0.113.7 61001 typ srflx raddr 172.17.0.1 rport 47354"
+TCP_HOST = "candidate:5 1 TCP 1015021823 192.168.1.20 9 typ host tcptype active"
+
+
+def test_parse_candidate() -> None:
+    candidate = parse_candidate("a=" + SRFLX_WLAN)
+    assert candidate is not None
+    assert candidate.protocol == "udp"
+    assert candidate.type == "srflx"
+    assert candidate.port == 61000
+    assert candidate.related_address == "192.168.1.20"
+    assert candidate.ip == ipaddress.ip_address("203.0.113.7")
+
+    mdns = parse_candidate("candidate:1 1 UDP 2015363327 4ad5c3d1-0b1e.local 47353 typ host")
+    assert mdns is not None and mdns.ip is None
+
+    assert parse_candidate("candidate:1 1 UDP not-a-priority 192.168.1.20 47353 typ host") is None
+    assert parse_candidate("garbage") is None
+
+
+def test_virtual_interfaces_are_filtered() -> None:
+    ice_filter = IceCandidateFilter(IcePolicy(deny_interfaces=VIRTUAL_INTERFACES), INTERFACES)
+
+    assert ice_filter.accept("s", "local", HOST_WLAN)
+    assert not ice_filter.accept("s", "local", HOST_DOCKER)
+    # reflexive candidates are attributed to the interface of their base address
+    assert ice_filter.accept("s", "local", SRFLX_WLAN)
+    assert not ice_filter.accept("s", "local", SRFLX_DOCKER)
+    # interface filters only apply to the local candidates
+    assert ice_filter.accept("s", "remote", HOST_DOCKER)
+
+    stats = ice_filter.get_stats()
+    assert stats.accepted == {"local": 2, "remote": 1}
+    assert stats.filtered["local"] == {"interface": 2}
+
+
+def test_allowed_interfaces() -> None:
+    ice_filter = IceCandidateFilter(IcePolicy(allow_interfaces=["wlan*"]), INTERFACES)
+
+    assert ice_filter.accept("s", "local", HOST_WLAN)
+    assert not ice_filter.accept("s", "local", HOST_DOCKER)
+    # unknown interface
+    assert not ice_filter.accept("s", "local", "candidate:6 1 UDP 2015363327 10.8.0.2 47353 typ host")
+
+
+def test_types_protocols_and_subnets() -> None:
+    ice_filter = IceCandidateFilter(
+        IcePolicy(candidate_types=["host"], protocols=["udp"], deny_subnets=["172.16.0.0/12"]), INTERFACES
+    )
+
+    assert ice_filter.accept("s", "remote", HOST_WLAN)
+    assert not ice_filter.accept("s", "remote", SRFLX_WLAN)
+    assert not ice_filter.accept("s", "remote", TCP_HOST)
+    assert not ice_filter.accept("s", "remote", HOST_DOCKER)
+    assert not ice_filter.accept("s", "remote", "garbage")
+
+    assert ice_filter.get_stats().filtered["remote"] == {"type": 1, "protocol": 1, "subnet": 1, "invalid": 1}
+
+
+def test_candidate_cap_and_end_of_candidates() -> None:
+    ice_filter = IceCandidateFilter(IcePolicy(max_candidates=1), INTERFACES)
+
+    assert ice_filter.accept("a", "local", HOST_WLAN)
+    assert not ice_filter.accept("a", "local", SRFLX_WLAN)
+    # the cap is by session and direction
+    assert ice_filter.accept("a", "remote", HOST_WLAN)
+    assert ice_filter.accept("b", "local", HOST_WLAN)
+    # the end-of-candidates marker is never filtered
+    assert ice_filter.accept("a", "local", "")
+
+    ice_filter.forget("a")
+    assert ice_filter.accept("a", "local", SRFLX_WLAN)
+    assert ice_filter.get_stats().filtered["local"] == {"cap": 1}
+
+
+def test_ice_restart_resets_the_cap() -> None:
+    ice_filter = IceCandidateFilter(IcePolicy(max_candidates=1), INTERFACES)
+    offer = "v=0\r\nm=video 9 UDP/TLS/RTP/SAVPF 96\r\na=ice-ufrag:first\r\na=ice-pwd:secret\r\n"
+
+    assert not ice_filter.update_credentials("a", "local", offer)
+    assert ice_filter.accept("a", "local", HOST_WLAN)
+    assert ice_filter.accept("a", "remote", HOST_WLAN)
+    assert not ice_filter.accept("a", "local", SRFLX_WLAN)
+
+    # renegotiation with the same credentials keeps the count
+    assert not ice_filter.update_credentials("a", "local", offer)
+    assert not ice_filter.accept("a", "local", SRFLX_WLAN)
+
+    # the restart offer gathers new local candidates, the remote ones are reset by the answer
+    assert ice_filter.update_credentials("a", "local", offer.replace("first", "second"))
+    assert ice_filter.accept("a", "local", SRFLX_WLAN)
+    assert not ice_filter.accept("a", "remote", SRFLX_WLAN)
+    assert not ice_filter.update_credentials("a", "remote", "a=ice-ufrag:remote1\r\n")
+    assert ice_filter.update_credentials("a", "remote", "a=ice-ufrag:remote2\r\n")
+    assert ice_filter.accept("a", "remote", SRFLX_WLAN)
+
+    assert not ice_filter.update_credentials("a", "local", "v=0\r\n")
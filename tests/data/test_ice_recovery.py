@@ -0,0 +1,32 @@
+import pytest
+
+from gst_signalling.ice_recovery import IceRecoveryTracker
+
+
+def test_recovery_time() -> None:
+    tracker = IceRecoveryTracker()
+    assert tracker.recovered(now=1.0) is None
+
+    assert tracker.lost(now=10.0)
+    # failed after disconnected is the same loss
+    assert not tracker.lost(now=10.2)
+    tracker.restarted()
+    assert tracker.recovered(now=10.3) == pytest.approx(0.3)
+
+    assert tracker.lost(now=20.0)
+    assert tracker.recovered(now=20.1) == pytest.approx(0.1)
+
+    stats = tracker.stats
+    assert (stats.losses, stats.restarts, stats.recoveries, stats.failures) == (2, 1, 2, 0)
+    assert stats.last_recovery_time == pytest.approx(0.1)
+    assert stats.max_recovery_time == pytest.approx(0.3)
+
+
+def test_failed_recovery() -> None:
+    tracker = IceRecoveryTracker()
+    tracker.lost(now=0.0)
+    tracker.failed()
+
+    assert not tracker.is_lost
+    assert tracker.stats.failures == 1
+    assert tracker.stats.recoveries == 0
@@ -0,0 +1,51 @@
+import importlib.util
+import subprocess
+import sys
+from typing import Callable
+
+import pytest
+
+SIGNALLING_ONLY = """
+import time
+start = time.perf_counter()
+import gst_signalling
+import gst_signalling.utils
+from gst_signalling import GstSignalling, GstSignallingListener
+import examples.get_producer_list
+print(time.perf_counter() - start)
+import sys
+print("gi" in sys.modules)
+"""
+
+# the signalling modules load in a few hundred ms, GStreamer and its plugin registry take longer on their own
+MAX_SIGNALLING_IMPORT_TIME = 1.0
+
+requires_gi = pytest.mark.skipif(importlib.util.find_spec("gi") is None, reason="GStreamer bindings not installed")
+
+
+@requires_gi
+def test_signalling_only_import_does_not_load_gstreamer(record_property: Callable[[str, object], None]) -> None:
+    output = subprocess.check_output([sys.executable, "-c", SIGNALLING_ONLY], text=True)
+    import_time, gi_loaded = output.split()
+
+    record_property("signalling_import_time", float(import_time))
+    assert gi_loaded == "False"
+    assert float(import_time) < MAX_SIGNALLING_IMPORT_TIME
+
+
+@requires_gi
+def test_media_roles_are_loaded_on_access() -> None:
+    code = "import sys, gst_signalling; gst_signalling.GstSignallingProducer; print('gi' in sys.modules)"
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+
+    assert output.strip() == "True"
+
+
+def test_producer_pool_is_loaded_on_access() -> None:
+    code = (
+        "import sys, gst_signalling; loaded = 'multiprocessing.connection' in sys.modules; "
+        "gst_signalling.GstSignallingProducerPool; print(loaded, 'multiprocessing.connection' in sys.modules)"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)
+
+    assert output.split() == ["False", "True"]
@@ -0,0 +1,68 @@
+import pytest
+
+from gst_signalling.keyframes import GopCache, KeyframeLimiter
+
+
+def test_burst_of_joins_is_coalesced() -> None:
+    limiter = KeyframeLimiter(min_interval=0.5)
+
+    assert limiter.request(10.0) == 0.0
+    # the next joins within the interval share a single scheduled key frame
+    assert limiter.request(10.1) == pytest.approx(0.4)
+    assert limiter.request(10.2) is None
+    assert limiter.request(10.3) is None
+
+    limiter.fired(10.5)
+    assert limiter.request(10.6) == pytest.approx(0.4)
+    limiter.fired(11.0)
+    assert limiter.request(12.0) == 0.0
+
+
+def test_gop_cache_starts_on_a_keyframe() -> None:
+    cache: GopCache[str] = GopCache(max_bytes=100)
+
+    # packets before the first key frame are not a decodable group of pictures
+    cache.add("delta-0", 10)
+    assert cache.get() is None
+
+    cache.keyframe()
+    cache.add("key-1a", 30)
+    cache.add("key-1b", 30)
+    cache.add("delta-1", 10)
+    assert cache.get() == ["key-1a", "key-1b", "delta-1"]
+    assert cache.size == 70
+
+    # a new key frame replaces the group
+    cache.keyframe()
+    assert cache.get() == ["key-1a", "key-1b", "delta-1"]
+    cache.add("key-2", 30)
+    assert cache.get() == ["key-2"]
+    assert cache.size == 30
+
+
+def test_gop_cache_bounds() -> None:
+    cache: GopCache[str] = GopCache(max_bytes=100)
+
+    cache.keyframe()
+    cache.add("key-1", 60)
+    cache.add("delta-1", 40)
+    assert cache.size == 100
+
+    # a group that no longer fits is dropped until the next key frame
+    cache.add("delta-2", 1)
+    assert cache.get() is None
+    assert cache.size == 0
+    cache.add("delta-3", 1)
+    assert cache.get() is None
+
+    cache.keyframe()
+    cache.add("key-2", 120)
+    assert cache.get() is None
+    cache.keyframe()
+    cache.add("key-3", 50)
+    assert cache.get() == ["key-3"]
+
+    # the snapshot is not changed by the next packets
+    packets = cache.get()
+    cache.add("delta-4", 10)
+    assert packets == ["key-3"]
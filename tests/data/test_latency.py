@@ -0,0 +1,75 @@
+import gi
+import pytest
+
+gi.require_version("Gst", "1.0")
+from gi.repository import Gst  # noqa : E402
+
+from gst_signalling.gst_latency import (  # noqa : E402
+    PROFILES,
+    LatencyProfile,
+    apply_to_encoder,
+    apply_to_queue,
+    apply_to_webrtc,
+    get_profile,
+)
+
+Gst.init(None)
+
+
+def test_get_profile() -> None:
+    assert get_profile("balanced") is PROFILES["balanced"]
+    custom = LatencyProfile(latency=50)
+    assert get_profile(custom) is custom
+    with pytest.raises(ValueError):
+        get_profile("unknown")
+
+
+def test_profiles_do_not_share_their_encoder_properties() -> None:
+    assert LatencyProfile(latency=50).encoder_properties is None
+    with pytest.raises(TypeError):
+        PROFILES["balanced"].encoder_properties["deadline"] = "0"  # type: ignore[index]
+
+
+def test_apply_to_queue() -> None:
+    queue = Gst.ElementFactory.make("queue")
+    assert queue is not None
+
+    apply_to_queue(queue, PROFILES["teleop-ultra-low"])
+    assert queue.get_property("max-size-buffers") == 1
+    assert queue.get_property("leaky").value_nick == "downstream"
+
+    # unlimited: no limit in bytes or time either
+    apply_to_queue(queue, PROFILES["recording"])
+    assert [queue.get_property(p) for p in ["max-size-buffers", "max-size-bytes", "max-size-time"]] == [0, 0, 0]
+    assert queue.get_property("leaky").value_nick == "no"
+
+
+def test_apply_to_encoder_sets_the_existing_properties() -> None:
+    encoder = Gst.parse_bin_from_description("identity name=first ! queue name=second", True)
+    profile = LatencyProfile(latency=50, encoder_properties={"silent": "false", "max-size-buffers": "3", "tune": "zerolatency"})
+
+    apply_to_encoder(encoder, profile)
+    first, second = encoder.get_by_name("first"), encoder.get_by_name("second")
+    assert first is not None and second is not None
+    assert first.get_property("silent") is False
+    assert second.get_property("max-size-buffers") == 3
+
+    # a single element, and a profile keeping the encoder settings
+    apply_to_encoder(second, LatencyProfile(latency=50, encoder_properties={"max-size-buffers": "5"}))
+    assert second.get_property("max-size-buffers") == 5
+    apply_to_encoder(second, LatencyProfile(latency=50))
+    assert second.get_property("max-size-buffers") == 5
+
+
+def test_apply_to_webrtc() -> None:
+    webrtc = Gst.ElementFactory.make("webrtcbin")
+    if webrtc is None:
+        pytest.skip("webrtcbin not available")
+
+    apply_to_webrtc(webrtc, PROFILES["teleop-ultra-low"])
+    assert webrtc.get_property("latency") == 20
+    rtpbin = webrtc.get_by_name("rtpbin")
+    assert rtpbin is not None
+    assert rtpbin.get_property("drop-on-latency") is True
+    assert rtpbin.get_property("do-retransmission") is False
+    assert rtpbin.get_property("buffer-mode").value_nick == "none"
@@ -0,0 +1,39 @@
+import json
+
+from gst_signalling.latest_value import LatestValueDecoder, LatestValueEncoder
+
+
+def test_stale_messages_are_dropped() -> None:
+    encoder = LatestValueEncoder()
+    received = []
+    decoder = LatestValueDecoder(on_value=lambda key, value: received.append((key, value)))
+
+    first = encoder.encode("cmd", 1)
+    second = encoder.encode("cmd", 2)
+    other = encoder.encode("other", "a")
+
+    assert decoder.decode(second)
+    assert not decoder.decode(first)
+    assert decoder.decode(other)
+
+    assert received == [("cmd", 2), ("other", "a")]
+    assert decoder.get("cmd") == 2
+
+    stats = decoder.get_stats()
+    assert stats["cmd"].delivered == 1
+    assert stats["cmd"].stale == 1
+    assert stats["cmd"].percentile(50) is not None
+
+
+def test_sender_restart_resets_sequence() -> None:
+    decoder = LatestValueDecoder()
+
+    first_sender = LatestValueEncoder()
+    for i in range(5):
+        decoder.decode(first_sender.encode("cmd", i))
+
+    restarted_sender = LatestValueEncoder()
+    message = restarted_sender.encode("cmd", "restarted")
+    assert json.loads(message)["s"] == 0
+    assert decoder.decode(message)
+    assert decoder.get("cmd") == "restarted"
@@ -0,0 +1,97 @@
+import time
+from typing import Callable, Iterator, List
+
+import gi
+import numpy as np
+import pytest
+
+gi.require_version("Gst", "1.0")
+from gi.repository import Gst  # noqa : E402
+
+from gst_signalling.gst_media_source import GstVideoSource  # noqa : E402
+
+Gst.init(None)
+
+WIDTH, HEIGHT = 64, 48
+FRAME = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def pipeline() -> Iterator[Gst.Pipeline]:
+    pipeline = Gst.Pipeline.new()
+    yield pipeline
+    pipeline.set_state(Gst.State.NULL)
+
+
+def start(pipeline: Gst.Pipeline, source: GstVideoSource) -> Gst.Pad:
+    """Attaches the source and starts the pipeline, returns the src pad of the appsrc."""
+    source.attach(pipeline)
+    pipeline.set_state(Gst.State.PLAYING)
+    appsrc = next(e for e in pipeline.children if e.get_factory().get_name() == "appsrc")
+    pad = appsrc.get_static_pad("src")
+    assert pad is not None
+    return pad
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 1.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_frames_are_paced_to_the_framerate(pipeline: Gst.Pipeline) -> None:
+    # no encoder: the raw frames reach the tee, which drops them as no session is linked
+    source = GstVideoSource(WIDTH, HEIGHT, framerate=100, encoder="identity")
+    pad = start(pipeline, source)
+    pts: List[int] = []
+    pad.add_probe(Gst.PadProbeType.BUFFER, lambda _, info: pts.append(info.get_buffer().pts) or Gst.PadProbeReturn.OK)
+
+    assert source.push_frame(FRAME)
+    time.sleep(0.05)
+    assert source.push_frame(FRAME)
+    wait_for(lambda: len(pts) == 2)
+
+    assert len(pts) == 2
+    assert all(t % source.frame_duration == 0 for t in pts)
+    assert pts[1] - pts[0] >= 4 * source.frame_duration
+    stats = source.get_stats()
+    assert (stats.pushed, stats.dropped, stats.late) == (2, 0, 1)
+
+
+def test_frames_are_dropped_when_the_pool_is_exhausted(pipeline: Gst.Pipeline) -> None:
+    source = GstVideoSource(WIDTH, HEIGHT, framerate=100, encoder="identity", pool_size=2)
+    pad = start(pipeline, source)
+    # the pipeline stops consuming: the first frame is blocked on the pad, the second one queued in the appsrc
+    probe_id = pad.add_probe(Gst.PadProbeType.BLOCK | Gst.PadProbeType.BUFFER, lambda *_: Gst.PadProbeReturn.OK)
+
+    for _ in range(2):
+        assert source.push_frame(FRAME)
+        time.sleep(0.02)
+    assert not source.push_frame(FRAME)
+    stats = source.get_stats()
+    assert (stats.pushed, stats.dropped) == (2, 1)
+
+    # the buffers return to the pool once the pipeline catches up
+    pad.remove_probe(probe_id)
+    time.sleep(0.1)
+    assert source.push_frame(FRAME)
+    assert source.get_stats().pushed == 3
+
+
+def test_frame_must_match_the_caps(pipeline: Gst.Pipeline) -> None:
+    # slots of 1 s: the frames below are all pushed in the same slot
+    source = GstVideoSource(WIDTH, HEIGHT, framerate=1, encoder="identity")
+    with pytest.raises(RuntimeError):
+        source.push_frame(FRAME)
+
+    start(pipeline, source)
+    with pytest.raises(ValueError):
+        source.push_frame(np.zeros((HEIGHT, WIDTH, 4), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        source.push_frame(b"\x00" * 10)
+
+    # the invalid frames did not take the slot of the next valid one
+    assert source.push_frame(FRAME)
+    assert not source.push_frame(FRAME)
+    stats = source.get_stats()
+    assert (stats.pushed, stats.dropped) == (1, 1)
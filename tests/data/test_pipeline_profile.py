@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+from gst_signalling.pipeline_profile import (
+    DEFAULT_TRACERS,
+    TraceAggregator,
+    configure_tracers,
+    parse_record,
+    tracers_configured,
+)
+
+ENCODER = (
+    "element-latency, element-id=(string)0x5581, element=(string)vp8enc0, src=(string)src, "
+    "time=(guint64){time}, ts=(guint64)1000;"
+)
+JITTERBUFFER = (
+    "element-latency, element-id=(string)0x5582, element=(string)rtpjitterbuffer0, src=(string)src, "
+    "time=(guint64)20000000, ts=(guint64)1000;"
+)
+
+
+def test_parse_record() -> None:
+    record = parse_record(ENCODER.format(time=5000000))
+    assert record == (
+        "element-latency",
+        {"element-id": "0x5581", "element": "vp8enc0", "src": "src", "time": "5000000", "ts": "1000"},
+    )
+
+    record = parse_record('latency, src-element=(string)"my src", sink-element=(string)webrtcbin0, time=(guint64)1;')
+    assert record is not None and record[1]["src-element"] == "my src"
+    assert parse_record("not a record!") is None
+
+
+def test_element_latency_by_session() -> None:
+    aggregator = TraceAggregator()
+    aggregator.add(ENCODER.format(time=5000000))
+    aggregator.add(ENCODER.format(time=7000000))
+    aggregator.add(JITTERBUFFER)
+    aggregator.add(
+        "element-reported-latency, element-id=(string)0x5582, element=(string)rtpjitterbuffer0, live=(boolean)1, "
+        "min=(guint64)200000000, max=(guint64)200000000, ts=(guint64)1000;"
+    )
+    aggregator.add(
+        "latency, src-element-id=(string)0x1, src-element=(string)appsrc0, src=(string)src, "
+        "sink-element-id=(string)0x2, sink-element=(string)webrtcbin0, sink=(string)sink, "
+        "time=(guint64)30000000, ts=(guint64)1000;"
+    )
+
+    profile = aggregator.get_profile({0x5582: "session-a", 0x2: "session-a"})
+
+    encoder = profile.elements["vp8enc0"]
+    assert encoder.latency.count == 2
+    assert encoder.latency.mean == pytest.approx(0.006)
+    assert encoder.latency.max == pytest.approx(0.007)
+
+    jitterbuffer = profile.sessions["session-a"]["rtpjitterbuffer0"]
+    assert jitterbuffer.latency.last == pytest.approx(0.02)
+    assert jitterbuffer.reported_min == pytest.approx(0.2)
+    assert profile.paths["appsrc0 -> webrtcbin0"].last == pytest.approx(0.03)
+
+    # elements of another pipeline of the process are left out
+    profile = aggregator.get_profile({0x5582: "session-a"}, pipeline=[0x1])
+    assert list(profile.elements) == []
+    assert list(profile.sessions["session-a"]) == ["rtpjitterbuffer0"]
+    assert profile.paths == {}
+
+    # forgetting the elements of a closed session
+    aggregator.forget([0x5582, 0x2])
+    profile = aggregator.get_profile({})
+    assert list(profile.elements) == ["vp8enc0"]
+    assert profile.paths == {}
+
+
+def test_elements_with_the_same_name() -> None:
+    # each webrtcbin has its own rtpbin
+    rtpbin = (
+        "element-latency, element-id=(string){id}, element=(string)rtpbin, src=(string)send_rtp_src_0, "
+        "time=(guint64){time}, ts=(guint64)1000;"
+    )
+    aggregator = TraceAggregator()
+    aggregator.add(rtpbin.format(id="0x7f0000a0", time=1000000))
+    aggregator.add(rtpbin.format(id="0x7f0000b0", time=3000000))
+    aggregator.add(rtpbin.format(id="0x7f0000c0", time=5000000))
+
+    profile = aggregator.get_profile({0x7F0000A0: "session-a", 0x7F0000B0: "session-b"})
+    assert profile.sessions["session-a"]["rtpbin"].latency.last == pytest.approx(0.001)
+    assert profile.sessions["session-b"]["rtpbin"].latency.last == pytest.approx(0.003)
+    assert profile.elements["rtpbin"].latency.count == 1
+
+    # the other sessions keep their statistics
+    aggregator.forget([0x7F0000A0])
+    profile = aggregator.get_profile({0x7F0000B0: "session-b"})
+    assert list(profile.sessions) == ["session-b"]
+    assert profile.sessions["session-b"]["rtpbin"].latency.count == 1
+
+    # shared elements with the same name are told apart by their ID
+    aggregator.add(rtpbin.format(id="0x7f0000d0", time=5000000))
+    profile = aggregator.get_profile({})
+    assert list(profile.elements) == ["rtpbin", "rtpbin (0x7f0000c0)", "rtpbin (0x7f0000d0)"]
+
+
+def test_cpu_load() -> None:
+    aggregator = TraceAggregator()
+    aggregator.add("proc-rusage, ts=(guint64)1000, average-cpuload=(uint)250, current-cpuload=(uint)400, time=(guint64)1;")
+    aggregator.add(
+        "thread-rusage, ts=(guint64)1000, thread-id=(uint64)1234, average-cpuload=(uint)100, "
+        "current-cpuload=(uint)120, time=(guint64)1;"
+    )
+    aggregator.add("element-latency, element=(string)vp8enc0;")
+    aggregator.add("element-latency, element-id=(string)(nil), element=(string)vp8enc0, time=(guint64)1;")
+
+    profile = aggregator.get_profile({})
+    assert profile.cpu_load == (40.0, 25.0)
+    assert profile.threads == {"1234": (12.0, 10.0)}
+    assert aggregator.records == 2
+    assert aggregator.invalid == 2
+
+
+def test_configure_tracers(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("GST_TRACERS", raising=False)
+    assert not tracers_configured()
+
+    configure_tracers()
+    assert os.environ["GST_TRACERS"] == DEFAULT_TRACERS
+    assert tracers_configured()
+
+    monkeypatch.setenv("GST_TRACERS", "leaks")
+    configure_tracers("latency")
+    assert os.environ["GST_TRACERS"] == "leaks;latency"
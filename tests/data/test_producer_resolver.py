@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from gst_signalling.gst_signalling import GstSignalling
+from gst_signalling.producer_resolver import match_name, resolve_producer
+
+
+class FakeServer(GstSignalling):
+    """Answers the list requests with the producers currently registered."""
+
+    def __init__(self) -> None:
+        super().__init__(host="", port=0)
+        self.peer_id = "consumer"
+        self.producers: Dict[str, Dict[str, str]] = {}
+        self.sent: List[Dict[str, Any]] = []
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        self.sent.append(message)
+        if message["type"] == "list":
+            producers = [{"id": peer_id, "meta": meta} for peer_id, meta in self.producers.items()]
+            asyncio.get_running_loop().create_task(self._handle_messages({"type": "list", "producers": producers}))
+
+    async def add_producer(self, peer_id: str, name: str) -> None:
+        self.producers[peer_id] = {"name": name}
+        message = {"type": "peerStatusChanged", "peerId": peer_id, "roles": ["producer"], "meta": {"name": name}}
+        await self._handle_messages(message)
+
+
+async def test_listed_producer() -> None:
+    server = FakeServer()
+    server.producers = {"other": {"name": "camera"}, "robot-id": {"name": "robot"}}
+
+    assert await resolve_producer(server, match_name("robot"), timeout=1.0) == "robot-id"
+    # resolved from the list alone, without listening
+    assert [m["type"] for m in server.sent] == ["list"]
+
+
+async def test_waits_for_the_producer() -> None:
+    server = FakeServer()
+
+    async def start_producer() -> None:
+        await asyncio.sleep(0.05)
+        await server.add_producer("other", "camera")
+        await server.add_producer("robot-id", "robot")
+
+    asyncio.get_running_loop().create_task(start_producer())
+    assert await resolve_producer(server, lambda _, meta: meta["name"].startswith("rob"), timeout=1.0) == "robot-id"
+
+    # listens while waiting, then stops
+    assert [m["type"] for m in server.sent] == ["list", "setPeerStatus", "list", "setPeerStatus"]
+    assert server.sent[1]["roles"] == ["listener"]
+    assert server.sent[-1]["roles"] == []
+
+
+async def test_timeout() -> None:
+    server = FakeServer()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await resolve_producer(server, match_name("robot"), timeout=0.05)
+    assert server.sent[-1]["roles"] == []
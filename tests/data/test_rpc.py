@@ -0,0 +1,158 @@
+import asyncio
+from typing import Any, AsyncIterator, List, Tuple
+
+import pytest
+
+from gst_signalling.rpc import LatencyHistogram, RpcEndpoint, RpcError
+
+
+def make_pair(**kwargs: Any) -> Tuple[RpcEndpoint, RpcEndpoint]:
+    loop = asyncio.get_running_loop()
+    endpoints: List[RpcEndpoint] = []
+
+    client = RpcEndpoint(lambda message: loop.call_soon(endpoints[1].feed, message))
+    server = RpcEndpoint(lambda message: loop.call_soon(endpoints[0].feed, message), **kwargs)
+    endpoints.extend([client, server])
+    return client, server
+
+
+async def test_pipelined_calls() -> None:
+    client, server = make_pair()
+
+    async def echo(params: Any) -> Any:
+        await asyncio.sleep(params["delay"])
+        return params["value"]
+
+    server.register("echo", echo)
+
+    # replies arrive out of order, each call gets its own result
+    results = await asyncio.gather(*[client.call("echo", {"value": i, "delay": 0.01 * (5 - i)}) for i in range(5)])
+    assert results == list(range(5))
+
+    stats = client.get_stats()
+    assert stats.calls == 5
+    assert stats.in_flight == 0
+    assert stats.latencies["echo"].count == 5
+    assert server.get_stats().served == 5
+
+
+async def test_errors_and_deadlines() -> None:
+    client, server = make_pair()
+
+    async def fail(_: Any) -> None:
+        raise ValueError("broken")
+
+    cancelled = asyncio.Event()
+
+    async def slow(_: Any) -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    server.register("fail", fail)
+    server.register("slow", slow)
+
+    with pytest.raises(RpcError) as error:
+        await client.call("missing")
+    assert error.value.code == "not_found"
+
+    with pytest.raises(RpcError) as error:
+        await client.call("fail")
+    assert error.value.code == "error"
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.call("slow", timeout=0.05)
+    await asyncio.wait_for(cancelled.wait(), 1.0)
+
+    stats = client.get_stats()
+    assert stats.errors == 2
+    assert stats.timeouts == 1
+    assert stats.in_flight == 0
+    assert server.get_stats().handling == 0
+
+
+async def test_cancellation_reaches_the_handler() -> None:
+    client, server = make_pair()
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def wait(_: Any) -> None:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    server.register("wait", wait)
+
+    task = asyncio.create_task(client.call("wait"))
+    await started.wait()
+    task.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1.0)
+    assert client.get_stats().cancelled == 1
+
+
+async def test_streaming_reply() -> None:
+    client, server = make_pair()
+
+    async def count(params: Any) -> AsyncIterator[int]:
+        for i in range(params):
+            yield i
+
+    server.register("count", count, stream=True)
+
+    assert [item async for item in client.stream("count", 4)] == [0, 1, 2, 3]
+
+
+async def test_concurrency_limit_and_overload() -> None:
+    client, server = make_pair(max_concurrency=2, max_queued=1)
+    running = 0
+    max_running = 0
+
+    async def work(_: Any) -> None:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+
+    server.register("work", work)
+
+    results = await asyncio.gather(*[client.call("work") for _ in range(4)], return_exceptions=True)
+    assert max_running == 2
+
+    # 2 running + 1 queued, the fourth call is refused
+    rejected = [r for r in results if isinstance(r, RpcError)]
+    assert len(rejected) == 1 and rejected[0].code == "overloaded"
+    assert server.get_stats().rejected == 1
+
+
+async def test_close_fails_calls_in_flight() -> None:
+    client, server = make_pair()
+
+    async def wait(_: Any) -> None:
+        await asyncio.sleep(10)
+
+    server.register("wait", wait)
+
+    task = asyncio.create_task(client.call("wait"))
+    await asyncio.sleep(0.01)
+    client.close()
+    server.close()
+
+    with pytest.raises(RpcError) as error:
+        await task
+    assert error.value.code == "closed"
+
+
+def test_latency_histogram() -> None:
+    histogram = LatencyHistogram()
+    for latency in [0.001] * 90 + [0.1] * 10:
+        histogram.add(latency)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == pytest.approx(0.0016, rel=0.1)
+    assert histogram.percentile(99) == pytest.approx(0.1)
+    assert histogram.mean == pytest.approx(0.0109)
@@ -0,0 +1,70 @@
+import asyncio
+from typing import List, Tuple
+
+from gst_signalling.session_dispatcher import SessionDispatcher
+
+
+async def test_ordered_per_session_concurrent_across_sessions() -> None:
+    dispatcher = SessionDispatcher()
+    events: List[Tuple[str, str]] = []
+
+    async def handler(session_id: str, name: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        events.append((session_id, name))
+
+    dispatcher.dispatch("slow", handler, "slow", "peer", 0.2)
+    dispatcher.dispatch("slow", handler, "slow", "end", 0.0)
+    dispatcher.dispatch("fast", handler, "fast", "peer", 0.0)
+
+    await asyncio.sleep(0.3)
+
+    # the fast session is not delayed by the slow one, and end never overtakes peer
+    assert events == [("fast", "peer"), ("slow", "peer"), ("slow", "end")]
+
+    backlogs = dispatcher.get_backlogs()
+    assert backlogs["slow"].processed == 2
+    assert backlogs["slow"].max_queued == 2
+    assert backlogs["slow"].queued == 0
+
+
+async def test_bounded_queue_and_failing_handler() -> None:
+    dispatcher = SessionDispatcher(max_queue_size=2)
+
+    async def failing() -> None:
+        raise RuntimeError("boom")
+
+    assert dispatcher.dispatch("session", failing)
+    assert dispatcher.dispatch("session", failing)
+    assert not dispatcher.dispatch("session", failing)
+
+    await asyncio.sleep(0.01)
+
+    backlog = dispatcher.get_backlogs()["session"]
+    assert backlog.processed == 2
+    assert backlog.dropped == 1
+    await dispatcher.close()
+
+
+async def test_late_events_of_a_forgotten_session_are_ignored() -> None:
+    dispatcher = SessionDispatcher(max_forgotten=2)
+    events: List[str] = []
+
+    async def handler(name: str) -> None:
+        events.append(name)
+
+    assert dispatcher.dispatch("ended", handler, "peer")
+    await asyncio.sleep(0.01)
+    dispatcher.forget("ended")
+
+    # eg. a trailing ICE candidate: no backlog is created again for the session
+    assert not dispatcher.dispatch("ended", handler, "ice")
+    await asyncio.sleep(0.01)
+    assert events == ["peer"]
+    assert dispatcher.get_backlogs() == {}
+
+    # only the last ended sessions are remembered
+    dispatcher.forget("second")
+    dispatcher.forget("third")
+    assert dispatcher.dispatch("ended", handler, "reused")
+    assert not dispatcher.dispatch("third", handler, "ice")
+    await dispatcher.close()
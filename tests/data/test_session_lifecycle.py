@@ -0,0 +1,41 @@
+from gst_signalling.session_lifecycle import (
+    LifecycleConfig,
+    SessionLifecycle,
+    SessionState,
+)
+
+
+def test_half_open_sessions_expire() -> None:
+    lifecycle = SessionLifecycle(LifecycleConfig(negotiation_timeout=10.0, idle_timeout=30.0))
+
+    lifecycle.add("stuck", now=0.0)
+    lifecycle.add("live", now=0.0)
+    lifecycle.add("gone", now=0.0)
+    lifecycle.set_state("live", SessionState.CONNECTED, now=1.0)
+    lifecycle.set_state("gone", SessionState.CONNECTED, now=1.0)
+    lifecycle.set_state("gone", SessionState.DISCONNECTED, now=2.0)
+
+    assert lifecycle.expired(now=5.0) == []
+    assert lifecycle.expired(now=11.0) == [("stuck", "negotiation_timeout")]
+    assert sorted(lifecycle.expired(now=40.0)) == [("gone", "idle_timeout"), ("stuck", "negotiation_timeout")]
+
+    # a recovered session does not expire
+    lifecycle.set_state("gone", SessionState.CONNECTED, now=20.0)
+    assert lifecycle.expired(now=40.0) == [("stuck", "negotiation_timeout")]
+
+
+def test_stats() -> None:
+    lifecycle = SessionLifecycle(LifecycleConfig(negotiation_timeout=None))
+    lifecycle.add("a", now=0.0)
+    lifecycle.add("b", now=0.0)
+    lifecycle.set_state("b", SessionState.CONNECTED, now=0.0)
+    lifecycle.remove("a")
+    lifecycle.remove("a")
+    lifecycle.record_reaped("idle_timeout")
+
+    assert lifecycle.expired(now=1000.0) == []
+    stats = lifecycle.get_stats()
+    assert stats.sessions == 1
+    assert stats.by_state == {"connected": 1}
+    assert (stats.created, stats.closed) == (2, 1)
+    assert stats.reaped == {"idle_timeout": 1}
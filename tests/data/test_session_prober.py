@@ -0,0 +1,48 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Tuple
+
+from gi.repository import GstWebRTC
+
+from gst_signalling.gst_clock_sync import GstSessionProber
+
+
+class FakeChannel:
+    """Control data channel recording the sent messages."""
+
+    def __init__(self) -> None:
+        self.props = SimpleNamespace(ready_state=GstWebRTC.WebRTCDataChannelState.OPEN)
+        self.sent: List[str] = []
+        self.handlers: Dict[int, Tuple[str, Callable[..., None]]] = {}
+
+    def send_string(self, data: str) -> None:
+        self.sent.append(data)
+
+    def connect(self, signal: str, handler: Callable[..., None]) -> int:
+        handler_id = len(self.handlers) + 1
+        self.handlers[handler_id] = (signal, handler)
+        return handler_id
+
+    def disconnect(self, handler_id: int) -> None:
+        del self.handlers[handler_id]
+
+    def receive(self, message: Dict[str, object]) -> None:
+        for signal, handler in list(self.handlers.values()):
+            if signal == "on-message-string":
+                handler(self, json.dumps(message))
+
+
+async def test_stopped_prober_no_longer_answers() -> None:
+    channel = FakeChannel()
+    prober = GstSessionProber(channel, asyncio.get_running_loop())
+
+    channel.receive({"type": "probe", "id": 1, "t0": 0.0})
+    assert json.loads(channel.sent[0])["type"] == "probe-reply"
+
+    prober.stop()
+    assert channel.handlers == {}
+    channel.receive({"type": "probe", "id": 2, "t0": 0.0})
+    channel.receive({"type": "probe-reply", "id": 1, "t0": 0.0, "t1": 0.1, "t2": 0.1})
+    assert len(channel.sent) == 1
+    assert prober.get_stats().samples == 0
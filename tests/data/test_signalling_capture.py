@@ -0,0 +1,105 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from websockets.legacy.client import connect
+
+from gst_signalling.gst_signalling import GstSignalling
+from gst_signalling.signalling_capture import (
+    CapturedMessage,
+    SignallingCapture,
+    read_capture,
+    replay,
+)
+from gst_signalling.signalling_replay import ReplayServer, ReplaySignalling
+
+SESSION = [
+    CapturedMessage(0.0, "in", {"type": "welcome", "peerId": "producer"}),
+    CapturedMessage(0.05, "out", {"type": "setPeerStatus", "roles": ["producer"], "meta": {"name": "robot"}}),
+    CapturedMessage(0.1, "in", {"type": "startSession", "peerId": "consumer", "sessionId": "s1"}),
+    CapturedMessage(0.2, "in", {"type": "endSession", "sessionId": "s1"}),
+]
+
+
+@pytest.mark.parametrize("name", ["capture.jsonl", "capture.jsonl.gz"])
+def test_capture_roundtrip(tmp_path: Path, name: str) -> None:
+    path = str(tmp_path / name)
+    with SignallingCapture(path) as capture:
+        for captured in SESSION:
+            capture.record(captured.direction, captured.message)
+
+    messages = read_capture(path)
+    assert [(m.direction, m.message) for m in messages] == [(m.direction, m.message) for m in SESSION]
+    assert all(b.time >= a.time for a, b in zip(messages, messages[1:]))
+
+
+def test_invalid_capture(tmp_path: Path) -> None:
+    path = tmp_path / "other.jsonl"
+    path.write_text('{"type": "welcome"}\n')
+    with pytest.raises(ValueError):
+        read_capture(str(path))
+
+
+async def test_accelerated_replay() -> None:
+    delivered: List[Dict[str, Any]] = []
+
+    async def deliver(message: Dict[str, Any]) -> None:
+        delivered.append(message)
+
+    t_start = time.monotonic()
+    stats = await replay(SESSION, deliver, speed=4.0)
+
+    # only the incoming messages, 0.2s of capture in about 0.05s
+    assert delivered == [m.message for m in SESSION if m.direction == "in"]
+    assert stats.messages == 3
+    assert 0.04 < time.monotonic() - t_start < 0.2
+
+
+async def test_replay_into_signalling(tmp_path: Path) -> None:
+    signalling = ReplaySignalling(SESSION, speed=0)
+    signalling.start_capture(str(tmp_path / "replayed.jsonl"))
+    events: List[str] = []
+
+    @signalling.on("StartSession")  # type: ignore[arg-type]
+    def on_start_session(peer_id: str, session_id: str) -> None:
+        events.append(session_id)
+
+    @signalling.on("Welcome")  # type: ignore[arg-type]
+    async def on_welcome(peer_id: str) -> None:
+        await signalling.set_peer_status(roles=["producer"], name="robot")
+
+    await signalling.connect()
+    await asyncio.wait_for(signalling.done.wait(), 1.0)
+    await asyncio.sleep(0.01)
+    await signalling.close()
+
+    assert signalling.peer_id == "producer"
+    assert events == ["s1"]
+    assert signalling.sent == [{**SESSION[1].message, "peerId": "producer"}]
+
+    # the replayed session can itself be captured
+    captured = read_capture(str(tmp_path / "replayed.jsonl"))
+    assert [m.message["type"] for m in captured if m.direction == "in"] == ["welcome", "startSession", "endSession"]
+    assert [m.message["type"] for m in captured if m.direction == "out"] == ["setPeerStatus"]
+
+
+async def test_stand_in_server() -> None:
+    server = ReplayServer(SESSION, port=0, speed=0)
+    await server.start()
+
+    signalling = GstSignalling("127.0.0.1", server.port)
+    ended = asyncio.Event()
+    signalling.on("EndSession", lambda _: ended.set())
+
+    await signalling.connect()
+    await asyncio.wait_for(ended.wait(), 1.0)
+    await signalling.send_list()
+    await asyncio.sleep(0.05)
+    await signalling.close()
+    await server.close()
+
+    assert signalling.peer_id == "producer"
+    assert server.received == [{"type": "list"}]
+    assert server.replays[0].messages == 3
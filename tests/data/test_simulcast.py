@@ -0,0 +1,30 @@
+from gst_signalling.simulcast import LayerPolicy
+
+
+def test_layer_goes_down_on_congestion_and_up_when_stable() -> None:
+    policy = LayerPolicy(layers=3, up_after=3)
+
+    assert policy.update("s", 0, fraction_lost=0.10) == 1
+    assert policy.update("s", 1, fraction_lost=0.0, rtt=0.5) == 2
+    assert policy.update("s", 2, fraction_lost=0.20) == 2
+
+    assert policy.update("s", 2, fraction_lost=0.0) == 2
+    assert policy.update("s", 2, fraction_lost=0.0) == 2
+    assert policy.update("s", 2, fraction_lost=0.0) == 1
+
+    # a report between good and congested resets the count
+    assert policy.update("s", 1, fraction_lost=0.0) == 1
+    assert policy.update("s", 1, fraction_lost=0.03) == 1
+    assert policy.update("s", 1, fraction_lost=0.0) == 1
+    assert policy.update("s", 1, fraction_lost=0.0) == 1
+    assert policy.update("s", 1, fraction_lost=0.0) == 0
+    assert policy.update("s", 0, fraction_lost=0.0) == 0
+
+
+def test_sessions_are_independent() -> None:
+    policy = LayerPolicy(layers=2, up_after=2)
+    policy.update("a", 1, fraction_lost=0.0)
+    policy.update("b", 1, fraction_lost=0.5)
+
+    assert policy.update("a", 1, fraction_lost=0.0) == 0
+    assert policy.update("b", 1, fraction_lost=0.0) == 1
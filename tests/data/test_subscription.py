@@ -0,0 +1,58 @@
+from typing import List
+
+from gst_signalling.subscription import (
+    StreamSubscription,
+    add_media_labels,
+    parse_media_lines,
+)
+
+OFFER = "\r\n".join(
+    [
+        "v=0",
+        "o=- 0 0 IN IP4 0.0.0.0",
+        "s=-",
+        "t=0 0",
+        "m=video 9 UDP/TLS/RTP/SAVPF 96",
+        "a=mid:video0",
+        "a=sendonly",
+        "m=video 9 UDP/TLS/RTP/SAVPF 97",
+        "a=mid:video1",
+        "a=sendonly",
+        "m=audio 9 UDP/TLS/RTP/SAVPF 111",
+        "a=mid:audio2",
+        "a=sendonly",
+        "m=application 9 UDP/DTLS/SCTP webrtc-datachannel",
+        "a=mid:application3",
+        "",
+    ]
+)
+
+
+def test_labels_round_trip() -> None:
+    sdp = add_media_labels(OFFER, ["left", "right"])
+    lines = parse_media_lines(sdp)
+
+    assert [(line.kind, line.mid, line.label) for line in lines] == [
+        ("video", "video0", "left"),
+        ("video", "video1", "right"),
+        ("audio", "audio2", None),
+        ("application", "application3", None),
+    ]
+    assert all(line.direction == "sendonly" for line in lines[:3])
+
+
+def test_subscription_filters() -> None:
+    lines = parse_media_lines(add_media_labels(OFFER, ["left", "right"]))
+
+    def accepted(subscription: StreamSubscription) -> List[str]:
+        return [str(line.mid) for line in lines if subscription.accepts(line)]
+
+    assert accepted(StreamSubscription()) == ["video0", "video1", "audio2", "application3"]
+    assert accepted(StreamSubscription(labels={"left"})) == ["video0", "application3"]
+    assert accepted(StreamSubscription(kinds={"video"})) == ["video0", "video1", "application3"]
+    assert accepted(StreamSubscription(kinds={"video"}, mids={"video1", "audio2"})) == ["video1", "application3"]
+
+
+def test_inactive_lines() -> None:
+    answer = OFFER.replace("a=mid:video1\r\na=sendonly", "a=mid:video1\r\na=inactive").replace("m=audio 9", "m=audio 0")
+    assert [line.active for line in parse_media_lines(answer)] == [True, False, False, True]
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+import time
+
+from gst_signalling.watchdog import LoopWatchdog
+
+
+def blocking_new_session_handler() -> None:
+    time.sleep(0.3)
+
+
+async def test_blocked_loop_is_sampled() -> None:
+    watchdog = LoopWatchdog(interval=0.02, budget=0.05)
+    watchdog.start()
+
+    await asyncio.sleep(0.05)
+    blocking_new_session_handler()
+    await asyncio.sleep(0.05)
+    await watchdog.stop()
+
+    stats = watchdog.get_stats()
+    assert stats.loop_lag.max > 0.2
+    assert any("blocking_new_session_handler" in site for site in stats.blocking_sites)
+
+
+async def test_callback_delay_and_slow_handlers() -> None:
+    watchdog = LoopWatchdog(budget=0.05)
+    loop = asyncio.get_running_loop()
+    done = asyncio.Event()
+
+    async def send_sdp() -> None:
+        done.set()
+
+    threading.Thread(target=watchdog.run_threadsafe, args=(send_sdp(), loop, "send_sdp")).start()
+    await asyncio.wait_for(done.wait(), 1.0)
+
+    watchdog.record_handler_time("fast", 0.01)
+    watchdog.record_handler_time("slow", 0.1)
+
+    stats = watchdog.get_stats()
+    assert stats.callback_delays["send_sdp"].count == 1
+    assert list(stats.slow_handlers) == ["slow"]
+    assert stats.slow_handlers["slow"].max == 0.1
@@ -0,0 +1,65 @@
+import asyncio
+import multiprocessing
+from typing import Any, Dict, List, Set, Tuple
+
+from gst_signalling.gst_worker_pool import (
+    GstSignallingProducerPool,
+    WorkerSignalling,
+    WorkerStats,
+)
+
+
+async def test_worker_signalling_over_pipe() -> None:
+    front, worker = multiprocessing.Pipe()
+    signalling = WorkerSignalling(worker)
+    events: List[Tuple[str, Any]] = []
+    started = asyncio.Event()
+
+    @signalling.on("StartSession")  # type: ignore[arg-type]
+    def on_start_session(peer_id: str, session_id: str) -> None:
+        events.append(("StartSession", session_id))
+
+    @signalling.on("Peer")  # type: ignore[arg-type]
+    def on_peer(session_id: str, message: Dict[str, Any]) -> None:
+        events.append(("Peer", message))
+        started.set()
+
+    await signalling.connect()
+    front.send({"type": "welcome", "peerId": "front"})
+    front.send({"type": "startSession", "peerId": "consumer", "sessionId": "s1"})
+    front.send({"type": "peer", "sessionId": "s1", "ice": {"candidate": "c", "sdpMLineIndex": 0}})
+    await asyncio.wait_for(started.wait(), 1.0)
+
+    assert signalling.peer_id == "front"
+    assert events == [("StartSession", "s1"), ("Peer", {"ice": {"candidate": "c", "sdpMLineIndex": 0}})]
+
+    await signalling.send_peer_message("s1", "sdp", {"type": "offer", "sdp": "v=0"})
+    assert front.recv() == {"type": "peer", "sessionId": "s1", "sdp": {"type": "offer", "sdp": "v=0"}}
+
+    front.close()
+    await asyncio.wait_for(signalling.closed.wait(), 1.0)
+    await signalling.close()
+
+
+async def test_sessions_go_to_least_loaded_worker() -> None:
+    pool = GstSignallingProducerPool("127.0.0.1", 8443, "pool", workers=2)
+    sent: List[Tuple[int, Dict[str, Any]]] = []
+
+    class FakeWorker:
+        def __init__(self, index: int) -> None:
+            self.stats = WorkerStats(index, alive=True)
+            self.session_ids: Set[str] = set()
+
+        def send(self, message: Dict[str, Any]) -> None:
+            sent.append((self.stats.index, message))
+
+    pool.workers = [FakeWorker(0), FakeWorker(1)]  # type: ignore[list-item]
+
+    for session_id in ("a", "b", "c"):
+        pool.assign_session(session_id, {"type": "startSession", "sessionId": session_id})
+    pool.unassign_session("a")
+    pool.assign_session("d", {"type": "startSession", "sessionId": "d"})
+
+    assert [index for index, _ in sent] == [0, 1, 0, 0]
+    assert [stats.sessions for stats in pool.get_worker_stats()] == [2, 1]
+    assert [stats.sessions_total for stats in pool.get_worker_stats()] == [3, 1]